@@ -0,0 +1,130 @@
+import os
+import json
+import logging
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config⚙️.json')
+
+
+def load_config_section(section: str, default=None):
+    """Sección (o valor) del config de Omni para los scripts que corren fuera de MonitoringSystem"""
+    default = {} if default is None else default
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f).get(section, default)
+    except (OSError, ValueError):
+        return default
+
+
+class WatchedFile:
+    """Lee el archivo una vez y solo lo vuelve a leer si cambia su mtime, tamaño o inode"""
+
+    def __init__(self, path: str, parse: Callable[[str], Any]):
+        self.path = path
+        self.parse = parse
+        self.signature: Optional[Tuple[int, int, int]] = None
+        self.value: Any = None
+        self.lock = threading.Lock()
+
+    def current_signature(self) -> Tuple[int, int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def get(self) -> Any:
+        self.refresh()
+        return self.value
+
+    def refresh(self) -> bool:
+        """Recarga si el archivo cambió; devuelve True cuando hubo recarga"""
+        signature = self.current_signature()
+        if signature == self.signature:
+            return False
+        with self.lock:
+            if signature == self.signature:
+                return False
+            # La firma se registra antes de parsear: una edición inválida se reporta una sola vez
+            self.signature = signature
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.value = self.parse(f.read())
+        return True
+
+
+class ConfigStore:
+    """
+    Configuración y prompt con recarga en caliente. Un hilo revisa los archivos periódicamente
+    (o al recibir un evento de watchdog, si está instalado) y avisa a los listeners con la
+    configuración nueva ya parseada, sin reiniciar el sistema.
+    """
+
+    def __init__(self, config_path: str, interval: float = 1.0):
+        self.config_file = WatchedFile(config_path, json.loads)
+        self.config_file.refresh()
+        self.prompt_file = WatchedFile(self.config_file.value["RUTA_PROMPT"], str.strip)
+        self.interval = interval
+        self.listeners: List[Callable[[dict], None]] = []
+        self.wakeup = threading.Event()
+        self.running = False
+        self.observer = None
+
+    @property
+    def config(self) -> dict:
+        return self.config_file.value
+
+    def prompt(self) -> str:
+        return self.prompt_file.get()
+
+    def on_change(self, listener: Callable[[dict], None]):
+        self.listeners.append(listener)
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.watch, daemon=True, name="ConfigWatcher").start()
+        self.start_observer()
+
+    def start_observer(self):
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return
+
+        store = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                store.wakeup.set()
+
+        self.observer = Observer()
+        for path in {os.path.dirname(os.path.abspath(self.config_file.path)),
+                     os.path.dirname(os.path.abspath(self.prompt_file.path))}:
+            self.observer.schedule(Handler(), path, recursive=False)
+        self.observer.start()
+
+    def watch(self):
+        while self.running:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error recargando la configuración: {e}")
+
+    def check(self):
+        if self.config_file.refresh():
+            config = self.config_file.value
+            if config["RUTA_PROMPT"] != self.prompt_file.path:
+                self.prompt_file = WatchedFile(config["RUTA_PROMPT"], str.strip)
+            logger.info("Configuración recargada")
+            for listener in self.listeners:
+                listener(config)
+        if self.prompt_file.refresh():
+            logger.info("Prompt recargado")
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        if self.observer:
+            self.observer.stop()
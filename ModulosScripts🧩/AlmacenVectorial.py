@@ -0,0 +1,570 @@
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from AlmacenConfiguracion import load_config_section
+
+logger = logging.getLogger(__name__)
+
+# Filas puntuadas por bloque en la búsqueda exacta: acota la memoria temporal al decuantizar
+SCAN_BLOCK = 65536
+# Por debajo de estas filas la búsqueda exacta es tan rápida como IVF y no se entrena
+MIN_TRAIN_ROWS = 1000
+
+
+def load_store_config() -> dict:
+    """Sección ALMACEN_VECTORIAL; el cargador y la búsqueda deben abrir el mismo backend"""
+    return load_config_section('ALMACEN_VECTORIAL')
+
+
+def normalized(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+class ChromaVectorStore:
+    """Backend por defecto: la colección de Chroma tal como se usaba hasta ahora"""
+
+    def __init__(self, persist_directory: str, embeddings):
+        from langchain_community.vectorstores import Chroma
+        self.db = Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+
+    def upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[dict]):
+        self.db._collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def delete(self, ids: List[str]):
+        if ids:
+            self.db.delete(ids=ids)
+
+    def similarity_search_with_score(self, query: str, k: int = 10) -> List[Tuple]:
+        """(documento con su ID de fragmento, distancia); se consulta la colección para no perder los IDs"""
+        from langchain_core.documents import Document
+        embedding = self.db._embedding_function.embed_query(query)
+        found = self.db._collection.query(query_embeddings=[embedding], n_results=k,
+                                          include=['documents', 'metadatas', 'distances'])
+        return [
+            (Document(id=chunk_id, page_content=document, metadata=metadata or {}), distance)
+            for chunk_id, document, metadata, distance in zip(
+                found['ids'][0], found['documents'][0], found['metadatas'][0], found['distances'][0])
+        ]
+
+    def count(self) -> int:
+        return self.db._collection.count()
+
+    def export(self, batch_size: int = 1000) -> Iterator[tuple]:
+        """(ids, embeddings, documents, metadatas) por páginas, para migrar o medir"""
+        for offset in range(0, self.count(), batch_size):
+            page = self.db._collection.get(include=['embeddings', 'documents', 'metadatas'],
+                                           limit=batch_size, offset=offset)
+            yield page['ids'], np.asarray(page['embeddings'], dtype=np.float32), page['documents'], page['metadatas']
+
+    def persist(self):
+        if hasattr(self.db, 'persist'):
+            self.db.persist()
+
+
+class LocalVectorStore:
+    """
+    Índice local sobre vectores cuantizados (int8 con escala por vector, o float16) en un archivo
+    memory-mapped. Los textos y metadatos van a un log JSONL que solo se lee para los resultados.
+    La búsqueda aproximada usa IVF (k-means en numpy) o HNSW si hnswlib está instalado; en ambos casos
+    los candidatos se puntúan sobre los vectores cuantizados. state.json, escrito al persistir, marca
+    qué parte de los archivos es válida, así un lector nunca ve una escritura a medias. Los borrados
+    solo van al log (quedan confirmados con el mismo state.json) y a la máscara `alive` en memoria;
+    los archivos mapeados y el grafo HNSW nunca llevan lápidas.
+    """
+
+    CODE_DTYPES = {'int8': np.int8, 'float16': np.float16}
+
+    def __init__(self, directory: str, embeddings=None, index: str = 'ivf', quantization: str = 'int8', nprobe: int = 8):
+        if quantization not in self.CODE_DTYPES:
+            raise ValueError(f"Cuantización no soportada: {quantization}")
+        self.directory = directory
+        self.embeddings = embeddings
+        self.quantization = quantization
+        self.code_dtype = self.CODE_DTYPES[quantization]
+        self.nprobe = nprobe
+        self.index_type = index
+        if index == 'hnsw':
+            try:
+                import hnswlib  # noqa: F401
+            except ImportError:
+                logger.warning("hnswlib no está instalado; se usa IVF")
+                self.index_type = 'ivf'
+        os.makedirs(directory, exist_ok=True)
+
+        self.load_state()
+        self.codes = self.scales = self.lists = None
+        self.alive = np.zeros(0, dtype=bool)
+        self.ids: List[Optional[str]] = []
+        self.offsets: List[int] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.centroids = None
+        self.inverted = None
+        self.hnsw = None
+        self.hnsw_rows = 0
+        self.hnsw_live = 0
+        self.stale_capacities: List[int] = []
+        self.lock = threading.Lock()
+        if self.dim:
+            self.map_files()
+            self.replay_records()
+            self.load_index()
+
+    # --- archivos ---
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def read_state(self) -> dict:
+        try:
+            with open(self.path('state.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load_state(self):
+        self.state = self.read_state()
+        self.rows = self.state.get('rows', 0)
+        self.dim = self.state.get('dim')
+        self.capacity = self.state.get('capacity', 0)
+        self.records_bytes = self.state.get('records_bytes', 0)
+
+    def file_specs(self, capacity: int):
+        """(atributo, archivo, dtype, forma); el nombre lleva la capacidad porque en Windows
+        no se puede redimensionar un archivo que otro proceso tiene mapeado"""
+        return (
+            ('codes', f'vectors-{capacity}.{self.quantization}', self.code_dtype, (capacity, self.dim)),
+            ('scales', f'scales-{capacity}.f32', np.float32, (capacity,)),
+            ('lists', f'lists-{capacity}.i32', np.int32, (capacity,)),
+        )
+
+    def map_files(self, attempts: int = 5):
+        """Mapea los archivos que indica state.json; nunca los crea (eso solo lo hace ensure_capacity)"""
+        for _ in range(attempts):
+            specs = self.file_specs(self.capacity)
+            if all(os.path.exists(self.path(name)) for _, name, _, _ in specs):
+                try:
+                    for attribute, name, dtype, shape in specs:
+                        setattr(self, attribute, np.memmap(self.path(name), dtype=dtype, mode='r+', shape=shape))
+                    return
+                except FileNotFoundError:
+                    pass
+            # Un escritor pasó a otra capacidad y borró estos archivos: se relee su state.json
+            time.sleep(0.1)
+            self.load_state()
+        raise FileNotFoundError(f"Archivos del almacén incompletos en {self.directory} (capacidad {self.capacity})")
+
+    def ensure_capacity(self, rows: int):
+        if rows <= self.capacity:
+            return
+        previous = self.capacity
+        self.capacity = max(rows, self.capacity * 2, 1024)
+        for attribute, name, dtype, shape in self.file_specs(self.capacity):
+            mapped = np.memmap(self.path(name), dtype=dtype, mode='w+', shape=shape)
+            old = getattr(self, attribute)
+            if old is not None:
+                mapped[:self.rows] = old[:self.rows]
+            setattr(self, attribute, mapped)
+        alive = np.zeros(self.capacity, dtype=bool)
+        alive[:self.rows] = self.alive[:self.rows]
+        self.alive = alive
+        if previous:
+            self.stale_capacities.append(previous)
+
+    def replay_records(self):
+        """Reconstruye fila -> id y offsets leyendo solo la parte del log confirmada en state.json"""
+        path = self.path('records.jsonl')
+        self.ids = [None] * self.rows
+        self.offsets = [0] * self.rows
+        self.alive = np.zeros(self.capacity, dtype=bool)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if offset + len(line) > self.records_bytes:
+                    break
+                record = json.loads(line)
+                if 'delete' in record:
+                    self.ids[record['delete']] = None
+                else:
+                    self.ids[record['row']] = record['id']
+                    self.offsets[record['row']] = offset
+                offset += len(line)
+        self.id_to_row = {chunk_id: row for row, chunk_id in enumerate(self.ids) if chunk_id is not None}
+        self.alive[list(self.id_to_row.values())] = True
+
+    def append_records(self, records: List[dict]) -> List[int]:
+        path = self.path('records.jsonl')
+        with open(path, 'a+b') as f:
+            # Restos de una escritura que no llegó a persistirse
+            f.truncate(self.records_bytes)
+            f.seek(self.records_bytes)
+            offsets = []
+            for record in records:
+                offsets.append(f.tell())
+                f.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+            self.records_bytes = f.tell()
+        return offsets
+
+    def read_record(self, row: int) -> dict:
+        with open(self.path('records.jsonl'), 'rb') as f:
+            f.seek(self.offsets[row])
+            return json.loads(f.readline())
+
+    # --- cuantización ---
+
+    def encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        vectors = normalized(np.asarray(vectors, dtype=np.float32))
+        if self.quantization == 'int8':
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+            codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+            return codes, scales.astype(np.float32)
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+
+    def decode(self, rows) -> np.ndarray:
+        return self.codes[rows].astype(np.float32) * self.scales[rows][:, None]
+
+    def score(self, rows, query: np.ndarray) -> np.ndarray:
+        return (self.codes[rows].astype(np.float32) @ query) * self.scales[rows]
+
+    # --- escritura ---
+
+    def upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[dict]):
+        if not ids:
+            return
+        codes, scales = self.encode(embeddings)
+        with self.lock:
+            if self.dim is None:
+                self.dim = codes.shape[1]
+            self.delete_rows([self.id_to_row[i] for i in ids if i in self.id_to_row])
+            start = self.rows
+            self.ensure_capacity(start + len(ids))
+            rows = np.arange(start, start + len(ids))
+            self.codes[rows] = codes
+            self.scales[rows] = scales
+            self.lists[rows] = self.assign(self.decode(rows)) if self.centroids is not None else -1
+            self.alive[rows] = True
+            offsets = self.append_records([
+                {'row': int(row), 'id': chunk_id, 'document': document, 'metadata': metadata}
+                for row, chunk_id, document, metadata in zip(rows, ids, documents, metadatas)
+            ])
+            self.ids.extend(ids)
+            self.offsets.extend(offsets)
+            self.id_to_row.update((chunk_id, int(row)) for chunk_id, row in zip(ids, rows))
+            self.rows += len(ids)
+            self.inverted = None
+
+    def delete(self, ids: List[str]):
+        with self.lock:
+            rows = [self.id_to_row[i] for i in ids or [] if i in self.id_to_row]
+            self.delete_rows(rows)
+
+    def delete_rows(self, rows: List[int]):
+        if not rows:
+            return
+        # La lápida queda en el log, que persist() confirma junto con el resto: escribirla en los
+        # archivos mapeados antes de state.json dejaría conteo y búsqueda en desacuerdo tras un corte
+        self.append_records([{'delete': int(row)} for row in rows])
+        for row in rows:
+            self.id_to_row.pop(self.ids[row], None)
+            self.ids[row] = None
+            if row < self.hnsw_rows:
+                self.hnsw_live -= 1
+        self.alive[rows] = False
+
+    def count(self) -> int:
+        return len(self.id_to_row)
+
+    def persist(self):
+        with self.lock:
+            if not self.rows:
+                return
+            live = self.count()
+            trained = self.state.get('trained_rows', 0)
+            if self.index_type == 'ivf' and live >= MIN_TRAIN_ROWS and live > 2 * trained:
+                self.train_ivf()
+                trained = live
+            if self.index_type == 'hnsw':
+                self.update_hnsw()
+            for mapped in (self.codes, self.scales, self.lists):
+                mapped.flush()
+            self.state = {
+                'rows': self.rows, 'dim': self.dim, 'capacity': self.capacity,
+                'records_bytes': self.records_bytes, 'quantization': self.quantization,
+                'index': self.index_type, 'trained_rows': trained, 'hnsw_rows': self.hnsw_rows,
+            }
+            with open(self.path('state.json.tmp'), 'w', encoding='utf-8') as f:
+                json.dump(self.state, f)
+            os.replace(self.path('state.json.tmp'), self.path('state.json'))
+
+            # Los lectores pasan a los archivos nuevos al ver el state.json nuevo; si aún tienen abiertos
+            # los viejos (Windows no deja borrarlos) se reintenta en el próximo persist
+            for capacity in list(self.stale_capacities):
+                try:
+                    for _, name, _, _ in self.file_specs(capacity):
+                        if os.path.exists(self.path(name)):
+                            os.remove(self.path(name))
+                    self.stale_capacities.remove(capacity)
+                except OSError:
+                    pass
+
+    def export(self, batch_size: int = 1000) -> Iterator[tuple]:
+        """(ids, embeddings, documents, metadatas) por páginas, con los vectores decuantizados"""
+        rows = self.live_rows()
+        for start in range(0, len(rows), batch_size):
+            block = rows[start:start + batch_size]
+            records = [self.read_record(row) for row in block.tolist()]
+            yield ([r['id'] for r in records], self.decode(block),
+                   [r['document'] for r in records], [r['metadata'] for r in records])
+
+    def import_records(self, batches: Iterator[tuple]):
+        for ids, embeddings, documents, metadatas in batches:
+            self.upsert(ids, embeddings, documents, metadatas)
+        self.persist()
+
+    # --- índices ---
+
+    def live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.alive[:self.rows])
+
+    def train_ivf(self, iterations: int = 10):
+        """k-means esférico sobre una muestra; nlist ~ 4·sqrt(n)"""
+        rows = self.live_rows()
+        nlist = max(1, min(int(4 * np.sqrt(len(rows))), 4096))
+        rng = np.random.default_rng(0)
+        sample = self.decode(np.sort(rng.choice(rows, size=min(len(rows), nlist * 64), replace=False)))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            sums[empty] = centroids[empty]
+            centroids = normalized(sums)
+        self.centroids = centroids.astype(np.float32)
+        for start in range(0, len(rows), SCAN_BLOCK):
+            block = rows[start:start + SCAN_BLOCK]
+            self.lists[block] = self.assign(self.decode(block))
+        np.save(self.path('centroids.npy'), self.centroids)
+        self.inverted = None
+        logger.info(f"IVF entrenado: {nlist} listas sobre {len(rows)} vectores")
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def update_hnsw(self):
+        import hnswlib
+        if self.hnsw is None:
+            self.hnsw = hnswlib.Index(space='ip', dim=self.dim)
+            self.hnsw.init_index(max_elements=max(self.capacity, 1024), ef_construction=200, M=16)
+        elif self.hnsw.get_max_elements() < self.capacity:
+            self.hnsw.resize_index(self.capacity)
+        new_rows = np.arange(self.hnsw_rows, self.rows)
+        new_rows = new_rows[self.alive[new_rows]]
+        if len(new_rows):
+            self.hnsw.add_items(self.decode(new_rows), new_rows)
+        self.hnsw_live += len(new_rows)
+        self.hnsw_rows = self.rows
+        self.hnsw.save_index(self.path('hnsw.bin'))
+
+    def load_index(self):
+        if self.index_type == 'ivf' and os.path.exists(self.path('centroids.npy')):
+            self.centroids = np.load(self.path('centroids.npy'))
+        elif self.index_type == 'hnsw' and os.path.exists(self.path('hnsw.bin')):
+            import hnswlib
+            self.hnsw = hnswlib.Index(space='ip', dim=self.dim)
+            self.hnsw.load_index(self.path('hnsw.bin'), max_elements=max(self.capacity, 1024))
+            self.hnsw_rows = self.state.get('hnsw_rows', 0)
+            self.hnsw_live = int(np.count_nonzero(self.alive[:self.hnsw_rows]))
+
+    def inverted_lists(self):
+        """Filas agrupadas por lista IVF (orden + límites), calculado una vez por versión del índice"""
+        if self.inverted is None:
+            lists = self.lists[:self.rows]
+            order = np.argsort(lists, kind='stable')
+            bounds = np.searchsorted(lists[order], np.arange(len(self.centroids) + 1))
+            self.inverted = (order, bounds)
+        return self.inverted
+
+    # --- búsqueda ---
+
+    def candidate_rows(self, query: np.ndarray, k: int) -> Optional[np.ndarray]:
+        """Filas a puntuar según el índice; None = búsqueda exacta"""
+        if self.hnsw is not None:
+            # Los borrados siguen en el grafo y ocupan vecinos: se piden de más, sin pasar
+            # del total de elementos (knn_query falla si se piden más)
+            elements = self.hnsw.get_current_count()
+            neighbours = min(max(k * 4, 32) + elements - self.hnsw_live, elements)
+            labels = np.zeros(0, dtype=np.int64)
+            if neighbours > 0:
+                self.hnsw.set_ef(max(64, neighbours))
+                try:
+                    labels = self.hnsw.knn_query(query, k=neighbours)[0][0].astype(np.int64)
+                except RuntimeError:
+                    # Grafo de una versión anterior, con borrados marcados: menos vecinos de los pedidos
+                    return None
+            # Un grafo guardado justo antes de un corte puede traer filas sin confirmar; lo agregado
+            # después del último persist todavía no está en el grafo
+            return np.concatenate([labels[labels < self.hnsw_rows], np.arange(self.hnsw_rows, self.rows)])
+        if self.centroids is not None:
+            order, bounds = self.inverted_lists()
+            probes = np.argsort(-(self.centroids @ query))[:self.nprobe]
+            # Las filas sin lista asignada se puntúan siempre
+            return np.concatenate([order[:bounds[0]]] + [order[bounds[p]:bounds[p + 1]] for p in probes])
+        return None
+
+    def search_vectors(self, query: np.ndarray, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """(filas, similitud coseno) de los k vecinos más cercanos"""
+        query = normalized(np.asarray(query, dtype=np.float32))
+        if not self.rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        candidates = self.candidate_rows(query, k)
+        if candidates is None:
+            candidates = np.arange(self.rows)
+        candidates = candidates[self.alive[candidates]]
+
+        best_rows, best_scores = [], []
+        for start in range(0, len(candidates), SCAN_BLOCK):
+            block = candidates[start:start + SCAN_BLOCK]
+            scores = self.score(block, query)
+            top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+            best_rows.append(block[top])
+            best_scores.append(scores[top])
+        if not best_rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        rows, scores = np.concatenate(best_rows), np.concatenate(best_scores)
+        top = np.argsort(-scores)[:k]
+        return rows[top], scores[top]
+
+    def similarity_search_with_score(self, query: str, k: int = 10) -> List[Tuple]:
+        from langchain_core.documents import Document
+        rows, scores = self.search_vectors(np.asarray(self.embeddings.embed_query(query), dtype=np.float32), k)
+        results = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            record = self.read_record(row)
+            # Misma escala que la distancia L2 al cuadrado de Chroma sobre vectores normalizados
+            results.append((Document(id=record['id'], page_content=record['document'], metadata=record['metadata']),
+                            2.0 - 2.0 * score))
+        return results
+
+
+def local_store_directory(persist_directory: str, config: dict) -> str:
+    """Carpeta del almacén local: una por cuantización, junto a la colección de Chroma"""
+    return os.path.join(persist_directory, f"local_{config.get('cuantizacion', 'int8')}")
+
+
+def is_uuid(name: str) -> bool:
+    try:
+        uuid.UUID(name)
+        return True
+    except ValueError:
+        return False
+
+
+def store_version_files(persist_directory: str, config: Optional[dict] = None) -> List[str]:
+    """
+    Archivos que cambian cuando otro proceso confirma escrituras en el backend configurado:
+    state.json del almacén local, o la base de Chroma y sus segmentos (carpetas con nombre UUID).
+    Los archivos del almacén local sin confirmar y el índice léxico no cuentan.
+    """
+    config = load_store_config() if config is None else config
+    if config.get('backend', 'chroma') == 'local':
+        return [os.path.join(local_store_directory(persist_directory, config), 'state.json')]
+    files = [os.path.join(persist_directory, 'chroma.sqlite3')]
+    if os.path.isdir(persist_directory):
+        for entry in os.scandir(persist_directory):
+            if entry.is_dir() and is_uuid(entry.name):
+                files.extend(os.path.join(root, name) for root, _, names in os.walk(entry.path) for name in names)
+    return sorted(files)
+
+
+def open_vector_store(persist_directory: str, embeddings, config: Optional[dict] = None):
+    """Abre el backend configurado en ALMACEN_VECTORIAL ('chroma' por defecto o 'local')"""
+    config = load_store_config() if config is None else config
+    backend = config.get('backend', 'chroma')
+    if backend == 'chroma':
+        return ChromaVectorStore(persist_directory, embeddings)
+    if backend != 'local':
+        raise ValueError(f"Backend de vectores desconocido: {backend}")
+
+    quantization = config.get('cuantizacion', 'int8')
+    store = LocalVectorStore(
+        local_store_directory(persist_directory, config),
+        embeddings,
+        index=config.get('indice', 'ivf'),
+        quantization=quantization,
+        nprobe=config.get('nprobe', 8)
+    )
+    # Primera apertura con una colección de Chroma existente: se migra para no reingestar todo
+    if not store.rows and os.path.exists(os.path.join(persist_directory, 'chroma.sqlite3')):
+        logger.info("Migrando la colección de Chroma al índice local...")
+        store.import_records(ChromaVectorStore(persist_directory, embeddings).export())
+    return store
+
+
+def benchmark(persist_directory: Optional[str] = None, queries: int = 200, k: int = 10):
+    """recall@k y latencia de cada configuración local frente a la búsqueda exacta en float32"""
+    import tempfile
+
+    vectors = None
+    if persist_directory and os.path.exists(os.path.join(persist_directory, 'chroma.sqlite3')):
+        pages = list(ChromaVectorStore(persist_directory, None).export())
+        if pages:
+            vectors = np.concatenate([page[1] for page in pages])
+    if vectors is None:
+        # Sin colección: vectores sintéticos agrupados, con la dimensión de MiniLM
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(200, 384))
+        vectors = centers[rng.integers(0, 200, 50000)] + rng.normal(scale=0.6, size=(50000, 384))
+    vectors = normalized(np.asarray(vectors, dtype=np.float32))
+
+    rng = np.random.default_rng(1)
+    query_vectors = normalized(vectors[rng.choice(len(vectors), queries)] + rng.normal(scale=0.05, size=(queries, vectors.shape[1])))
+    exact = [set(np.argsort(-(vectors @ query))[:k].tolist()) for query in query_vectors]
+    print(f"{len(vectors)} vectores de {vectors.shape[1]} dimensiones, float32 = {vectors.nbytes / 1024 / 1024:.1f} MB")
+
+    configurations = [('int8', 'exacta', None), ('float16', 'exacta', None)]
+    configurations += [(q, 'ivf', nprobe) for q in ('int8', 'float16') for nprobe in (1, 4, 16)]
+    try:
+        import hnswlib  # noqa: F401
+        configurations += [('int8', 'hnsw', None)]
+    except ImportError:
+        print("hnswlib no instalado: se omite HNSW")
+
+    for quantization, index, nprobe in configurations:
+        with tempfile.TemporaryDirectory() as directory:
+            store = LocalVectorStore(directory, index='hnsw' if index == 'hnsw' else 'ivf',
+                                     quantization=quantization, nprobe=nprobe or 8)
+            ids = [str(i) for i in range(len(vectors))]
+            for start in range(0, len(vectors), 10000):
+                end = start + 10000
+                store.upsert(ids[start:end], vectors[start:end], [''] * len(ids[start:end]), [{}] * len(ids[start:end]))
+            if index != 'exacta':
+                store.persist()
+            latencies, recall = [], 0.0
+            for query, truth in zip(query_vectors, exact):
+                started = time.perf_counter()
+                rows, _ = store.search_vectors(query, k)
+                latencies.append(time.perf_counter() - started)
+                recall += len(truth & set(rows.tolist())) / k
+            latencies.sort()
+            size = (store.codes.nbytes + store.scales.nbytes) * len(vectors) / max(store.capacity, 1)
+            label = f"{quantization} {index}" + (f" nprobe={nprobe}" if nprobe else "")
+            print(f"{label:>24}: recall@{k} {recall / len(exact):.3f}, p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+                  f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms, vectores {size / 1024 / 1024:.1f} MB")
+            del store
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        logging.basicConfig(level=logging.INFO)
+        arguments = [a for a in sys.argv[1:] if not a.startswith('--')]
+        benchmark(arguments[0] if arguments else None)
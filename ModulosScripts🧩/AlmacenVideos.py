@@ -0,0 +1,121 @@
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), "Desktop", "Youtube", "videos.sqlite3")
+
+_VIDEO_ID = re.compile(r'^[\w-]{11}$')
+# Rutas de youtube.com con el ID como primer segmento después del prefijo
+_PATH_PREFIXES = ('shorts', 'embed', 'live', 'v', 'e')
+
+
+def canonical_video_id(url: str) -> Optional[str]:
+    """
+    ID de 11 caracteres del video, igual para youtu.be/X, watch?v=X&t=30, m.youtube.com,
+    music.youtube.com, /shorts/X, /embed/X y /live/X. None si la URL no es de un video.
+    """
+    parsed = urlparse(url.strip() if '://' in url else f"https://{url.strip()}")
+    host = (parsed.hostname or '').lower()
+    parts = [part for part in parsed.path.split('/') if part]
+    candidate = None
+    if host in ('youtu.be', 'www.youtu.be'):
+        candidate = parts[0] if parts else None
+    elif host == 'youtube.com' or host.endswith('.youtube.com') or host == 'youtube-nocookie.com' or host.endswith('.youtube-nocookie.com'):
+        if parts[:1] == ['watch']:
+            candidate = parse_qs(parsed.query).get('v', [None])[0]
+        elif len(parts) >= 2 and parts[0] in _PATH_PREFIXES:
+            candidate = parts[1]
+    return candidate if candidate and _VIDEO_ID.match(candidate) else None
+
+
+def canonical_url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def prompt_hash(prompt: str, model: str = "") -> str:
+    """Clave de un resumen: cambiar el prompt o el modelo genera uno nuevo sin retranscribir"""
+    return hashlib.sha256(json.dumps([prompt, model], ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+class VideoStore:
+    """
+    Transcripciones y resúmenes por ID de video en SQLite, compartidos entre procesos.
+    La transcripción guarda los segmentos para volver a formatearlos; los resúmenes se guardan
+    por hash de prompt, así un prompt nuevo reutiliza la transcripción ya hecha. Solo se busca
+    por ID: dos videos distintos nunca comparten transcripción.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                url TEXT,
+                transcript TEXT NOT NULL,
+                created REAL
+            );
+            CREATE TABLE IF NOT EXISTS summaries (
+                video_id TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created REAL,
+                PRIMARY KEY (video_id, prompt_hash)
+            );
+        """)
+
+    def get_transcript(self, video_id: str) -> Optional[dict]:
+        """Resultado de la transcripción (texto, idioma, segmentos) o None"""
+        with self.lock:
+            row = self.connection.execute("SELECT transcript FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_transcript(self, video_id: str, url: str, result: dict):
+        transcript = {
+            'text': result.get('text', ''),
+            'language': result.get('language'),
+            'duration': result.get('duration'),
+            'segments': [{'start': float(s['start']), 'end': float(s['end']), 'text': s['text']}
+                         for s in result.get('segments', [])],
+        }
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO videos (video_id, url, transcript, created) VALUES (?, ?, ?, ?)",
+                (video_id, url, json.dumps(transcript, ensure_ascii=False), time.time())
+            )
+
+    def get_summary(self, video_id: str, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT summary FROM summaries WHERE video_id = ? AND prompt_hash = ?", (video_id, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_summary(self, video_id: str, key: str, summary: str):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO summaries (video_id, prompt_hash, summary, created) VALUES (?, ?, ?, ?)",
+                (video_id, key, summary, time.time())
+            )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def open_video_store() -> VideoStore:
+    """Almacén en ALMACEN_VIDEOS.ruta del config, o junto a los resúmenes en el escritorio"""
+    from AlmacenConfiguracion import load_config_section
+    return VideoStore(load_config_section('ALMACEN_VIDEOS').get('ruta') or DEFAULT_STORE_PATH)
@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'embeddings')
+DEFAULT_CAPACITY = 50000
+
+# Clave de 16 bytes (blake2b del texto) y última vez usada, que ordena el desalojo LRU.
+# Los huecos libres tienen hash vacío y last_used 0, así se ocupan antes que cualquier entrada.
+KEY_DTYPE = np.dtype([('hash', 'S16'), ('last_used', 'f8')])
+
+
+def text_key(text: str) -> bytes:
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    # numpy recorta los \x00 finales de los campos S16: el último byte nunca es cero
+    return digest[:15] + bytes([digest[15] | 1])
+
+
+@contextmanager
+def file_lock(path: str):
+    """Lock exclusivo entre procesos: el cargador y el servicio de búsqueda escriben en la misma caché"""
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class EmbeddingCache:
+    """
+    Caché persistente texto -> vector float32 de un modelo, en arreglos memory-mapped de capacidad fija:
+    vectors.f32 (capacidad x dimensión), keys.bin (hash + último uso) y generation.i64, que cada escritura
+    incrementa para que los demás procesos reconstruyan su índice en memoria.
+    Las lecturas no toman el lock: el hash del hueco se vuelve a comprobar después de copiar el vector.
+    """
+
+    def __init__(self, model_name: str, directory: str = DEFAULT_CACHE_DIR, capacity: int = DEFAULT_CAPACITY):
+        self.model_name = model_name
+        self.directory = os.path.join(directory, re.sub(r'[^\w.-]', '_', model_name))
+        self.capacity = capacity
+        self.lock_path = os.path.join(self.directory, 'cache.lock')
+        self.vectors: Optional[np.memmap] = None
+        self.keys: Optional[np.memmap] = None
+        self.generation: Optional[np.memmap] = None
+        self.known_generation = -1
+        self.index: Dict[bytes, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.open()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def open(self, dim: Optional[int] = None) -> bool:
+        """Mapea los archivos; si no existen solo se crean cuando ya se conoce la dimensión"""
+        meta_path = self.path('meta.json')
+        if not os.path.exists(meta_path):
+            if dim is None:
+                return False
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'model': self.model_name, 'dim': dim, 'capacity': self.capacity}, f)
+            np.memmap(self.path('vectors.f32'), dtype=np.float32, mode='w+', shape=(self.capacity, dim)).flush()
+            np.memmap(self.path('keys.bin'), dtype=KEY_DTYPE, mode='w+', shape=(self.capacity,)).flush()
+            np.memmap(self.path('generation.i64'), dtype=np.int64, mode='w+', shape=(1,)).flush()
+            os.replace(meta_path + '.tmp', meta_path)
+
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.capacity = meta['capacity']
+        self.vectors = np.memmap(self.path('vectors.f32'), dtype=np.float32, mode='r+', shape=(self.capacity, meta['dim']))
+        self.keys = np.memmap(self.path('keys.bin'), dtype=KEY_DTYPE, mode='r+', shape=(self.capacity,))
+        self.generation = np.memmap(self.path('generation.i64'), dtype=np.int64, mode='r+', shape=(1,))
+        return True
+
+    def sync_index(self):
+        """Reconstruye hash -> hueco solo si otro proceso (u otro hilo) escribió desde la última vez"""
+        generation = int(self.generation[0])
+        if generation == self.known_generation:
+            return
+        hashes = self.keys['hash']
+        used = np.flatnonzero(hashes != b'')
+        self.index = dict(zip(hashes[used].tolist(), used.tolist()))
+        self.known_generation = generation
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        with self.lock:
+            # Otro proceso pudo crear la caché después de que esta instancia la abriera vacía
+            if self.vectors is None and not self.open():
+                return [None] * len(keys)
+            self.sync_index()
+            index = self.index
+        now = time.time()
+        found = []
+        for key in keys:
+            slot = index.get(key)
+            vector = None
+            if slot is not None:
+                vector = np.array(self.vectors[slot])
+                if self.keys['hash'][slot] == key:
+                    self.keys['last_used'][slot] = now
+                else:
+                    vector = None  # Desalojado mientras se leía
+            found.append(vector)
+        return found
+
+    def put_many(self, keys: List[bytes], vectors: np.ndarray):
+        if not keys:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self.lock, file_lock(self.lock_path):
+            if self.vectors is None:
+                self.open(dim=vectors.shape[1])
+            self.sync_index()
+
+            pending = {key: vector for key, vector in zip(keys, vectors) if key not in self.index}
+            if not pending:
+                return
+            count = min(len(pending), self.capacity)
+            last_used = self.keys['last_used']
+            # Huecos libres (last_used 0) y luego los menos usados recientemente
+            slots = np.argpartition(last_used, count - 1)[:count] if count < self.capacity else np.arange(count)
+
+            now = time.time()
+            for slot, (key, vector) in zip(slots.tolist(), list(pending.items())[:count]):
+                old = bytes(self.keys['hash'][slot])
+                if old:
+                    self.index.pop(old, None)
+                self.keys['hash'][slot] = b''
+                self.vectors[slot] = vector
+                self.keys[slot] = (key, now)
+                self.index[key] = slot
+
+            self.generation[0] += 1
+            self.known_generation = int(self.generation[0])
+            self.vectors.flush()
+            self.keys.flush()
+            self.generation.flush()
+
+    def embed(self, texts: List[str], compute: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """Devuelve los vectores de texts, calculando con el modelo solo los que no están en caché"""
+        keys = [text_key(text) for text in texts]
+        cached = self.get_many(keys)
+
+        missing = {}
+        for key, text, vector in zip(keys, texts, cached):
+            if vector is None:
+                missing.setdefault(key, text)
+        with self.lock:
+            self.hits += len(texts) - sum(vector is None for vector in cached)
+            self.misses += sum(vector is None for vector in cached)
+
+        if missing:
+            computed = np.asarray(compute(list(missing.values())), dtype=np.float32)
+            self.put_many(list(missing), computed)
+            by_key = dict(zip(missing, computed))
+            cached = [vector if vector is not None else by_key[key] for key, vector in zip(keys, cached)]
+        return [vector.tolist() for vector in cached]
+
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "aciertos": self.hits,
+            "fallos": self.misses,
+            "tasa_aciertos": self.hit_ratio(),
+            "entradas": len(self.index),
+        }
+
+
+class CachedEmbeddings:
+    """
+    Envoltorio con la interfaz de embeddings de LangChain (embed_documents / embed_query) que consulta
+    la caché antes de llamar al modelo. Sirve como embedding_function de Chroma.
+    """
+
+    def __init__(self, model, model_name: str, directory: str = DEFAULT_CACHE_DIR, capacity: int = DEFAULT_CAPACITY):
+        self.model = model
+        self.cache = EmbeddingCache(model_name, directory, capacity)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.cache.embed(texts, self.model.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.cache.embed([text], lambda texts: [self.model.embed_query(texts[0])])[0]
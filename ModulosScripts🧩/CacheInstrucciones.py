@@ -0,0 +1,103 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sin acentos ni puntuación y con espacios colapsados"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class InstructionCache:
+    """
+    Caché LRU en memoria respaldada en disco para las clasificaciones del LLM.
+    La clave combina el texto normalizado, el hash del prompt y el contexto previo.
+    """
+
+    def __init__(self, path: str, max_entries: int = 2000, ttl: float = 7 * 24 * 3600, stats_every: int = 20):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats_every = stats_every
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def make_key(self, text: str, prompt: str, context: Sequence[str] = ()) -> str:
+        return text_hash(json.dumps([normalize_text(text), text_hash(prompt), list(context)], ensure_ascii=False))
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except Exception as e:
+            logger.error(f"Error leyendo la caché de instrucciones: {e}")
+            return
+        now = time.time()
+        for key, (instruction, created) in stored.items():
+            if now - created < self.ttl:
+                self.entries[key] = (instruction, created)
+        self.evict()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def evict(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, text: str, prompt: str, context: Sequence[str] = ()) -> Optional[str]:
+        key = self.make_key(text, prompt, context)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and time.time() - entry[1] >= self.ttl:
+                del self.entries[key]
+                entry = None
+            if entry:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.log_stats()
+        return entry[0] if entry else None
+
+    def put(self, text: str, prompt: str, context: Sequence[str], instruction: str):
+        key = self.make_key(text, prompt, context)
+        with self.lock:
+            self.entries[key] = (instruction, time.time())
+            self.entries.move_to_end(key)
+            self.evict()
+            try:
+                self.save()
+            except Exception as e:
+                logger.error(f"Error guardando la caché de instrucciones: {e}")
+
+    def log_stats(self):
+        lookups = self.hits + self.misses
+        if lookups % self.stats_every == 0:
+            logger.info(f"Caché de instrucciones: {self.hits} aciertos, {self.misses} fallos "
+                        f"({self.hits / lookups:.0%}), {len(self.entries)} entradas")
@@ -0,0 +1,165 @@
+import time
+import logging
+from abc import ABC, abstractmethod
+import numpy as np
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Región de captura: (left, top, right, bottom), right/bottom exclusivos
+Region = Tuple[int, int, int, int]
+
+
+def bounding_region(coordinates: Iterable[Tuple[int, int]]) -> Region:
+    """Rectángulo mínimo que contiene todas las coordenadas vigiladas"""
+    xs, ys = zip(*coordinates)
+    return min(xs), min(ys), max(xs) + 1, max(ys) + 1
+
+
+class CaptureBackend(ABC):
+    """Devuelve la región pedida como array (alto, ancho) de colores COLORREF (0x00BBGGRR)"""
+
+    @abstractmethod
+    def grab(self, region: Region) -> np.ndarray:
+        """Captura la región; se llama una vez por ciclo del monitor"""
+
+    def close(self):
+        pass
+
+
+class GdiCaptureBackend(CaptureBackend):
+    """Un único BitBlt del escritorio por ciclo en lugar de un GetPixel por coordenada"""
+
+    def __init__(self):
+        import win32con
+        import win32gui
+        import win32ui
+        self.win32con = win32con
+        self.win32gui = win32gui
+        self.win32ui = win32ui
+        self.hwnd = win32gui.GetDesktopWindow()
+        self.region = None
+        self.window_dc = None
+        self.source_dc = None
+        self.memory_dc = None
+        self.bitmap = None
+
+    def prepare(self, region: Region):
+        """Reserva los DC y el bitmap una sola vez por tamaño de región"""
+        self.close()
+        width, height = region[2] - region[0], region[3] - region[1]
+        self.window_dc = self.win32gui.GetWindowDC(self.hwnd)
+        self.source_dc = self.win32ui.CreateDCFromHandle(self.window_dc)
+        self.memory_dc = self.source_dc.CreateCompatibleDC()
+        self.bitmap = self.win32ui.CreateBitmap()
+        self.bitmap.CreateCompatibleBitmap(self.source_dc, width, height)
+        self.memory_dc.SelectObject(self.bitmap)
+        self.region = region
+
+    def grab(self, region: Region) -> np.ndarray:
+        if region != self.region:
+            self.prepare(region)
+        left, top, right, bottom = region
+        width, height = right - left, bottom - top
+        self.memory_dc.BitBlt((0, 0), (width, height), self.source_dc, (left, top), self.win32con.SRCCOPY)
+
+        # El bitmap llega como BGRA; se arma el entero COLORREF que devolvía GetPixel
+        bgra = np.frombuffer(self.bitmap.GetBitmapBits(True), dtype=np.uint8).reshape(height, width, 4)
+        return (bgra[..., 2].astype(np.uint32)
+                | (bgra[..., 1].astype(np.uint32) << 8)
+                | (bgra[..., 0].astype(np.uint32) << 16))
+
+    def close(self):
+        if self.region is None:
+            return
+        self.win32gui.DeleteObject(self.bitmap.GetHandle())
+        self.memory_dc.DeleteDC()
+        self.source_dc.DeleteDC()
+        self.win32gui.ReleaseDC(self.hwnd, self.window_dc)
+        self.region = None
+
+
+class SyntheticCaptureBackend(CaptureBackend):
+    """Lee de cuadros generados en memoria; permite correr el monitor en Linux para pruebas y benchmarks"""
+
+    def __init__(self, frame_source: Callable[[], np.ndarray]):
+        self.frame_source = frame_source
+
+    def grab(self, region: Region) -> np.ndarray:
+        left, top, right, bottom = region
+        return self.frame_source()[top:bottom, left:right]
+
+
+def create_backend(name: str = "gdi", frame_source: Optional[Callable[[], np.ndarray]] = None) -> CaptureBackend:
+    if name == "gdi":
+        return GdiCaptureBackend()
+    if name == "sintetico":
+        if frame_source is None:
+            raise ValueError("El backend sintético necesita un frame_source")
+        return SyntheticCaptureBackend(frame_source)
+    raise ValueError(f"Backend de captura desconocido: {name}")
+
+
+class PixelSampler:
+    """Captura la región que envuelve a todos los píxeles vigilados y lee cada uno del mismo buffer"""
+
+    def __init__(self, backend: CaptureBackend, coordinates: Dict[str, Tuple[int, int]]):
+        self.backend = backend
+        self.names = list(coordinates)
+        self.region = bounding_region(coordinates.values()) if coordinates else None
+        if self.region:
+            left, top = self.region[0], self.region[1]
+            self.rows = np.array([coordinates[n][1] - top for n in self.names])
+            self.cols = np.array([coordinates[n][0] - left for n in self.names])
+
+    def sample(self) -> Dict[str, Optional[int]]:
+        if not self.region:
+            return {}
+        try:
+            frame = self.backend.grab(self.region)
+        except Exception as e:
+            logger.error(f"Error capturing screen region: {e}")
+            return {name: None for name in self.names}
+        return dict(zip(self.names, frame[self.rows, self.cols].tolist()))
+
+
+def legacy_sample(coordinates: Dict[str, Tuple[int, int]]) -> Dict[str, Optional[int]]:
+    """Muestreo anterior: un GetWindowDC/GetPixel/ReleaseDC por coordenada (solo Windows)"""
+    import win32gui
+    colors = {}
+    for name, (x, y) in coordinates.items():
+        hdc = win32gui.GetWindowDC(win32gui.GetDesktopWindow())
+        colors[name] = win32gui.GetPixel(hdc, x, y)
+        win32gui.ReleaseDC(win32gui.GetDesktopWindow(), hdc)
+    return colors
+
+
+def benchmark(backend_name: str = "sintetico", pixel_counts=(1, 4, 16, 64), ticks: int = 500):
+    """Costo por ciclo de muestreo; en Windows con backend gdi se compara con el GetPixel por píxel"""
+    width, height = 1920, 1080
+    frame = np.random.randint(0, 0xFFFFFF, size=(height, width), dtype=np.uint32)
+    backend = create_backend(backend_name, lambda: frame)
+    rng = np.random.default_rng(0)
+
+    for count in pixel_counts:
+        coordinates = {f"p{i}": (int(x), int(y)) for i, (x, y) in
+                       enumerate(zip(rng.integers(0, width, count), rng.integers(0, height, count)))}
+        sampler = PixelSampler(backend, coordinates)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            sampler.sample()
+        per_tick = (time.perf_counter() - start) / ticks
+        line = f"{count:>3} píxeles: {per_tick * 1e6:10.1f} µs por ciclo ({backend_name})"
+
+        if backend_name == "gdi":
+            start = time.perf_counter()
+            for _ in range(ticks):
+                legacy_sample(coordinates)
+            line += f" | {(time.perf_counter() - start) / ticks * 1e6:10.1f} µs con GetPixel"
+        print(line)
+    backend.close()
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else "sintetico")
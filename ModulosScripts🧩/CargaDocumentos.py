@@ -0,0 +1,291 @@
+import os
+import sys
+import time
+import queue
+import hashlib
+import logging
+import threading
+import multiprocessing
+from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredHTMLLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+# Loading/splitting stage of the vector loader. It stays free of the embedding model so that
+# parser processes start fast and never load MiniLM.
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Chunks sent per message from a parser process to the embedding consumer
+PARSE_BATCH_SIZE = 64
+
+# Characters read per block from text files; together with the chunk window this bounds parser memory
+TEXT_BLOCK_SIZE = 64 * 1024
+TEXT_EXTENSIONS = {'.txt', '.md', '.json'}
+
+def get_appropriate_loader(file_path):
+    """Return the appropriate document loader based on file extension"""
+    file_extension = os.path.splitext(file_path)[1].lower()
+
+    if file_extension == '.pdf':
+        return PyPDFLoader(file_path)
+    elif file_extension in ['.html', '.htm']:
+        return UnstructuredHTMLLoader(file_path)
+    elif file_extension in ['.txt', '.md', '.json']:
+        return TextLoader(file_path)
+    else:
+        raise ValueError(f"Unsupported file extension: {file_extension}")
+
+def hash_file(file_path):
+    """SHA-256 of the file content, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def make_chunk_id(file_path, content_hash, index):
+    """Deterministic chunk ID: same file and content always produce the same IDs"""
+    key = f"{os.path.normcase(os.path.abspath(file_path))}|{content_hash}|{index}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+class StreamingSplitter:
+    """
+    Carry-buffer splitter for text that arrives in pieces (pages, blocks).
+    Chunks are cut at the last paragraph/line/word break inside the window and the next chunk
+    starts chunk_overlap characters earlier, also across piece boundaries. Only the unfinished
+    tail is kept between pieces.
+    """
+
+    SEPARATORS = ("\n\n", "\n", " ")
+
+    def __init__(self, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.buffer = ""
+        # (offset in buffer, metadata) of every piece still in the buffer
+        self.marks = []
+
+    def feed(self, text, metadata, boundary=False):
+        """Add a piece; boundary=True separates it from the previous one like a new paragraph"""
+        if boundary and self.buffer:
+            text = "\n\n" + text
+        self.marks.append((len(self.buffer), metadata))
+        self.buffer += text
+        yield from self.drain(final=False)
+
+    def finish(self):
+        yield from self.drain(final=True)
+        self.buffer, self.marks = "", []
+
+    def drain(self, final):
+        start = 0
+        while len(self.buffer) - start > self.chunk_size or (final and start < len(self.buffer)):
+            end = self.find_cut(start) if len(self.buffer) - start > self.chunk_size else len(self.buffer)
+            text = self.buffer[start:end].strip()
+            if text:
+                yield text, self.metadata_at(start)
+            if end >= len(self.buffer):
+                start = end
+                break
+            start = self.overlap_start(start, end)
+        self.compact(start)
+
+    def find_cut(self, start):
+        limit = start + self.chunk_size
+        for separator in self.SEPARATORS:
+            # Never cut in the first half of the window, so each chunk moves well past the overlap
+            position = self.buffer.rfind(separator, start + self.chunk_size // 2, limit)
+            if position != -1:
+                return position + len(separator)
+        return limit
+
+    def overlap_start(self, start, end):
+        """Next chunk start: chunk_overlap characters back from the cut, moved to a word start"""
+        position = max(end - self.chunk_overlap, start + 1)
+        space = self.buffer.find(" ", position, end)
+        return space + 1 if space != -1 else position
+
+    def metadata_at(self, offset):
+        current = self.marks[0][1]
+        for mark_offset, metadata in self.marks:
+            if mark_offset > offset:
+                break
+            current = metadata
+        return current
+
+    def compact(self, start):
+        if not start:
+            return
+        self.buffer = self.buffer[start:]
+        marks = [(offset - start, metadata) for offset, metadata in self.marks]
+        # Keep the piece the new buffer starts in, plus the ones after it
+        first = max((i for i, (offset, _) in enumerate(marks) if offset <= 0), default=0)
+        self.marks = [(max(offset, 0), metadata) for offset, metadata in marks[first:]]
+
+def iter_text_blocks(file_path, block_size=TEXT_BLOCK_SIZE):
+    """Yield (text, metadata, boundary) pieces without loading the whole file"""
+    if os.path.splitext(file_path)[1].lower() in TEXT_EXTENSIONS:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            for block in iter(lambda: f.read(block_size), ''):
+                yield block, {'source': file_path}, False
+    else:
+        # PDF loaders yield one page at a time; HTML comes back as a single document
+        for document in get_appropriate_loader(file_path).lazy_load():
+            yield document.page_content, document.metadata, True
+
+def iter_file_chunks(file_path, content_hash):
+    """Yield (chunk_id, text, metadata) for every chunk of the file, streaming page by page / block by block"""
+    splitter = StreamingSplitter()
+    index = 0
+    for text, metadata, boundary in iter_text_blocks(file_path):
+        for chunk, chunk_metadata in splitter.feed(text, metadata, boundary):
+            yield make_chunk_id(file_path, content_hash, index), chunk, dict(chunk_metadata, content_hash=content_hash)
+            index += 1
+    for chunk, chunk_metadata in splitter.finish():
+        yield make_chunk_id(file_path, content_hash, index), chunk, dict(chunk_metadata, content_hash=content_hash)
+        index += 1
+
+def parse_file(file_path, content_hash, output, batch_size=PARSE_BATCH_SIZE):
+    """Stream one file's chunks to the output queue as ('chunks', path, batch), then ('done', path, count)"""
+    try:
+        batch = []
+        count = 0
+        for chunk in iter_file_chunks(file_path, content_hash):
+            batch.append(chunk)
+            count += 1
+            if len(batch) >= batch_size:
+                output.put(('chunks', file_path, batch))
+                batch = []
+        if batch:
+            output.put(('chunks', file_path, batch))
+        output.put(('done', file_path, count))
+    except Exception as e:
+        output.put(('error', file_path, str(e)))
+
+def parse_worker(tasks, output):
+    """Parser process: take (path, content_hash) jobs until a None arrives"""
+    while True:
+        job = tasks.get()
+        if job is None:
+            output.put(('exit', None, None))
+            break
+        parse_file(*job, output)
+
+class ParseCancelled(BaseException):
+    """Raised inside the inline parser once the consumer stops reading (not an Exception, so parse_file doesn't report it)"""
+
+class CancellableQueue(queue.Queue):
+    """Bounded queue whose blocked put() gives up with ParseCancelled after cancel()"""
+
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize)
+        self.cancelled = threading.Event()
+
+    def put(self, item, block=True, timeout=None):
+        while not self.cancelled.is_set():
+            try:
+                return super().put(item, timeout=0.2)
+            except queue.Full:
+                continue
+        raise ParseCancelled
+
+    def cancel(self):
+        self.cancelled.set()
+
+def parse_files(jobs, workers=None, queue_size=8):
+    """
+    Parse and split files in parallel processes and stream their chunks back.
+    The output queue is bounded, so parsers block when the embedding consumer falls behind
+    and memory stays capped at queue_size batches no matter how many files are queued.
+    Yields the same messages as parse_file. If the consumer stops early (an embedding or upsert
+    error, or the generator is closed) the parsers are stopped instead of blocking on the full queue.
+    """
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+
+    processes = []
+
+    # A single file is not worth starting processes for
+    if len(jobs) <= 1 or workers == 1:
+        output = CancellableQueue(maxsize=queue_size)
+        def run_inline():
+            try:
+                for job in jobs:
+                    parse_file(*job, output)
+                output.put(('exit', None, None))
+            except ParseCancelled:
+                pass
+        threading.Thread(target=run_inline, daemon=True).start()
+        workers = 1
+    else:
+        context = multiprocessing.get_context('spawn')
+        tasks = context.Queue()
+        output = context.Queue(maxsize=queue_size)
+        for job in jobs:
+            tasks.put(job)
+        workers = min(workers, len(jobs))
+        for _ in range(workers):
+            tasks.put(None)
+        processes = [context.Process(target=parse_worker, args=(tasks, output), daemon=True) for _ in range(workers)]
+        for process in processes:
+            process.start()
+
+    finished = 0
+    try:
+        while finished < workers:
+            try:
+                message = output.get(timeout=1)
+            except queue.Empty:
+                if processes and not any(process.is_alive() for process in processes):
+                    logger.error("Parser processes exited unexpectedly")
+                    break
+                continue
+            if message[0] == 'exit':
+                finished += 1
+                continue
+            yield message
+    finally:
+        if not processes:
+            output.cancel()
+        for process in processes:
+            # Parsers still running are blocked on (or will fill) an output queue nobody reads anymore
+            if finished < workers and process.is_alive():
+                process.terminate()
+            process.join(5)
+
+
+def benchmark_memory(sizes_mb=(1, 4, 16), directory=None):
+    """Peak Python memory of load()+split_documents (previous path) vs streaming, per file size"""
+    import tempfile
+    import tracemalloc
+
+    def legacy(file_path):
+        documents = TextLoader(file_path, encoding='utf-8').load()
+        splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        return sum(1 for _ in splitter.split_documents(documents))
+
+    def streaming(file_path):
+        return sum(1 for _ in iter_file_chunks(file_path, 'benchmark'))
+
+    paragraph = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+                 "incididunt ut labore et dolore magna aliqua.\n") * 6 + "\n"
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        for size_mb in sizes_mb:
+            file_path = os.path.join(tmp, f"benchmark_{size_mb}mb.txt")
+            with open(file_path, 'w', encoding='utf-8') as f:
+                for _ in range(size_mb * 1024 * 1024 // len(paragraph)):
+                    f.write(paragraph)
+            for name, run in (("load+split", legacy), ("streaming", streaming)):
+                tracemalloc.start()
+                started = time.perf_counter()
+                chunks = run(file_path)
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"{size_mb:>4} MB {name:>10}: {chunks:>6} chunks, peak {peak / 1024 / 1024:7.1f} MB, {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    if "--benchmark-memoria" in sys.argv:
+        logging.basicConfig(level=logging.INFO)
+        benchmark_memory()
@@ -1,9 +1,15 @@
 import logging
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredHTMLLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
+import sys
 from langchain_huggingface import HuggingFaceEmbeddings
 import os
+import json
+import time
+from contextlib import closing
+from CargaDocumentos import hash_file, parse_files
+from CacheEmbeddings import CachedEmbeddings
+from AlmacenVectorial import open_vector_store
+from IndiceLexico import open_lexical_index
+from ColaIngesta import NO_TEXT, SUPPORTED_EXTENSIONS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -12,64 +18,219 @@ logger = logging.getLogger(__name__)
 # Define paths
 TEMP_PATH = r"C:\Users\54115\Desktop\Omni\BaseDeDatos📁\Descargas"
 VECTOR_PATH = r"C:\Users\54115\Desktop\Omni\BaseDeDatos📁\Vectorizado"
+MANIFEST_PATH = os.path.join(VECTOR_PATH, "manifest.json")
 
-# Initialize embeddings model
-embeddings_model = HuggingFaceEmbeddings(model_name='all-MiniLM-L6-v2')
+# Chunks embedded per model call and per write to the collection
+EMBED_BATCH_SIZE = 256
+
+# Parser processes for the loading/splitting stage and chunk batches buffered between stages
+PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+PARSE_QUEUE_SIZE = 8
+
+# Embeddings model, loaded on first use (parser processes re-import this module and must not load it).
+# Wrapped in the on-disk embedding cache shared with ContextoVectorizado, so unchanged chunks are not re-embedded.
+EMBEDDINGS_MODEL_NAME = 'all-MiniLM-L6-v2'
+embeddings_model = None
+
+def get_embeddings_model():
+    global embeddings_model
+    if embeddings_model is None:
+        embeddings_model = CachedEmbeddings(
+            HuggingFaceEmbeddings(
+                model_name=EMBEDDINGS_MODEL_NAME,
+                encode_kwargs={'batch_size': EMBED_BATCH_SIZE}
+            ),
+            EMBEDDINGS_MODEL_NAME
+        )
+    return embeddings_model
 
 def ensure_directory_exists(directory):
     """Create directory if it doesn't exist"""
     os.makedirs(directory, exist_ok=True)
 
-def get_appropriate_loader(file_path):
-    """Return the appropriate document loader based on file extension"""
-    file_extension = os.path.splitext(file_path)[1].lower()
-    
-    if file_extension == '.pdf':
-        return PyPDFLoader(file_path)
-    elif file_extension in ['.html', '.htm']:
-        return UnstructuredHTMLLoader(file_path)
-    elif file_extension in ['.txt', '.md', '.json']:
-        return TextLoader(file_path)
-    else:
-        raise ValueError(f"Unsupported file extension: {file_extension}")
+def load_manifest():
+    """Load the ingest manifest: path -> size, mtime, content hash and chunk IDs"""
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
-def vectorize_file(file_path):
-    """Vectorize a single file and add it to the vector database"""
-    try:
-        # Get appropriate loader
-        loader = get_appropriate_loader(file_path)
-        
-        # Load and split the document
-        documents = loader.load()
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        texts = text_splitter.split_documents(documents)
-
-        # Initialize Chroma database
-        vector_db = Chroma(
-            persist_directory=VECTOR_PATH,
-            embedding_function=embeddings_model
+def save_manifest(manifest):
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+class BatchIngestor:
+    """Collect chunks from many files and embed/write them in large batches to one open collection"""
+
+    def __init__(self, vector_db, batch_size=EMBED_BATCH_SIZE):
+        self.vector_db = vector_db
+        self.batch_size = batch_size
+        self.ids, self.texts, self.metadatas = [], [], []
+        self.chunks = 0
+        self.embed_seconds = 0.0
+        self.started = time.perf_counter()
+
+    def add(self, chunks):
+        for chunk_id, text, metadata in chunks:
+            self.ids.append(chunk_id)
+            self.texts.append(text)
+            self.metadatas.append(metadata)
+        while len(self.ids) >= self.batch_size:
+            self.flush(self.batch_size)
+
+    def flush(self, limit=None):
+        count = len(self.ids) if limit is None else limit
+        if not count:
+            return
+        ids, texts, metadatas = self.ids[:count], self.texts[:count], self.metadatas[:count]
+        del self.ids[:count], self.texts[:count], self.metadatas[:count]
+
+        started = time.perf_counter()
+        embeddings = get_embeddings_model().embed_documents(texts)
+        self.embed_seconds += time.perf_counter() - started
+
+        # Upsert: deterministic IDs make re-ingesting the same chunk a no-op
+        self.vector_db.upsert(ids, embeddings, texts, metadatas)
+        self.chunks += count
+
+    def report(self, files):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        logger.info(
+            f"Ingested {self.chunks} chunks from {files} files in {elapsed:.1f}s "
+            f"({self.chunks / elapsed:.1f} chunks/s, {files / elapsed:.2f} files/s, "
+            f"embedding {self.embed_seconds:.1f}s, cache hit ratio {get_embeddings_model().cache.hit_ratio():.0%})"
         )
 
-        # Add documents to the vector database
-        vector_db.add_documents(texts)
-        vector_db.persist()
+class ChunkStores:
+    """Vector store and BM25 index kept in step: every chunk write and delete goes to both"""
 
-        logger.info(f"Successfully vectorized: {file_path}")
-        return True
+    def __init__(self, vector_store, lexical_index):
+        self.vector_store = vector_store
+        self.lexical_index = lexical_index
 
-    except Exception as e:
-        logger.error(f"Error vectorizing {file_path}: {str(e)}")
-        return False
+    def upsert(self, ids, embeddings, texts, metadatas):
+        self.vector_store.upsert(ids, embeddings, texts, metadatas)
+        self.lexical_index.add(ids, texts, metadatas)
 
-def process_temp_folder():
-    """Process all supported files in the temp folder"""
-    # Ensure vector database directory exists
+    def delete(self, ids):
+        self.vector_store.delete(ids)
+        self.lexical_index.delete(ids)
+
+    def backfill_lexical(self):
+        """Chunks ingested before the BM25 index existed are copied over once"""
+        if self.lexical_index.count() or not self.vector_store.count():
+            return
+        logger.info("Building the BM25 index from the existing vector store...")
+        for ids, _, texts, metadatas in self.vector_store.export():
+            self.lexical_index.add(ids, texts, metadatas)
+
+    def persist(self):
+        self.vector_store.persist()
+
+def delete_chunks(vector_db, chunk_ids):
+    if chunk_ids:
+        vector_db.delete(chunk_ids)
+
+def open_vector_db():
+    """Open the configured vector store (Chroma or the local quantized index, see ALMACEN_VECTORIAL) and the BM25 index"""
     ensure_directory_exists(VECTOR_PATH)
-    
-    # Supported file extensions
-    supported_extensions = {'.txt', '.pdf', '.html', '.htm', '.md', '.json'}
-    
-    # Process each file in the temp directory
+    stores = ChunkStores(open_vector_store(VECTOR_PATH, get_embeddings_model()), open_lexical_index(VECTOR_PATH))
+    stores.backfill_lexical()
+    return stores
+
+def needs_ingest(file_path, manifest):
+    """Return the content hash if the file is new or changed, None if it is unchanged"""
+    stat = os.stat(file_path)
+    entry = manifest.get(file_path)
+
+    # Same size and mtime: unchanged without reading the file
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return None
+
+    content_hash = hash_file(file_path)
+    if entry and entry['sha256'] == content_hash:
+        # Touched but identical content: only refresh the manifest
+        entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        return None
+    return content_hash
+
+def ingest_files(file_paths, vector_db, manifest):
+    """Batch-ingest new/changed files; returns {path: chunk count, 0 if unchanged, NO_TEXT if empty, None if failed}"""
+    ingestor = BatchIngestor(vector_db)
+    jobs = []
+    stats = {}
+    results = {}
+
+    for file_path in file_paths:
+        try:
+            content_hash = needs_ingest(file_path, manifest)
+        except Exception as e:
+            logger.error(f"Error reading {file_path}: {str(e)}")
+            results[file_path] = None
+            continue
+        if content_hash is None:
+            results[file_path] = 0 if manifest[file_path].get('chunk_ids') else NO_TEXT
+            continue
+        jobs.append((file_path, content_hash))
+        stats[file_path] = os.stat(file_path)
+
+    # Parsing runs in parallel processes while this process embeds the chunks they stream back
+    chunk_ids = {file_path: [] for file_path, _ in jobs}
+    failed = []
+    # closing(): an embedding or upsert error stops the parsers right away instead of at garbage collection
+    with closing(parse_files(jobs, PARSE_WORKERS, PARSE_QUEUE_SIZE)) as messages:
+        for kind, file_path, payload in messages:
+            if kind == 'chunks':
+                chunk_ids[file_path].extend(chunk[0] for chunk in payload)
+                ingestor.add(payload)
+            elif kind == 'done':
+                logger.info(f"Parsed file: {os.path.basename(file_path)} ({payload} chunks)")
+                results[file_path] = payload or NO_TEXT
+            else:
+                logger.error(f"Error vectorizing {file_path}: {payload}")
+                results[file_path] = None
+                failed.append(file_path)
+
+    ingestor.flush()
+    pending = {}
+    for file_path, content_hash in jobs:
+        if file_path not in results:
+            logger.error(f"Error vectorizing {file_path}: parser did not finish")
+            results[file_path] = None
+            failed.append(file_path)
+        elif results[file_path] is not None:
+            stat = stats[file_path]
+            pending[file_path] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': content_hash,
+                'chunk_ids': chunk_ids[file_path]
+            }
+
+    # Chunks already written for a file that failed halfway are removed again
+    for file_path in failed:
+        delete_chunks(vector_db, chunk_ids.get(file_path))
+
+    # New chunks are written; now drop the chunks of the previous versions
+    for file_path, entry in pending.items():
+        previous = manifest.get(file_path)
+        if previous:
+            current_ids = set(entry['chunk_ids'])
+            delete_chunks(vector_db, [i for i in previous['chunk_ids'] if i not in current_ids])
+        manifest[file_path] = entry
+
+    ingestor.report(len(pending))
+    return results
+
+def process_temp_folder():
+    """Incrementally sync the temp folder with the vector database"""
+    manifest = load_manifest()
+    vector_db = open_vector_db()
+    candidates = []
+
+    # Collect every supported file in the temp directory
     for filename in os.listdir(TEMP_PATH):
         file_path = os.path.join(TEMP_PATH, filename)
         
@@ -79,20 +240,55 @@ def process_temp_folder():
             
         # Check if file extension is supported
         file_extension = os.path.splitext(filename)[1].lower()
-        if file_extension not in supported_extensions:
+        if file_extension not in SUPPORTED_EXTENSIONS:
             logger.warning(f"Skipping unsupported file: {filename}")
             continue
-            
-        # Vectorize the file
-        logger.info(f"Processing file: {filename}")
-        success = vectorize_file(file_path)
-        
-        if success:
-            logger.info(f"Successfully processed: {filename}")
+        candidates.append(file_path)
+
+    previous_paths = set(manifest)
+    results = ingest_files(candidates, vector_db, manifest)
+
+    # Files removed from the folder: remove their chunks too
+    deleted = [p for p in previous_paths if p not in results]
+    for file_path in deleted:
+        delete_chunks(vector_db, manifest.pop(file_path)['chunk_ids'])
+        logger.info(f"Removed chunks of deleted file: {file_path}")
+
+    save_manifest(manifest)
+    vector_db.persist()
+
+    failed = sum(1 for count in results.values() if count is None)
+    changed = sum(1 for count in results.values() if count and count > 0)
+    empty = sum(1 for count in results.values() if count == NO_TEXT)
+    logger.info(
+        f"Sync complete: {changed} new/modified, {len(results) - changed - failed - empty} unchanged, "
+        f"{empty} without text, {len(deleted)} deleted, {failed} failed"
+    )
+
+def ingest_paths(file_paths):
+    """Ingest only the given files (the Omni ingest queue); returns {path: chunk count, 0, NO_TEXT or None}"""
+    manifest = load_manifest()
+    vector_db = open_vector_db()
+
+    supported = []
+    results = {}
+    for file_path in file_paths:
+        if os.path.splitext(file_path)[1].lower() in SUPPORTED_EXTENSIONS and os.path.isfile(file_path):
+            supported.append(file_path)
         else:
-            logger.error(f"Failed to process: {filename}")
+            logger.warning(f"Skipping unsupported file: {file_path}")
+            results[file_path] = None
+
+    results.update(ingest_files(supported, vector_db, manifest))
+    save_manifest(manifest)
+    vector_db.persist()
+    return results
 
 if __name__ == "__main__":
-    logger.info("Starting vectorization process...")
-    process_temp_folder()
-    logger.info("Vectorization process completed.")
\ No newline at end of file
+    if len(sys.argv) > 1:
+        # Targeted ingest: results go to stdout as JSON for the caller
+        print(json.dumps(ingest_paths(sys.argv[1:])))
+    else:
+        logger.info("Starting vectorization process...")
+        process_temp_folder()
+        logger.info("Vectorization process completed.")
\ No newline at end of file
@@ -0,0 +1,226 @@
+import sys
+import json
+import time
+import asyncio
+import logging
+import threading
+import aiohttp
+from concurrent.futures import Future
+from typing import AsyncIterator, List, Optional, Sequence
+
+from SalidaStreaming import StreamSink
+
+logger = logging.getLogger(__name__)
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+
+async def iter_sse_deltas(response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+    """Fragmentos de texto de un stream SSE de chat completions ("data: {...}" hasta "data: [DONE]")"""
+    async for raw in response.content:
+        line = raw.decode('utf-8').strip()
+        if not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            break
+        choices = json.loads(data).get('choices') or [{}]
+        delta = choices[0].get('delta', {}).get('content')
+        if delta:
+            yield delta
+
+
+async def stream_chat(session: aiohttp.ClientSession, url: str, payload: dict, sinks: Sequence[StreamSink] = ()) -> str:
+    """Pide la respuesta con stream=True y la va entregando a los sinks; registra primer token y total por separado"""
+    started = time.perf_counter()
+    first_token = None
+    text = ""
+    async with session.post(url, json={**payload, "stream": True}) as response:
+        if response.status != 200:
+            raise RuntimeError(f"OpenAI {response.status}: {await response.text()}")
+        async for delta in iter_sse_deltas(response):
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            text += delta
+            for sink in sinks:
+                await sink.update(text)
+    for sink in sinks:
+        await sink.finish(text)
+    logger.info(f"Chat en streaming: primer token en {(first_token or 0):.2f}s, "
+                f"total {time.perf_counter() - started:.2f}s, {len(text)} caracteres")
+    return text
+
+
+async def stream_completion(messages: List[dict], api_key: str, model: str, sinks: Sequence[StreamSink] = (),
+                            base_url: str = OPENAI_BASE_URL, timeout: float = 300, **params) -> str:
+    """Streaming de una sola petición con su propia sesión, para los scripts que no tienen un AsyncChatClient"""
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout),
+                                     headers={"Authorization": f"Bearer {api_key}"}) as session:
+        payload = {"model": model, "messages": messages, **params}
+        return await stream_chat(session, f"{base_url.rstrip('/')}/chat/completions", payload, sinks)
+
+
+class AsyncChatClient:
+    """
+    Cliente de chat completions sobre un event loop propio en segundo plano.
+    Reutiliza las conexiones HTTP (un solo ClientSession) y limita las peticiones simultáneas.
+    """
+
+    def __init__(self, api_key: str, model: str, base_url: str = OPENAI_BASE_URL,
+                 max_concurrency: int = 4, timeout: float = 60):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True, name="LLMClientLoop")
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+
+    def start(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.open_session(), self.loop).result()
+        return self
+
+    async def open_session(self):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"Authorization": f"Bearer {self.api_key}"}
+        )
+
+    async def complete(self, messages: List[dict], **params) -> str:
+        payload = {"model": self.model, "messages": messages, **params}
+        async with self.semaphore:
+            started = time.perf_counter()
+            async with self.session.post(f"{self.base_url}/chat/completions", json=payload) as response:
+                if response.status != 200:
+                    # Los errores de proxies y gateways suelen ser HTML, no JSON
+                    raise RuntimeError(f"OpenAI {response.status}: {(await response.text())[:500]}")
+                body = await response.json()
+        logger.info(f"Chat completion en {time.perf_counter() - started:.2f}s")
+        return body["choices"][0]["message"]["content"].strip()
+
+    def submit(self, messages: List[dict], **params) -> Future:
+        """Encola la petición desde cualquier hilo sin bloquearlo"""
+        return asyncio.run_coroutine_threadsafe(self.complete(messages, **params), self.loop)
+
+    async def stream(self, messages: List[dict], sinks: Sequence[StreamSink] = (), **params) -> str:
+        payload = {"model": self.model, "messages": messages, **params}
+        async with self.semaphore:
+            return await stream_chat(self.session, f"{self.base_url}/chat/completions", payload, sinks)
+
+    def submit_stream(self, messages: List[dict], sinks: Sequence[StreamSink] = (), **params) -> Future:
+        return asyncio.run_coroutine_threadsafe(self.stream(messages, sinks, **params), self.loop)
+
+    def stop(self):
+        if not self.thread.is_alive():
+            return
+        if self.session:
+            asyncio.run_coroutine_threadsafe(self.session.close(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+async def start_mock_server(port: int = 8765, delay: float = 0.5, reply: str = "RespuestaFinal",
+                            token_delay: float = 0.02):
+    """
+    Servidor local que imita /chat/completions con una latencia fija. Con "stream": true responde SSE,
+    una palabra por evento cada token_delay segundos. También imita sendMessage/editMessageText del
+    Bot API de Telegram y guarda los llamados en app['telegram'].
+    """
+    from aiohttp import web
+
+    async def chat_completions(request):
+        payload = await request.json()
+        await asyncio.sleep(delay)
+        words = reply.split(" ")
+        if not payload.get("stream"):
+            # Sin streaming la respuesta llega cuando se "generó" la última palabra
+            await asyncio.sleep(token_delay * len(words))
+            return web.json_response({"choices": [{"message": {"role": "assistant", "content": reply}}]})
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i, word in enumerate(words):
+            chunk = {"choices": [{"delta": {"content": word + (" " if i < len(words) - 1 else "")}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            await asyncio.sleep(token_delay)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def telegram(request):
+        payload = await request.json()
+        method = request.match_info['method']
+        request.app['telegram'].append((method, payload))
+        return web.json_response({"ok": True, "result": {"message_id": len(request.app['telegram'])}})
+
+    app = web.Application()
+    app['telegram'] = []
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/bot{token}/{method}", telegram)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+def benchmark(requests: int = 20, delay: float = 0.5, concurrency: int = 4, port: int = 8765):
+    """Ráfaga de clasificaciones contra el servidor simulado: una a la vez vs. concurrentes"""
+    server_loop = asyncio.new_event_loop()
+    threading.Thread(target=server_loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(start_mock_server(port, delay), server_loop).result()
+
+    messages = [{"role": "user", "content": "informacion"}]
+    for limit in (1, concurrency):
+        client = AsyncChatClient("test", "mock", base_url=f"http://127.0.0.1:{port}/v1", max_concurrency=limit).start()
+        start = time.perf_counter()
+        futures = [client.submit(messages) for _ in range(requests)]
+        for future in futures:
+            future.result()
+        print(f"concurrencia {limit}: {requests} mensajes en {time.perf_counter() - start:.2f}s")
+        client.stop()
+
+
+def benchmark_streaming(port: int = 8766, words: int = 300):
+    """Respuesta larga contra el servidor simulado: tiempo al primer token vs. total, y ediciones en Telegram"""
+    from SalidaStreaming import TelegramStreamSink
+
+    async def run():
+        reply = " ".join(f"palabra{i}" for i in range(words))
+        runner = await start_mock_server(port, delay=0.3, reply=reply, token_delay=0.01)
+        base = f"http://127.0.0.1:{port}"
+        messages = [{"role": "user", "content": "resumen"}]
+
+        started = time.perf_counter()
+        client = AsyncChatClient("test", "mock", base_url=f"{base}/v1").start()
+        await asyncio.wrap_future(client.submit(messages))
+        client.stop()
+        print(f"sin streaming: todo el texto a los {time.perf_counter() - started:.2f}s")
+
+        sink = TelegramStreamSink("test", 1, interval=0.5, api_url=base)
+        first = []
+
+        class FirstToken(StreamSink):
+            async def update(self, text):
+                if not first:
+                    first.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await stream_completion(messages, "test", "mock", [FirstToken(), sink], base_url=f"{base}/v1")
+        print(f"streaming: primer token a los {first[0]:.2f}s, total {time.perf_counter() - started:.2f}s, "
+              f"{len(runner.app['telegram'])} llamadas a Telegram")
+        await runner.cleanup()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO if "--streaming" in sys.argv else logging.WARNING)
+    if "--streaming" in sys.argv:
+        benchmark_streaming()
+    else:
+        benchmark()
@@ -0,0 +1,95 @@
+import os
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Extensiones que el cargador sabe leer; el resto de los archivos no se encola
+SUPPORTED_EXTENSIONS = {'.txt', '.pdf', '.html', '.htm', '.md', '.json'}
+
+# Resultado de un archivo que se leyó bien pero no tiene texto (0 significa sin cambios)
+NO_TEXT = -1
+
+
+def is_ingestible(file_path: str) -> bool:
+    return os.path.splitext(file_path)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+# (ruta, fragmentos indexados, 0 sin cambios, NO_TEXT sin texto o None si falló, segundos desde que se encoló)
+IngestCallback = Callable[[str, Optional[int], float], None]
+
+
+@dataclass
+class IngestRequest:
+    file_path: str
+    on_done: Optional[IngestCallback]
+    queued_at: float
+
+
+class IngestQueue:
+    """
+    Cola de ingesta con un único consumidor. Las rutas que llegan en ráfaga se agrupan durante
+    `debounce` segundos y se vectorizan en una sola llamada, así nunca hay dos cargadores
+    escribiendo a la vez en el mismo directorio de Chroma.
+    """
+
+    def __init__(self, ingest: Callable[[List[str]], Dict[str, Optional[int]]],
+                 debounce: float = 2.0, max_batch: int = 50):
+        self.ingest = ingest
+        self.debounce = debounce
+        self.max_batch = max_batch
+        self.requests: "queue.Queue[Optional[IngestRequest]]" = queue.Queue()
+        self.thread = threading.Thread(target=self.consume, daemon=True, name="IngestQueue")
+
+    def start(self):
+        self.thread.start()
+
+    def enqueue(self, file_path: str, on_done: Optional[IngestCallback] = None):
+        self.requests.put(IngestRequest(file_path, on_done, time.monotonic()))
+
+    def collect_batch(self, first: IngestRequest) -> Optional[List[IngestRequest]]:
+        """Junta lo que llegue hasta `debounce` segundos después de la última ruta; None si se pidió detener"""
+        batch = [first]
+        while len(batch) < self.max_batch:
+            try:
+                request = self.requests.get(timeout=self.debounce)
+            except queue.Empty:
+                break
+            if request is None:
+                return None
+            batch.append(request)
+        return batch
+
+    def consume(self):
+        while True:
+            first = self.requests.get()
+            if first is None:
+                break
+            batch = self.collect_batch(first)
+            if batch is None:
+                break
+
+            # La misma ruta subida dos veces se vectoriza una vez y se responde a ambos
+            paths = list(dict.fromkeys(request.file_path for request in batch))
+            started = time.monotonic()
+            try:
+                results = self.ingest(paths)
+            except Exception as e:
+                logger.error(f"Error en la ingesta de {len(paths)} archivos: {e}")
+                results = {}
+            logger.info(f"Lote de ingesta: {len(paths)} archivos en {time.monotonic() - started:.1f}s")
+
+            for request in batch:
+                if request.on_done:
+                    try:
+                        request.on_done(request.file_path, results.get(request.file_path),
+                                        time.monotonic() - request.queued_at)
+                    except Exception as e:
+                        logger.error(f"Error en callback de ingesta: {e}")
+
+    def stop(self):
+        self.requests.put(None)
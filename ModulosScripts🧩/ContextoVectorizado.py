@@ -7,8 +7,11 @@ import logging
 import pyperclip
 import asyncio
 import openai
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+from ClienteLLM import OPENAI_BASE_URL, stream_completion
+from SalidaStreaming import default_sinks
+from ServicioRecuperacion import get_retrieval_service
+from AlmacenConfiguracion import load_config_section
+from EmpaquetadorContexto import load_tokenizer, pack_context
 
 # Configuración del logging
 logging.basicConfig(
@@ -19,7 +22,6 @@ logger = logging.getLogger(__name__)
 
 # Configuración del modelo de embeddings
 embeddings_model = 'all-MiniLM-L6-v2'
-embeddings = HuggingFaceEmbeddings(model_name=embeddings_model)
 
 # Configuración de OpenAI
 openai.api_key = "OPENAI_API_KEY"
@@ -28,6 +30,22 @@ model_engine = "gpt-4o-mini"
 # Ruta específica de la base de datos vectorial
 VECTOR_DB_PATH = r"C:\Users\54115\Desktop\Omni\BaseDeDatos📁\Vectorizado"
 
+# El modelo y la colección se abren una sola vez por proceso; en el trabajador residente
+# quedan cargados entre consultas
+retrieval_service = get_retrieval_service(VECTOR_DB_PATH, embeddings_model)
+
+# Presupuesto de tokens de los fragmentos en el prompt y de la respuesta
+context_settings = load_config_section('CONTEXTO')
+count_tokens, truncate_tokens = load_tokenizer(model_engine)
+
+# La respuesta se muestra mientras se genera; el chat de Telegram por defecto es el primer grupo monitoreado
+streaming_settings = load_config_section('STREAMING')
+
+def default_chat_id():
+    if 'chat' in streaming_settings:
+        return streaming_settings['chat']
+    return next(iter(load_config_section('GRUPOS_MONITOREADOS', [])), None)
+
 # Prompt específico para la generación de contexto
 CONTEXT_PROMPT = """
 Por favor, genera un contexto coherente y detallado basado en:
@@ -43,9 +61,10 @@ Tu tarea es:
 Responde de manera clara y concisa, asegurándote de que la información sea precisa y relevante.
 """
 
-async def generate_context(fragments, query_text):
+async def generate_context(fragments, query_text, chat_id=None):
     """
     Genera un contexto utilizando la API de OpenAI basado en los fragmentos y la consulta.
+    La respuesta se imprime y se edita en Telegram a medida que llega; al terminar va al portapapeles.
     """
     try:
         # Construir el mensaje completo
@@ -64,18 +83,19 @@ Fragmentos relevantes encontrados:
         print(full_message)
         print("=====================================\n")
 
-        response = await openai.ChatCompletion.acreate(
-            model=model_engine,
-            messages=[
+        print("\n=== RESPUESTA GENERADA POR LA API ===")
+        sinks = default_sinks(chat_id if chat_id is not None else default_chat_id())
+        generated_content = await stream_completion(
+            [
                 {"role": "system", "content": CONTEXT_PROMPT},
                 {"role": "user", "content": full_message}
             ],
-            max_tokens=1500,
+            api_key=openai.api_key,
+            model=model_engine,
+            sinks=sinks,
+            base_url=load_config_section('OPENAI_BASE_URL', OPENAI_BASE_URL),
+            max_tokens=context_settings.get('max_tokens_respuesta', 1500),
         )
-        
-        generated_content = response.choices[0].message['content']
-        print("\n=== RESPUESTA GENERADA POR LA API ===")
-        print(generated_content)
         print("=====================================\n")
         
         return generated_content
@@ -83,7 +103,7 @@ Fragmentos relevantes encontrados:
         logger.error(f"Error al generar contexto con OpenAI: {str(e)}")
         return None
 
-async def search_fragments():
+async def search_fragments(chat_id=None):
     try:
         # Obtener texto del portapapeles
         query_text = pyperclip.paste()
@@ -97,22 +117,19 @@ async def search_fragments():
         
         print("Buscando fragmentos similares...")
         
-        # Cargar la base de datos vectorial
-        db = Chroma(
-            persist_directory=VECTOR_DB_PATH,
-            embedding_function=embeddings
-        )
-        
-        # Buscar los 10 fragmentos más similares
-        fragments = db.similarity_search_with_score(query_text, k=10)
-        
-        # Formatear resultados
-        results = []
-        for i, (doc, score) in enumerate(fragments, 1):
-            results.append(f"Fragmento {i} (Similitud: {score:.4f}):\n{doc.page_content}\n")
+        # Buscar los 10 fragmentos más similares en la colección ya abierta
+        fragments = retrieval_service.similarity_search_with_score(query_text, k=10)
         
-        # Unir resultados
-        fragments_text = "\n".join(results)
+        # Empaquetar: sin solapamientos repetidos, vecinos unidos y dentro del presupuesto de tokens
+        fragments_text = pack_context(
+            fragments,
+            budget_tokens=context_settings.get('presupuesto_tokens', 1200),
+            diversity=context_settings.get('diversidad', 0.3),
+            count_tokens=count_tokens,
+            truncate=truncate_tokens
+        )
+        raw_tokens = sum(count_tokens(doc.page_content) for doc, _ in fragments)
+        logger.info(f"Contexto empaquetado: {raw_tokens} -> {count_tokens(fragments_text)} tokens")
         
         print("\n=== FRAGMENTOS ENCONTRADOS ===")
         print(fragments_text)
@@ -120,11 +137,10 @@ async def search_fragments():
         
         # Generar contexto con OpenAI
         print("Generando contexto con OpenAI...")
-        context = await generate_context(fragments_text, query_text)
+        context = await generate_context(fragments_text, query_text, chat_id)
         
         if context:
-            # Copiar el contexto generado al portapapeles
-            pyperclip.copy(context)
+            # El sink del portapapeles ya copió el contexto completo
             print("\n¡Listo! El contexto generado ha sido copiado al portapapeles.")
         else:
             print("Error al generar el contexto. Copiando solo los fragmentos...")
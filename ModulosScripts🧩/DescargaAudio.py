@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import logging
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from MotorTranscripcion import SAMPLE_RATE, load_audio
+
+logger = logging.getLogger(__name__)
+
+# YouTube limita la velocidad de las descargas de un solo pedido: se baja por rangos, como yt-dlp
+HTTP_CHUNK_SIZE = 10 * 1024 * 1024
+READ_SIZE = 64 * 1024
+
+
+@dataclass
+class DownloadStats:
+    """Mediciones de una descarga: tiempos en segundos y bytes"""
+    mode: str
+    download_seconds: float = 0.0
+    decode_seconds: float = 0.0
+    total_seconds: float = 0.0
+    downloaded_bytes: int = 0
+    disk_bytes: int = 0
+    audio_seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (f"{self.mode}: descarga {self.download_seconds:.1f}s, decodificación {self.decode_seconds:.1f}s, "
+                f"total {self.total_seconds:.1f}s, {self.downloaded_bytes / 1e6:.1f} MB bajados, "
+                f"{self.disk_bytes / 1e6:.1f} MB escritos en disco, {self.audio_seconds / 60:.1f} min de audio")
+
+
+def audio_stream_info(video_url: str, ydl_options: Optional[dict] = None) -> dict:
+    """Formato de solo audio de mayor calidad, sin descargarlo: URL directa, encabezados y tamaño"""
+    import yt_dlp
+    options = {'format': 'bestaudio/best', 'quiet': True, 'noplaylist': True, **(ydl_options or {})}
+    with yt_dlp.YoutubeDL(options) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+    selected = info['requested_formats'][0] if info.get('requested_formats') else info
+    return {
+        'url': selected['url'],
+        'headers': selected.get('http_headers') or info.get('http_headers') or {},
+        'filesize': selected.get('filesize') or selected.get('filesize_approx'),
+        'format': selected.get('format_id'),
+        'duration': info.get('duration'),
+    }
+
+
+def _feed_stream(url: str, headers: dict, sink, stats: DownloadStats, started: float, errors: list):
+    """Baja el stream por rangos y lo escribe en la entrada de ffmpeg a medida que llega"""
+    offset = 0
+    try:
+        while True:
+            request = urllib.request.Request(url, headers={**headers, 'Range': f"bytes={offset}-{offset + HTTP_CHUNK_SIZE - 1}"})
+            try:
+                response = urllib.request.urlopen(request, timeout=30)
+            except urllib.error.HTTPError as e:
+                # 416: el tamaño era múltiplo exacto del rango y ya no queda nada
+                if e.code == 416 and offset:
+                    break
+                raise
+            with response:
+                received = 0
+                while True:
+                    block = response.read(READ_SIZE)
+                    if not block:
+                        break
+                    sink.write(block)
+                    received += len(block)
+                # Un servidor sin soporte de rangos manda todo de una vez con 200
+                full_response = response.status == 200
+            offset += received
+            if full_response or received < HTTP_CHUNK_SIZE:
+                break
+    except Exception as e:
+        errors.append(e)
+    finally:
+        stats.downloaded_bytes = offset
+        stats.download_seconds = time.perf_counter() - started
+        try:
+            sink.close()
+        except OSError:
+            pass
+
+
+def stream_audio(video_url: str, ydl_options: Optional[dict] = None,
+                 ffmpeg: str = "ffmpeg") -> Tuple[np.ndarray, DownloadStats]:
+    """
+    Audio listo para transcribir sin archivo temporal: el stream original (opus/m4a) pasa por una
+    tubería a ffmpeg, que lo decodifica directo a PCM mono de 16 kHz mientras se sigue bajando.
+    """
+    stats = DownloadStats("stream")
+    started = time.perf_counter()
+    info = audio_stream_info(video_url, ydl_options)
+    process = subprocess.Popen(
+        [ffmpeg, "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    errors = []
+    feeder = threading.Thread(
+        target=_feed_stream, args=(info['url'], info['headers'], process.stdin, stats, started, errors), daemon=True
+    )
+    feeder.start()
+    # stderr se lee aparte para que ffmpeg no se bloquee con el búfer lleno
+    stderr = []
+    reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+    reader.start()
+    pcm = process.stdout.read()
+    process.wait()
+    feeder.join()
+    reader.join()
+    # Si ffmpeg falla primero, la descarga corta por la tubería rota: su mensaje es el que explica
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg terminó con código {process.returncode}: {b''.join(stderr).decode(errors='ignore')[-500:]}")
+    if errors:
+        raise errors[0]
+
+    audio = np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+    stats.total_seconds = time.perf_counter() - started
+    # La decodificación corre a la par de la descarga: lo que queda después es lo que agrega
+    stats.decode_seconds = stats.total_seconds - stats.download_seconds
+    stats.audio_seconds = len(audio) / SAMPLE_RATE
+    logger.info(stats.summary())
+    return audio, stats
+
+
+def download_mp3(video_url: str, output_path: str, name: str, ydl_options: Optional[dict] = None) -> Tuple[str, DownloadStats]:
+    """Camino anterior: MP3 de 192 kbps en disco con FFmpegExtractAudio, que luego se vuelve a decodificar"""
+    import yt_dlp
+    stats = DownloadStats("mp3")
+    started = time.perf_counter()
+    options = {
+        'format': 'bestaudio/best',
+        'quiet': True,
+        'outtmpl': os.path.join(output_path, f'{name}.%(ext)s'),
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }],
+        **(ydl_options or {})
+    }
+    with yt_dlp.YoutubeDL(options) as ydl:
+        info = ydl.extract_info(video_url, download=True)
+    mp3_path = os.path.join(output_path, f'{name}.mp3')
+    stats.download_seconds = time.perf_counter() - started
+    stats.downloaded_bytes = info.get('filesize') or info.get('filesize_approx') or 0
+    # El original se borra tras convertir, pero se escribió igual que el MP3
+    stats.disk_bytes = stats.downloaded_bytes + os.path.getsize(mp3_path)
+    return mp3_path, stats
+
+
+def benchmark(video_url: str, output_path: str):
+    """Compara MP3 en disco + decodificación contra el stream directo a PCM"""
+    mp3_path, mp3_stats = download_mp3(video_url, output_path, "benchmark_descarga")
+    decode_started = time.perf_counter()
+    audio = load_audio(mp3_path)
+    mp3_stats.decode_seconds = time.perf_counter() - decode_started
+    mp3_stats.total_seconds = mp3_stats.download_seconds + mp3_stats.decode_seconds
+    mp3_stats.audio_seconds = len(audio) / SAMPLE_RATE
+    os.remove(mp3_path)
+
+    _, stream_stats = stream_audio(video_url)
+    print(mp3_stats.summary())
+    print(stream_stats.summary())
+    print(f"Ahorro: {mp3_stats.total_seconds - stream_stats.total_seconds:.1f}s, "
+          f"{mp3_stats.disk_bytes / 1e6:.1f} MB menos escritos en disco")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    if len(sys.argv) < 2:
+        print("Uso: python DescargaAudio.py <url de YouTube> [carpeta temporal]")
+    else:
+        benchmark(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else os.getcwd())
@@ -0,0 +1,126 @@
+import os
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Solapamiento máximo que deja el splitter entre fragmentos vecinos (CHUNK_OVERLAP más margen de palabra)
+MAX_OVERLAP_CHARS = 300
+# Un solapamiento más corto que esto puede ser casualidad
+MIN_OVERLAP_CHARS = 20
+# Por debajo de esto no vale la pena recortar un pasaje para llenar el presupuesto
+MIN_PASSAGE_TOKENS = 40
+
+_WORD = re.compile(r'\w+')
+
+
+def load_tokenizer(model: str = "gpt-4o-mini") -> Tuple[Callable[[str], int], Callable[[str, int], str]]:
+    """(contar, recortar) con tiktoken si está instalado; si no, aproximación de ~4 caracteres por token"""
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return (lambda text: len(encoding.encode_ordinary(text)),
+                lambda text, tokens: encoding.decode(encoding.encode_ordinary(text)[:tokens]))
+    except ImportError:
+        return (lambda text: (len(text) + 3) // 4,
+                lambda text, tokens: text[:tokens * 4])
+
+
+@dataclass
+class Passage:
+    text: str
+    source: str
+    relevance: float
+    words: Set[str] = field(default_factory=set)
+    tokens: int = 0
+
+
+def overlap_length(first: str, second: str) -> int:
+    """Largo del sufijo de first que es prefijo de second (el solapamiento del splitter), 0 si no hay"""
+    tail = first[-MAX_OVERLAP_CHARS:]
+    probe = second[:MIN_OVERLAP_CHARS]
+    start = tail.find(probe)
+    while start != -1:
+        if second.startswith(tail[start:]):
+            return len(tail) - start
+        start = tail.find(probe, start + 1)
+    return 0
+
+
+def merge_neighbours(passages: List[Passage]) -> List[Passage]:
+    """Une fragmentos de la misma fuente que se solapan, quitando el texto repetido"""
+    merged = True
+    while merged:
+        merged = False
+        for i, first in enumerate(passages):
+            for j, second in enumerate(passages):
+                if i == j or first.source != second.source:
+                    continue
+                overlap = overlap_length(first.text, second.text)
+                if overlap:
+                    first.text += second.text[overlap:]
+                    first.relevance = max(first.relevance, second.relevance)
+                    del passages[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return passages
+
+
+def similarity(first: Passage, second: Passage) -> float:
+    """Jaccard de palabras: suficiente para penalizar pasajes casi repetidos sin otro embedding"""
+    if not first.words or not second.words:
+        return 0.0
+    return len(first.words & second.words) / len(first.words | second.words)
+
+
+def pack_context(fragments: Sequence[Tuple[object, float]], budget_tokens: int = 1200,
+                 diversity: float = 0.3, count_tokens: Optional[Callable[[str], int]] = None,
+                 truncate: Optional[Callable[[str, int], str]] = None) -> str:
+    """
+    Arma el bloque de fragmentos para el prompt:
+    1. descarta textos repetidos y une vecinos de la misma fuente sin duplicar el solapamiento
+    2. elige pasajes por MMR (relevancia según el orden de la búsqueda, penalizando parecido a los ya elegidos)
+    3. se detiene al llenar budget_tokens; el último pasaje se recorta si hace falta
+    """
+    if count_tokens is None or truncate is None:
+        count_tokens, truncate = load_tokenizer()
+
+    passages: List[Passage] = []
+    seen = set()
+    for rank, (document, _) in enumerate(fragments):
+        text = document.page_content.strip()
+        if not text or text in seen:
+            continue
+        seen.add(text)
+        source = os.path.basename(str(document.metadata.get('source', '')))
+        # La relevancia sale de la posición: los puntajes de vectores, RRF y rerank no son comparables
+        passages.append(Passage(text, source, 1.0 - rank / max(len(fragments), 1)))
+
+    passages = merge_neighbours(passages)
+    for passage in passages:
+        passage.words = set(_WORD.findall(passage.text.lower()))
+        passage.tokens = count_tokens(passage.text)
+
+    selected: List[Passage] = []
+    remaining = budget_tokens
+    while passages and remaining >= MIN_PASSAGE_TOKENS:
+        best = max(passages, key=lambda p: (1 - diversity) * p.relevance
+                   - diversity * max((similarity(p, s) for s in selected), default=0.0))
+        passages.remove(best)
+        if best.tokens > remaining:
+            best.text = truncate(best.text, remaining)
+            best.tokens = remaining
+        selected.append(best)
+        remaining -= best.tokens
+
+    return "\n".join(
+        f"Fragmento {i}" + (f" ({passage.source})" if passage.source else "") + f":\n{passage.text}\n"
+        for i, passage in enumerate(selected, 1)
+    )
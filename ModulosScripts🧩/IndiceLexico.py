@@ -0,0 +1,95 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import Iterable, List, Tuple
+
+from CacheInstrucciones import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Archivo del índice dentro del directorio Vectorizado
+LEXICAL_INDEX_FILE = 'lexico.sqlite3'
+
+# Términos de la consulta que se llevan al MATCH; un portapapeles largo no necesita más
+MAX_QUERY_TERMS = 32
+
+
+def build_match_query(text: str, max_terms: int = MAX_QUERY_TERMS) -> str:
+    """OR de los términos de la consulta, cada uno entre comillas para que FTS5 no los lea como operadores"""
+    terms = [term for term in dict.fromkeys(normalize_text(text).split()) if len(term) > 1]
+    return " OR ".join(f'"{term}"' for term in terms[:max_terms])
+
+
+class LexicalIndex:
+    """
+    Índice invertido BM25 de los fragmentos, sobre SQLite FTS5 (incluido en la biblioteca estándar).
+    Se actualiza en cada ingesta junto con el almacén de vectores: nombres propios, URLs y palabras
+    de comando que el embedding diluye se encuentran por coincidencia exacta de términos.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS chunk_map (
+                rowid INTEGER PRIMARY KEY,
+                chunk_id TEXT UNIQUE NOT NULL,
+                metadata TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunk_text USING fts5(
+                text, tokenize = 'unicode61 remove_diacritics 2'
+            );
+        """)
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[dict]):
+        with self.lock, self.connection:
+            self.delete_ids(ids)
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                cursor = self.connection.execute(
+                    "INSERT INTO chunk_map (chunk_id, metadata) VALUES (?, ?)",
+                    (chunk_id, json.dumps(metadata, ensure_ascii=False))
+                )
+                self.connection.execute("INSERT INTO chunk_text (rowid, text) VALUES (?, ?)", (cursor.lastrowid, text))
+
+    def delete(self, ids: List[str]):
+        with self.lock, self.connection:
+            self.delete_ids(ids)
+
+    def delete_ids(self, ids: Iterable[str]):
+        for chunk_id in ids:
+            row = self.connection.execute("SELECT rowid FROM chunk_map WHERE chunk_id = ?", (chunk_id,)).fetchone()
+            if row:
+                self.connection.execute("DELETE FROM chunk_text WHERE rowid = ?", row)
+                self.connection.execute("DELETE FROM chunk_map WHERE rowid = ?", row)
+
+    def count(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM chunk_map").fetchone()[0]
+
+    def search(self, query: str, k: int = 30) -> List[Tuple[str, str, dict, float]]:
+        """(chunk_id, texto, metadatos, puntaje BM25) de mayor a menor"""
+        match = build_match_query(query)
+        if not match:
+            return []
+        with self.lock:
+            rows = self.connection.execute("""
+                SELECT chunk_map.chunk_id, chunk_text.text, chunk_map.metadata, bm25(chunk_text) AS rank
+                FROM chunk_text JOIN chunk_map ON chunk_map.rowid = chunk_text.rowid
+                WHERE chunk_text MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            """, (match, k)).fetchall()
+        # bm25() de FTS5 es negativo: más bajo es mejor
+        return [(chunk_id, text, json.loads(metadata or '{}'), -rank) for chunk_id, text, metadata, rank in rows]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def open_lexical_index(persist_directory: str) -> LexicalIndex:
+    return LexicalIndex(os.path.join(persist_directory, LEXICAL_INDEX_FILE))
@@ -0,0 +1,209 @@
+import re
+import time
+import logging
+import threading
+import numpy as np
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from CacheInstrucciones import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IntentMatch:
+    instruction: str
+    stage: str
+    confidence: float
+
+
+class IntentMatcher:
+    """
+    Clasificador local previo al LLM:
+    1. reglas de palabras clave / regex generadas a partir de los nombres de comando del config
+    2. vecino más cercano sobre embeddings MiniLM de frases de ejemplo
+    Si ninguna etapa supera el umbral se devuelve None y se consulta a OpenAI.
+    """
+
+    STAGES = ('reglas', 'embeddings', 'llm')
+
+    def __init__(self, commands: Iterable[str], examples: Dict[str, List[str]] = None,
+                 extra_rules: Dict[str, List[str]] = None, threshold: float = 0.8, stats_every: int = 20):
+        self.threshold = threshold
+        self.stats_every = stats_every
+        self.rules = self.build_rules(commands, extra_rules or {})
+        self.examples = examples or {}
+        self.embed: Optional[Callable[[List[str]], np.ndarray]] = None
+        self.example_vectors: Optional[np.ndarray] = None
+        self.example_labels: List[str] = []
+        self.model_name: Optional[str] = None
+        self.counts = {stage: 0 for stage in self.STAGES}
+        self.calls = {stage: 0 for stage in self.STAGES}
+        self.latency = {stage: 0.0 for stage in self.STAGES}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def build_rules(commands: Iterable[str], extra_rules: Dict[str, List[str]]) -> List[tuple]:
+        """(regex, comando, confianza): el nombre exacto gana a que el mensaje empiece con él"""
+        rules = []
+        for command in commands:
+            phrase = re.escape(normalize_text(command.replace('_', ' ')))
+            rules.append((re.compile(rf'^{phrase}$'), command, 1.0))
+            rules.append((re.compile(rf'^{phrase}\b'), command, 0.9))
+        for command, patterns in extra_rules.items():
+            rules.extend((re.compile(pattern, re.IGNORECASE), command, 0.9) for pattern in patterns)
+        return rules
+
+    @staticmethod
+    def embed_examples(embed: Callable[[List[str]], np.ndarray], examples: Dict[str, List[str]]) -> tuple:
+        """(etiquetas, vectores) de las frases de ejemplo"""
+        labels = [command for command, phrases in examples.items() for _ in phrases]
+        phrases = [normalize_text(p) for command in examples for p in examples[command]]
+        vectors = embed(phrases) if phrases else np.zeros((0, 1), dtype=np.float32)
+        return labels, vectors
+
+    def set_embedding_function(self, embed: Callable[[List[str]], np.ndarray]):
+        labels, vectors = self.embed_examples(embed, self.examples)
+        with self.lock:
+            self.example_labels = labels
+            self.example_vectors = vectors
+            self.embed = embed
+
+    def prepare(self, commands: Iterable[str], examples: Dict[str, List[str]] = None,
+                extra_rules: Dict[str, List[str]] = None, threshold: float = 0.8) -> dict:
+        """
+        Reglas y vectores de ejemplo de un config nuevo, sin tocar el estado actual; apply() los
+        activa. Reutiliza el modelo ya cargado: solo se vuelven a calcular los ejemplos.
+        """
+        examples = examples or {}
+        embed = self.embed
+        labels, vectors = self.embed_examples(embed, examples) if embed else ([], None)
+        return {
+            'rules': self.build_rules(commands, extra_rules or {}),
+            'examples': examples,
+            'threshold': threshold,
+            'embed': embed,
+            'labels': labels,
+            'vectors': vectors,
+        }
+
+    def apply(self, prepared: dict):
+        """Activa lo preparado conservando contadores y latencias"""
+        with self.lock:
+            embed = self.embed
+        labels, vectors = prepared['labels'], prepared['vectors']
+        if embed is not None and embed is not prepared['embed']:
+            # El modelo terminó de cargar (o cambió) entre prepare() y apply()
+            labels, vectors = self.embed_examples(embed, prepared['examples'])
+        with self.lock:
+            self.rules = prepared['rules']
+            self.examples = prepared['examples']
+            self.threshold = prepared['threshold']
+            self.example_labels = labels
+            self.example_vectors = vectors
+
+    def load_embeddings_async(self, model_name: str = 'all-MiniLM-L6-v2'):
+        """Carga MiniLM en segundo plano; mientras tanto solo actúan las reglas"""
+        self.model_name = model_name
+
+        def load():
+            try:
+                from langchain_huggingface import HuggingFaceEmbeddings
+                model = HuggingFaceEmbeddings(model_name=model_name)
+                self.set_embedding_function(lambda texts: normalized(np.asarray(model.embed_documents(texts), dtype=np.float32)))
+                logger.info(f"Embeddings de intenciones listos ({len(self.example_labels)} ejemplos)")
+            except Exception as e:
+                logger.error(f"No se pudieron cargar los embeddings de intenciones: {e}")
+        threading.Thread(target=load, daemon=True, name="IntentEmbeddings").start()
+
+    def match_rules(self, text: str) -> Optional[IntentMatch]:
+        with self.lock:
+            rules = self.rules
+        for pattern, command, confidence in rules:
+            if pattern.search(text):
+                return IntentMatch(command, 'reglas', confidence)
+        return None
+
+    def match_embeddings(self, text: str) -> Optional[IntentMatch]:
+        with self.lock:
+            embed, vectors, labels = self.embed, self.example_vectors, self.example_labels
+        if embed is None or vectors is None or not labels:
+            return None
+        scores = vectors @ embed([text])[0]
+        best = int(np.argmax(scores))
+        return IntentMatch(labels[best], 'embeddings', float(scores[best]))
+
+    def match(self, text: str) -> Optional[IntentMatch]:
+        normalized_text = normalize_text(text)
+        threshold = self.threshold
+        for stage, matcher in (('reglas', self.match_rules), ('embeddings', self.match_embeddings)):
+            started = time.perf_counter()
+            result = matcher(normalized_text)
+            with self.lock:
+                self.calls[stage] += 1
+                self.latency[stage] += time.perf_counter() - started
+            if result and result.confidence >= threshold:
+                self.record(stage)
+                return result
+        self.record('llm')
+        return None
+
+    def record(self, stage: str):
+        with self.lock:
+            self.counts[stage] += 1
+            total = sum(self.counts.values())
+        if total % self.stats_every == 0:
+            self.log_stats()
+
+    def record_llm_latency(self, seconds: float):
+        with self.lock:
+            self.calls['llm'] += 1
+            self.latency['llm'] += seconds
+
+    def log_stats(self):
+        total = sum(self.counts.values()) or 1
+        summary = ", ".join(
+            f"{stage}: {self.counts[stage] / total:.0%} aciertos, "
+            f"{self.latency[stage] / max(self.calls[stage], 1) * 1000:.1f} ms"
+            for stage in self.STAGES
+        )
+        logger.info(f"Clasificador local ({total} mensajes) -> {summary}")
+
+
+def normalized(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+# Frases que mezclan palabras de ejemplos de distintas intenciones sin pedir ninguna de ellas
+NEAR_MISSES = [
+    "no entiendo por que el informe da error",
+    "cual es el ingreso de francia",
+    "escribi la capital de francia en el informe",
+    "busca la fotosintesis en wikipedia",
+    "razona si el ingreso del ultimo mes es correcto",
+    "necesito ayuda con la formula de excel",
+    "mensaje de texto que me mandaron ayer",
+    "el problema es que no funciona el wifi",
+]
+
+
+def near_miss_scores(examples: Dict[str, List[str]], model_name: str = 'all-MiniLM-L6-v2',
+                     phrases: List[str] = NEAR_MISSES) -> List[IntentMatch]:
+    """Mejor coincidencia por embeddings de cada frase casi parecida, para revisar el umbral"""
+    from langchain_huggingface import HuggingFaceEmbeddings
+    model = HuggingFaceEmbeddings(model_name=model_name)
+    matcher = IntentMatcher(commands=[], examples=examples)
+    matcher.set_embedding_function(lambda texts: normalized(np.asarray(model.embed_documents(texts), dtype=np.float32)))
+    return [matcher.match_embeddings(normalize_text(phrase)) for phrase in phrases]
+
+
+if __name__ == "__main__":
+    from AlmacenConfiguracion import load_config_section
+    settings = load_config_section('INTENCIONES')
+    threshold = settings.get('umbral', 0.8)
+    results = near_miss_scores(settings.get('ejemplos', {}), settings.get('modelo', 'all-MiniLM-L6-v2'))
+    for phrase, result in zip(NEAR_MISSES, results):
+        flag = "DISPARA" if result.confidence >= threshold else "ok"
+        print(f"{result.confidence:.3f} {flag:>8} {result.instruction:<15} {phrase}")
+    print(f"{sum(r.confidence >= threshold for r in results)}/{len(results)} frases superan el umbral {threshold}")
@@ -0,0 +1,281 @@
+import os
+import sys
+import time
+import ctypes
+import hashlib
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Hashes de textos que Omni copió y ya entregó por otro medio; compartido con los procesos de los scripts
+OWN_WRITES_PATH = os.path.join(tempfile.gettempdir(), 'omni_portapapeles_propio.txt')
+MAX_OWN_WRITES = 20
+
+
+def content_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def mark_own_write(text: str, path: str = OWN_WRITES_PATH):
+    """Registrar antes de copiar: el watcher ignora este contenido en lugar de reenviarlo"""
+    try:
+        with open(path, 'r', encoding='ascii') as f:
+            recent = f.read().split()
+    except OSError:
+        recent = []
+    recent = (recent + [content_hash(text).hex()])[-MAX_OWN_WRITES:]
+    try:
+        with open(path, 'w', encoding='ascii') as f:
+            f.write("\n".join(recent))
+    except OSError as e:
+        logger.warning(f"No se pudo registrar la copia propia: {e}")
+
+
+def is_own_write(digest: bytes, path: str = OWN_WRITES_PATH) -> bool:
+    try:
+        with open(path, 'r', encoding='ascii') as f:
+            return digest.hex() in f.read().split()
+    except OSError:
+        return False
+
+
+class ClipboardBackend(ABC):
+    """Fuente de cambios del portapapeles: avisa cuando el contenido pudo haber cambiado"""
+
+    @abstractmethod
+    def read(self) -> str:
+        """Contenido actual del portapapeles"""
+
+    @abstractmethod
+    def wait_for_change(self, timeout: float) -> bool:
+        """Espera hasta timeout segundos; True si el contenido pudo haber cambiado"""
+
+    def report(self, changed: bool):
+        """El watcher informa si el último aviso traía contenido nuevo (lo usa el polling adaptativo)"""
+
+    def close(self):
+        pass
+
+
+class Win32ListenerBackend(ClipboardBackend):
+    """Notificaciones WM_CLIPBOARDUPDATE del sistema a través de una ventana oculta"""
+
+    WM_CLIPBOARDUPDATE = 0x031D
+    HWND_MESSAGE = -3
+
+    def __init__(self, read: Callable[[], str]):
+        import win32api
+        import win32con
+        import win32gui
+        self.win32api = win32api
+        self.win32con = win32con
+        self.win32gui = win32gui
+        self.read_clipboard = read
+        self.changed = threading.Event()
+        self.ready = threading.Event()
+        self.hwnd = None
+        self.thread = threading.Thread(target=self.pump, daemon=True, name="ClipboardListener")
+        self.thread.start()
+        self.ready.wait(5)
+        if not self.hwnd:
+            raise RuntimeError("No se pudo registrar el listener del portapapeles")
+
+    def pump(self):
+        window_class = self.win32gui.WNDCLASS()
+        window_class.lpfnWndProc = self.window_proc
+        window_class.lpszClassName = "OmniClipboardListener"
+        window_class.hInstance = self.win32api.GetModuleHandle(None)
+        self.win32gui.RegisterClass(window_class)
+        self.hwnd = self.win32gui.CreateWindow(
+            window_class.lpszClassName, window_class.lpszClassName,
+            0, 0, 0, 0, 0, self.HWND_MESSAGE, 0, window_class.hInstance, None
+        )
+        ctypes.windll.user32.AddClipboardFormatListener(self.hwnd)
+        self.ready.set()
+        self.win32gui.PumpMessages()
+
+    def window_proc(self, hwnd, msg, wparam, lparam):
+        if msg == self.WM_CLIPBOARDUPDATE:
+            self.changed.set()
+            return 0
+        return self.win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
+
+    def read(self) -> str:
+        return self.read_clipboard()
+
+    def wait_for_change(self, timeout: float) -> bool:
+        if self.changed.wait(timeout):
+            self.changed.clear()
+            return True
+        return False
+
+    def close(self):
+        if self.hwnd:
+            ctypes.windll.user32.RemoveClipboardFormatListener(self.hwnd)
+            self.win32gui.PostMessage(self.hwnd, self.win32con.WM_QUIT, 0, 0)
+            self.hwnd = None
+
+
+class PollingBackend(ClipboardBackend):
+    """Polling con backoff: acelera tras un cambio y se espacia mientras no haya novedades"""
+
+    def __init__(self, read: Callable[[], str], min_interval: float = 0.05,
+                 max_interval: float = 0.5, backoff: float = 1.5):
+        self.read_clipboard = read
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.stopped = threading.Event()
+
+    def read(self) -> str:
+        return self.read_clipboard()
+
+    def wait_for_change(self, timeout: float) -> bool:
+        return not self.stopped.wait(min(self.interval, timeout))
+
+    def report(self, changed: bool):
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+
+    def close(self):
+        self.stopped.set()
+
+
+class FakeClipboard(ClipboardBackend):
+    """Portapapeles en memoria con notificaciones; sirve para pruebas y benchmarks en Linux"""
+
+    def __init__(self, text: str = ""):
+        self.text = text
+        self.changed = threading.Event()
+        self.reads = 0
+
+    def copy(self, text: str):
+        self.text = text
+        self.changed.set()
+
+    def paste(self) -> str:
+        self.reads += 1
+        return self.text
+
+    def read(self) -> str:
+        return self.paste()
+
+    def wait_for_change(self, timeout: float) -> bool:
+        if self.changed.wait(timeout):
+            self.changed.clear()
+            return True
+        return False
+
+
+def create_clipboard_backend(config: dict, read: Optional[Callable[[], str]] = None) -> ClipboardBackend:
+    """Backends: 'auto' (notificaciones en Windows, polling en otro caso), 'win32', 'polling', 'fake'"""
+    name = config.get('backend', 'auto')
+    if read is None:
+        import pyperclip
+        read = pyperclip.paste
+
+    if name in ('auto', 'win32') and sys.platform == 'win32':
+        try:
+            return Win32ListenerBackend(read)
+        except Exception as e:
+            if name == 'win32':
+                raise
+            logger.warning(f"Notificaciones del portapapeles no disponibles, usando polling: {e}")
+    if name == 'fake':
+        return FakeClipboard()
+    return PollingBackend(
+        read,
+        min_interval=config.get('intervalo_minimo', 0.05),
+        max_interval=config.get('intervalo_maximo', 0.5)
+    )
+
+
+class ClipboardWatcher:
+    """
+    Llama al callback cuando cambia el contenido; compara hashes en lugar de cadenas completas.
+    Lo que Omni copió tras entregarlo (registrado con mark_own_write) no se vuelve a reportar.
+    """
+
+    def __init__(self, backend: ClipboardBackend, callback: Callable[[str], None],
+                 own_writes_path: str = OWN_WRITES_PATH):
+        self.backend = backend
+        self.callback = callback
+        self.own_writes_path = own_writes_path
+        self.running = True
+        self.last_hash = self.safe_hash()
+
+    def safe_hash(self) -> Optional[bytes]:
+        try:
+            return content_hash(self.backend.read())
+        except Exception as e:
+            logger.error(f"Error reading clipboard: {e}")
+            return None
+
+    def monitor(self):
+        while self.running:
+            if not self.backend.wait_for_change(1.0):
+                continue
+            try:
+                content = self.backend.read()
+            except Exception as e:
+                # Otro proceso puede tener el portapapeles abierto; se reintenta en el próximo aviso
+                logger.error(f"Error reading clipboard: {e}")
+                continue
+
+            digest = content_hash(content)
+            changed = digest != self.last_hash
+            self.backend.report(changed)
+            if changed:
+                self.last_hash = digest
+                if is_own_write(digest, self.own_writes_path):
+                    logger.info("Clipboard content written by Omni itself; not forwarded")
+                    continue
+                self.callback(content)
+
+    def stop(self):
+        self.running = False
+        self.backend.close()
+
+
+def benchmark(changes: int = 50, pause: float = 0.2):
+    """Latencia copia -> callback y CPU usada por cada backend contra el portapapeles falso"""
+    for name in ('fake', 'polling'):
+        fake = FakeClipboard("inicial")
+        backend = fake if name == 'fake' else PollingBackend(fake.paste)
+        latencies = []
+        received = threading.Event()
+        copied_at = [0.0]
+
+        def on_change(_content):
+            latencies.append(time.perf_counter() - copied_at[0])
+            received.set()
+
+        watcher = ClipboardWatcher(backend, on_change)
+        thread = threading.Thread(target=watcher.monitor, daemon=True)
+        cpu_start = time.process_time()
+        thread.start()
+        for i in range(changes):
+            time.sleep(pause)
+            received.clear()
+            copied_at[0] = time.perf_counter()
+            fake.copy(f"contenido {i}")
+            received.wait(2)
+        cpu = time.process_time() - cpu_start
+        watcher.stop()
+        thread.join(2)
+
+        latencies.sort()
+        print(f"{name:>8}: latencia p50 {latencies[len(latencies) // 2] * 1000:6.1f} ms, "
+              f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:6.1f} ms, "
+              f"CPU {cpu * 1000:6.1f} ms, lecturas {fake.reads}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,413 @@
+import os
+import sys
+import time
+import atexit
+import logging
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_SIZE = "base"
+DEFAULT_BACKEND = "whisper"
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.m4a', '.flac', '.ogg', '.webm'}
+
+# Audio que esperan los modelos Whisper
+SAMPLE_RATE = 16000
+# Ventanas del detector de voz por energía
+VAD_FRAME_SECONDS = 0.03
+MIN_SILENCE_SECONDS = 0.4
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    size: str = DEFAULT_MODEL_SIZE
+    device: str = "cpu"
+    compute_type: str = "float32"
+    backend: str = DEFAULT_BACKEND
+
+
+class TranscriptionBackend(ABC):
+    """
+    Implementación de transcripción. transcribe() devuelve siempre el formato de openai-whisper:
+    {'text', 'language', 'duration', 'segments': [{'start', 'end', 'text'}, ...]}
+    """
+
+    name = ""
+    default_compute = {"cpu": "float32", "cuda": "float16"}
+
+    @abstractmethod
+    def load(self, spec: ModelSpec):
+        """Carga el modelo; el registro lo llama una sola vez por spec y proceso"""
+
+    @abstractmethod
+    def transcribe(self, model, audio_path: str, spec: ModelSpec, **options) -> dict:
+        """Transcribe una ruta o audio float32 a 16 kHz con el modelo cargado"""
+
+
+class WhisperBackend(TranscriptionBackend):
+    """openai-whisper (PyTorch); en CPU calcula en float32"""
+
+    name = "whisper"
+
+    def load(self, spec: ModelSpec):
+        import whisper
+        return whisper.load_model(spec.size, device=spec.device)
+
+    def transcribe(self, model, audio_path: str, spec: ModelSpec, **options) -> dict:
+        options.setdefault('fp16', spec.compute_type == "float16")
+        return model.transcribe(audio_path, **options)
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """faster-whisper (CTranslate2) con pesos int8 en CPU: mismo modelo, varias veces más rápido"""
+
+    name = "faster_whisper"
+    default_compute = {"cpu": "int8", "cuda": "float16"}
+
+    def load(self, spec: ModelSpec):
+        from faster_whisper import WhisperModel
+        return WhisperModel(spec.size, device=spec.device, compute_type=spec.compute_type)
+
+    def transcribe(self, model, audio_path: str, spec: ModelSpec, **options) -> dict:
+        options.pop('fp16', None)
+        segments, info = model.transcribe(audio_path, **options)
+        # Los segmentos llegan como generador: se consumen aquí para devolver el formato de whisper
+        segments = [{'start': segment.start, 'end': segment.end, 'text': segment.text} for segment in segments]
+        return {
+            'text': "".join(segment['text'] for segment in segments),
+            'language': info.language,
+            'duration': info.duration,
+            'segments': segments,
+        }
+
+
+BACKENDS: Dict[str, TranscriptionBackend] = {
+    backend.name: backend for backend in (WhisperBackend(), FasterWhisperBackend())
+}
+
+
+def load_settings() -> dict:
+    """Sección TRANSCRIPCION del config: backend, modelo, dispositivo y cómputo por defecto"""
+    try:
+        from AlmacenConfiguracion import load_config_section
+    except ImportError:
+        return {}
+    return load_config_section('TRANSCRIPCION')
+
+
+def default_device() -> str:
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+
+def resolve_spec(size: Optional[str] = None, device: Optional[str] = None,
+                 compute_type: Optional[str] = None, backend: Optional[str] = None) -> ModelSpec:
+    """Completa lo no indicado con el config y con el cómputo por defecto del backend para el dispositivo"""
+    settings = load_settings()
+    backend = backend or settings.get('backend', DEFAULT_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de transcripción desconocido: {backend}")
+    size = size or settings.get('modelo', DEFAULT_MODEL_SIZE)
+    device = device or settings.get('dispositivo') or default_device()
+    compute_type = compute_type or settings.get('computo') or BACKENDS[backend].default_compute.get(device, "float32")
+    return ModelSpec(size, device, compute_type, backend)
+
+
+class ModelRegistry:
+    """
+    Modelos de transcripción cargados una sola vez por proceso, por (tamaño, dispositivo, tipo de cómputo, backend).
+    En el trabajador residente del pool el modelo queda cargado entre un video y el siguiente.
+    """
+
+    def __init__(self):
+        self.models: Dict[ModelSpec, object] = {}
+        self.load_seconds: Dict[ModelSpec, float] = {}
+        self.lock = threading.Lock()
+
+    def get(self, spec: ModelSpec):
+        model = self.models.get(spec)
+        if model is not None:
+            return model
+        with self.lock:
+            if spec not in self.models:
+                started = time.perf_counter()
+                self.models[spec] = BACKENDS[spec.backend].load(spec)
+                self.load_seconds[spec] = time.perf_counter() - started
+                logger.info(f"Modelo {spec.backend} {spec.size} ({spec.device}, {spec.compute_type}) "
+                            f"cargado en {self.load_seconds[spec]:.1f}s")
+            return self.models[spec]
+
+
+registry = ModelRegistry()
+
+
+def audio_duration(result: dict) -> float:
+    if result.get('duration'):
+        return result['duration']
+    segments = result.get('segments') or []
+    return segments[-1]['end'] if segments else 0.0
+
+
+def transcribe(audio_path: str, size: Optional[str] = None, device: Optional[str] = None,
+               compute_type: Optional[str] = None, backend: Optional[str] = None, **options) -> dict:
+    """Transcribe con el backend y el modelo del registro y registra la velocidad por minuto de audio"""
+    spec = resolve_spec(size, device, compute_type, backend)
+    model = registry.get(spec)
+    started = time.perf_counter()
+    result = BACKENDS[spec.backend].transcribe(model, audio_path, spec, **options)
+    elapsed = time.perf_counter() - started
+    duration = audio_duration(result)
+    if duration:
+        logger.info(f"Transcripción: {duration / 60:.1f} min de audio en {elapsed:.1f}s "
+                    f"({elapsed / (duration / 60):.1f}s por minuto, {duration / elapsed:.1f}x tiempo real)")
+    return result
+
+
+def load_audio(audio_path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decodifica con ffmpeg a mono float32 en [-1, 1], como whisper.load_audio"""
+    command = ["ffmpeg", "-nostdin", "-threads", "0", "-i", audio_path,
+               "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-"]
+    output = subprocess.run(command, capture_output=True, check=True).stdout
+    return np.frombuffer(output, np.int16).astype(np.float32) / 32768.0
+
+
+def detect_silences(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Tuple[float, float]]:
+    """
+    VAD por energía: ventanas de 30 ms por debajo del piso de ruido + 10 dB se consideran silencio
+    (sin pasar de 10 dB bajo la mediana, para audio con pausas escasas).
+    Devuelve los tramos (inicio, fin) en segundos de al menos MIN_SILENCE_SECONDS.
+    """
+    frame = int(sample_rate * VAD_FRAME_SECONDS)
+    frames = len(audio) // frame
+    if not frames:
+        return []
+    energy = np.sqrt(np.mean(audio[:frames * frame].reshape(frames, frame) ** 2, axis=1))
+    decibels = 20 * np.log10(np.maximum(energy, 1e-10))
+    silent = decibels < min(np.percentile(decibels, 10) + 10, np.median(decibels) - 10)
+
+    # Bordes de cada racha de ventanas silenciosas
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    silences = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        if (end - start) * VAD_FRAME_SECONDS >= MIN_SILENCE_SECONDS:
+            silences.append((float(start * VAD_FRAME_SECONDS), float(end * VAD_FRAME_SECONDS)))
+    return silences
+
+
+def split_on_silence(audio: np.ndarray, chunk_seconds: float = 120, sample_rate: int = SAMPLE_RATE) -> List[Tuple[float, float]]:
+    """
+    Cortes (inicio, fin) en segundos de ~chunk_seconds, cada uno en el centro del silencio más
+    cercano al objetivo; si en el último 50 % del fragmento no hay silencio se corta en seco.
+    """
+    duration = len(audio) / sample_rate
+    cut_points = [(start + end) / 2 for start, end in detect_silences(audio, sample_rate)]
+    chunks = []
+    start = 0.0
+    while duration - start > chunk_seconds * 1.5:
+        target = start + chunk_seconds
+        candidates = [point for point in cut_points if start + chunk_seconds * 0.5 <= point <= start + chunk_seconds * 1.5]
+        end = min(candidates, key=lambda point: abs(point - target)) if candidates else target
+        chunks.append((start, end))
+        start = end
+    chunks.append((start, duration))
+    return chunks
+
+
+def _init_long_audio_worker(threads: int):
+    """Reparte los núcleos: cada proceso del pool usa solo su parte de hilos de cómputo"""
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(threads)
+
+
+def _transcribe_chunk(audio: np.ndarray, spec: ModelSpec, options: dict) -> dict:
+    return transcribe(audio, spec.size, spec.device, spec.compute_type, spec.backend, **options)
+
+
+_long_audio_pools: Dict[int, ProcessPoolExecutor] = {}
+
+
+def get_long_audio_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool reutilizado entre videos: cada proceso conserva su modelo en el registro"""
+    pool = _long_audio_pools.get(workers)
+    if pool is None:
+        import multiprocessing
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_init_long_audio_worker, initargs=(threads,))
+        _long_audio_pools[workers] = pool
+    return pool
+
+
+@atexit.register
+def _shutdown_long_audio_pools():
+    for pool in _long_audio_pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def stitch_results(results: List[dict], offsets: List[float]) -> dict:
+    """Une los resultados de cada fragmento desplazando tiempos de segmentos y palabras al audio completo"""
+    segments = []
+    for result, offset in zip(results, offsets):
+        for segment in result['segments']:
+            segment = dict(segment, start=segment['start'] + offset, end=segment['end'] + offset)
+            if segment.get('words'):
+                segment['words'] = [dict(word, start=word['start'] + offset, end=word['end'] + offset)
+                                    for word in segment['words']]
+            segments.append(segment)
+    return {
+        'text': "".join(result['text'] for result in results),
+        'language': results[0].get('language') if results else None,
+        'segments': segments,
+    }
+
+
+def transcribe_long(audio_path: str, workers: Optional[int] = None, chunk_seconds: Optional[float] = None,
+                    size: Optional[str] = None, device: Optional[str] = None, compute_type: Optional[str] = None,
+                    backend: Optional[str] = None, **options) -> dict:
+    """
+    Audio largo: se corta en silencios y los fragmentos se transcriben en paralelo en procesos separados.
+    Cada proceso carga su propia copia del modelo y esto corre dentro de cada trabajador residente,
+    así que TRANSCRIPCION.largo.procesos vale 1 por defecto (el modelo del registro, sin pool) y
+    nunca pasa de la mitad de los núcleos. Por debajo de minimo_segundos es igual a transcribe().
+    Acepta una ruta o el audio ya decodificado (float32 mono a 16 kHz). result['workers'] es la
+    cantidad de procesos que realmente se usó, después de esos límites.
+    """
+    settings = load_settings().get('largo', {})
+    workers = min(workers or settings.get('procesos') or 1, max(1, (os.cpu_count() or 2) // 2))
+    chunk_seconds = chunk_seconds or settings.get('duracion_fragmento', 120)
+    spec = resolve_spec(size, device, compute_type, backend)
+
+    started = time.perf_counter()
+    audio = audio_path if isinstance(audio_path, np.ndarray) else load_audio(audio_path)
+    duration = len(audio) / SAMPLE_RATE
+    if workers == 1 or duration < settings.get('minimo_segundos', 300):
+        result = transcribe(audio, spec.size, spec.device, spec.compute_type, spec.backend, **options)
+        return {**result, 'workers': 1}
+
+    chunks = split_on_silence(audio, chunk_seconds)
+    pool = get_long_audio_pool(workers)
+    futures = [
+        pool.submit(_transcribe_chunk, audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)], spec, options)
+        for start, end in chunks
+    ]
+    result = stitch_results([future.result() for future in futures], [start for start, _ in chunks])
+    result['duration'] = duration
+    result['workers'] = workers
+    elapsed = time.perf_counter() - started
+    logger.info(f"Transcripción en paralelo: {duration / 60:.1f} min en {len(chunks)} fragmentos, "
+                f"{workers} procesos, {elapsed:.1f}s ({duration / elapsed:.1f}x tiempo real)")
+    return result
+
+
+def format_with_timestamps(result: dict) -> str:
+    """Una línea "[mm:ss] texto" por segmento, el formato que esperan los prompts de resumen"""
+    lines = []
+    for segment in result['segments']:
+        minutes, seconds = divmod(int(segment['start']), 60)
+        lines.append(f"[{minutes:02}:{seconds:02}] {segment['text']}")
+    return "\n".join(lines)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """WER = (sustituciones + borrados + inserciones) / palabras de la referencia, sobre texto normalizado"""
+    from CacheInstrucciones import normalize_text
+    ref, hyp = normalize_text(reference).split(), normalize_text(hypothesis).split()
+    if not ref:
+        return float(bool(hyp))
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def available_backends() -> List[str]:
+    names = []
+    for name, module in (("whisper", "whisper"), ("faster_whisper", "faster_whisper")):
+        try:
+            __import__(module)
+            names.append(name)
+        except ImportError:
+            print(f"{name} no está instalado: se omite")
+    return names
+
+
+def benchmark(path: str, size: Optional[str] = None):
+    """
+    Real-time factor (segundos de cómputo / segundos de audio) y WER de cada backend instalado sobre
+    clips locales. Un clip.mp3 con un clip.txt al lado usa ese texto como referencia para el WER.
+    """
+    if os.path.isdir(path):
+        clips = sorted(os.path.join(path, name) for name in os.listdir(path)
+                       if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS)
+    else:
+        clips = [path]
+
+    for backend in available_backends():
+        spec = resolve_spec(size, backend=backend)
+        started = time.perf_counter()
+        registry.get(spec)
+        print(f"\n{backend} {spec.size} ({spec.device}, {spec.compute_type}): carga {time.perf_counter() - started:.1f}s")
+
+        total_audio = total_compute = 0.0
+        errors = []
+        for clip in clips:
+            started = time.perf_counter()
+            result = transcribe(clip, spec.size, spec.device, spec.compute_type, spec.backend)
+            elapsed = time.perf_counter() - started
+            duration = audio_duration(result)
+            total_audio += duration
+            total_compute += elapsed
+
+            reference_path = os.path.splitext(clip)[0] + ".txt"
+            wer = ""
+            if os.path.exists(reference_path):
+                with open(reference_path, 'r', encoding='utf-8') as f:
+                    errors.append(word_error_rate(f.read(), result['text']))
+                wer = f", WER {errors[-1]:.1%}"
+            print(f"  {os.path.basename(clip)}: {duration:.0f}s de audio, RTF {elapsed / max(duration, 1e-9):.3f}{wer}")
+
+        summary = f"  total: RTF {total_compute / max(total_audio, 1e-9):.3f}, " \
+                  f"{total_compute / max(total_audio / 60, 1e-9):.1f}s por minuto de audio"
+        if errors:
+            summary += f", WER medio {sum(errors) / len(errors):.1%}"
+        print(summary)
+
+
+def benchmark_long(audio_path: str, process_counts=(1, 2, 4)):
+    """Tiempo de reloj de un audio largo según la cantidad de procesos"""
+    baseline = None
+    for workers in process_counts:
+        # Incluye la carga del modelo en cada proceso nuevo, como el primer video tras arrancar Omni
+        started = time.perf_counter()
+        result = transcribe_long(audio_path, workers=workers)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        # transcribe_long limita los procesos a la mitad de los núcleos: se informa lo que corrió
+        requested = f" (pedidos {workers})" if result['workers'] != workers else ""
+        print(f"{result['workers']} procesos{requested}: {elapsed:.1f}s ({baseline / elapsed:.2f}x), "
+              f"{len(result['segments'])} segmentos")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    arguments = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if not arguments:
+        print("Uso: python MotorTranscripcion.py [--largo] <audio o carpeta de clips> [tamaño]")
+    elif "--largo" in sys.argv:
+        benchmark_long(arguments[0])
+    else:
+        benchmark(arguments[0], *arguments[1:2])
@@ -0,0 +1,99 @@
+import os
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# (script_path, error o None, segundos transcurridos)
+CompletionCallback = Callable[[str, Optional[BaseException], float], None]
+
+
+@dataclass
+class ScheduledScript:
+    script_path: str
+    context: str = ""
+    on_complete: Optional[CompletionCallback] = None
+
+
+SCRIPT_TYPES = ('ahk', 'python')
+
+
+def script_type(script_path: str) -> str:
+    return 'python' if script_path.endswith('.py') else 'ahk'
+
+
+class ScriptScheduler:
+    """
+    Cola acotada de ejecuciones con un límite de concurrencia por tipo de script (AHK / Python).
+    Un script que ya está en cola o ejecutándose no se vuelve a encolar.
+    """
+
+    def __init__(self, run_script: Callable[[str, str], None], concurrency: Dict[str, int], max_queue: int = 20):
+        self.run_script = run_script
+        # Un tipo que falte en el config corre de a uno
+        self.concurrency = {kind: max(1, concurrency.get(kind, 1)) for kind in SCRIPT_TYPES}
+        self.queues = {kind: queue.Queue(maxsize=max_queue) for kind in SCRIPT_TYPES}
+        self.stopped = threading.Event()
+        self.threads = [
+            threading.Thread(target=self.worker, args=(kind,), daemon=True, name=f"Scheduler-{kind}-{i}")
+            for kind, limit in self.concurrency.items()
+            for i in range(limit)
+        ]
+        self.active: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def schedule(self, script_path: str, context: str = "", on_complete: Optional[CompletionCallback] = None) -> bool:
+        """Encola el script sin bloquear; devuelve False si ya estaba activo o la cola está llena"""
+        key = os.path.abspath(script_path)
+        with self.lock:
+            if key in self.active:
+                logger.info(f"Script ya en ejecución, se ignora: {script_path}")
+                return False
+            try:
+                self.queues[script_type(script_path)].put_nowait(ScheduledScript(script_path, context, on_complete))
+            except queue.Full:
+                logger.warning(f"Cola de scripts llena, se descarta: {script_path}")
+                return False
+            self.active.add(key)
+        return True
+
+    def is_active(self, script_path: str) -> bool:
+        with self.lock:
+            return os.path.abspath(script_path) in self.active
+
+    def worker(self, kind: str):
+        jobs = self.queues[kind]
+        while not self.stopped.is_set():
+            try:
+                job = jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            started = time.monotonic()
+            error = None
+            try:
+                self.run_script(job.script_path, job.context)
+            except Exception as e:
+                error = e
+                logger.error(f"Script execution error: {job.script_path}: {e}")
+            finally:
+                with self.lock:
+                    self.active.discard(os.path.abspath(job.script_path))
+
+            if job.on_complete:
+                try:
+                    job.on_complete(job.script_path, error, time.monotonic() - started)
+                except Exception as e:
+                    logger.error(f"Error en callback de finalización: {e}")
+
+    def stop(self):
+        """Los trabajadores terminan el script en curso y salen; lo que quede en cola se descarta"""
+        self.stopped.set()
@@ -0,0 +1,204 @@
+import os
+import re
+import sys
+import time
+import queue
+import asyncio
+import logging
+import threading
+import importlib.util
+import multiprocessing
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Módulos ya importados dentro del proceso trabajador (ruta absoluta -> módulo)
+_loaded_modules: Dict[str, Any] = {}
+
+
+class WorkerCrashedError(RuntimeError):
+    """El proceso trabajador murió mientras ejecutaba un trabajo"""
+
+
+def load_script_module(script_path: str):
+    """Importa un script por ruta (los nombres tienen espacios/emojis) y lo deja en caché"""
+    path = os.path.abspath(script_path)
+    module = _loaded_modules.get(path)
+    if module is None:
+        module_dir = os.path.dirname(path)
+        if module_dir not in sys.path:
+            sys.path.insert(0, module_dir)
+        name = re.sub(r'\W', '_', os.path.splitext(os.path.basename(path))[0])
+        spec = importlib.util.spec_from_file_location(f"omni_{name}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded_modules[path] = module
+    return module
+
+
+def _worker_loop(connection, preload: List[str]):
+    """Bucle del proceso residente: importa los módulos una vez y atiende trabajos"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    for script_path in preload:
+        try:
+            load_script_module(script_path)
+            logger.info(f"Módulo precargado: {script_path}")
+        except Exception as e:
+            logger.error(f"Error precargando {script_path}: {e}")
+
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        script_path, entry_point, args, kwargs = job
+        try:
+            result = getattr(load_script_module(script_path), entry_point)(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                result = asyncio.run(result)
+            reply = (True, result)
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+
+        try:
+            connection.send(reply)
+        except Exception as e:
+            # El resultado no se pudo serializar; se informa el error en su lugar
+            connection.send((False, f"Resultado no serializable: {e}"))
+
+
+@dataclass
+class WorkerJob:
+    script_path: str
+    entry_point: str
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    timeout: Optional[float] = None
+    future: Future = field(default_factory=Future)
+
+
+class _WorkerSlot:
+    """Un proceso trabajador y el hilo que le despacha trabajos"""
+
+    def __init__(self, pool: 'WorkerPool', index: int):
+        self.pool = pool
+        self.index = index
+        self.process = None
+        self.connection = None
+        self.thread = threading.Thread(target=self.run, daemon=True, name=f"OmniWorkerSlot-{index}")
+
+    def start_process(self):
+        parent_conn, child_conn = self.pool.context.Pipe()
+        self.process = self.pool.context.Process(
+            target=_worker_loop,
+            args=(child_conn, self.pool.preload),
+            name=f"OmniWorker-{self.index}"
+        )
+        self.process.start()
+        child_conn.close()
+        self.connection = parent_conn
+
+    def stop_process(self, graceful: bool = True):
+        if self.process is None:
+            return
+        try:
+            if graceful and self.process.is_alive():
+                self.connection.send(None)
+                self.process.join(3)
+        except Exception:
+            pass
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(3)
+        if self.process.is_alive():
+            self.process.kill()
+        self.connection.close()
+        self.process = None
+
+    def recycle(self, reason: str):
+        logger.warning(f"Reciclando trabajador {self.index}: {reason}")
+        self.stop_process(graceful=False)
+        if self.pool.running:
+            self.start_process()
+
+    def run(self):
+        while True:
+            job = self.pool.jobs.get()
+            if job is None:
+                break
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            self.execute(job)
+
+    def execute(self, job: WorkerJob):
+        timeout = job.timeout if job.timeout is not None else self.pool.default_timeout
+        deadline = time.monotonic() + timeout if timeout else None
+        started = time.monotonic()
+        try:
+            self.connection.send((job.script_path, job.entry_point, job.args, job.kwargs))
+            while not self.connection.poll(0.5):
+                if not self.process.is_alive():
+                    raise WorkerCrashedError(f"exit code {self.process.exitcode}")
+                if deadline and time.monotonic() > deadline:
+                    self.recycle(f"{job.entry_point} excedió {timeout}s")
+                    job.future.set_exception(TimeoutError(f"{job.entry_point} excedió {timeout}s"))
+                    return
+            ok, value = self.connection.recv()
+        except (WorkerCrashedError, EOFError, OSError) as e:
+            self.process.join(1)
+            detail = str(e) or f"exit code {self.process.exitcode}"
+            self.recycle(f"falló durante {job.entry_point}: {detail}")
+            job.future.set_exception(WorkerCrashedError(detail))
+            return
+
+        logger.info(f"Trabajo {job.entry_point} terminado en {time.monotonic() - started:.2f}s (trabajador {self.index})")
+        if ok:
+            job.future.set_result(value)
+        else:
+            job.future.set_exception(RuntimeError(value))
+
+
+class WorkerPool:
+    """
+    Pool de procesos residentes que importan langchain/whisper/embeddings una sola vez
+    y ejecutan funciones de los scripts (search_fragments, process_video, ...) como trabajos.
+    """
+
+    def __init__(self, processes: int = 2, preload: Iterable[str] = (), default_timeout: Optional[float] = None):
+        # spawn en todas las plataformas: torch/whisper no son seguros con fork
+        self.context = multiprocessing.get_context('spawn')
+        self.preload = [os.path.abspath(p) for p in preload]
+        self.default_timeout = default_timeout
+        self.jobs: "queue.Queue[Optional[WorkerJob]]" = queue.Queue()
+        self.slots = [_WorkerSlot(self, i) for i in range(max(1, processes))]
+        self.running = False
+
+    def start(self):
+        self.running = True
+        for slot in self.slots:
+            slot.start_process()
+            slot.thread.start()
+        logger.info(f"Pool de trabajadores iniciado con {len(self.slots)} procesos")
+
+    def submit(self, script_path: str, entry_point: str, *args, timeout: Optional[float] = None, **kwargs) -> Future:
+        if not self.running:
+            raise RuntimeError("El pool de trabajadores no está iniciado")
+        job = WorkerJob(os.path.abspath(script_path), entry_point, args, kwargs, timeout)
+        self.jobs.put(job)
+        return job.future
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        for _ in self.slots:
+            self.jobs.put(None)
+        for slot in self.slots:
+            slot.thread.join(5)
+            slot.stop_process()
+        logger.info("Pool de trabajadores detenido")
@@ -0,0 +1,89 @@
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+_NAMED_GROUP = re.compile(r'\(\?P<(\w+)>')
+
+
+@dataclass
+class RouteMatch:
+    category: str
+    url: str
+    ids: Dict[str, str] = field(default_factory=dict)
+
+
+class UrlRouter:
+    """
+    Combina todos los PATRONES_URL en una sola alternancia con grupos con nombre.
+    Una pasada de re.match resuelve la categoría (respetando el orden del config, igual que antes)
+    y los grupos con nombre de cada patrón, como video_id o playlist_id, quedan en RouteMatch.ids.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]]):
+        self.routes: Dict[str, tuple] = {}
+        alternatives = []
+        for category, category_patterns in patterns.items():
+            for pattern in category_patterns:
+                index = len(self.routes)
+                # Los nombres se prefijan por alternativa: re no admite nombres repetidos
+                names = _NAMED_GROUP.findall(pattern)
+                prefixed = _NAMED_GROUP.sub(lambda m: f"(?P<r{index}_{m.group(1)}>", pattern)
+                self.routes[f"r{index}"] = (category, names)
+                alternatives.append(f"(?P<r{index}>{prefixed})")
+        self.regex = re.compile("|".join(alternatives)) if alternatives else None
+
+    def route(self, text: str) -> Optional[RouteMatch]:
+        if self.regex is None:
+            return None
+        match = self.regex.match(text)
+        if not match:
+            return None
+        # El grupo que envuelve a cada alternativa es el último en cerrarse
+        category, names = self.routes[match.lastgroup]
+        ids = {name: match.group(f"{match.lastgroup}_{name}") for name in names}
+        return RouteMatch(category, text, {k: v for k, v in ids.items() if v is not None})
+
+
+def legacy_route(patterns: Dict[str, List[str]], text: str) -> Optional[str]:
+    """Ruteo anterior: dict de lambdas reconstruido por mensaje y re.match sobre cadenas crudas"""
+    handlers = {
+        lambda t: t.split('\n')[0].strip() == "X": "twitter",
+        lambda t: any(re.match(p, t) for p in patterns['youtube_video']): "youtube_video",
+        lambda t: any(re.match(p, t) for p in patterns['playlist']): "playlist",
+    }
+    for checker, category in handlers.items():
+        if checker(text):
+            return category
+    return None
+
+
+def benchmark(config_path: str = "config⚙️.json", iterations: int = 20000):
+    import json
+    import os
+    if not os.path.exists(config_path):
+        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config⚙️.json")
+    with open(config_path, 'r', encoding='utf-8') as f:
+        patterns = json.load(f)['PATRONES_URL']
+
+    messages = [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtu.be/dQw4w9WgXcQ?t=30",
+        "https://www.youtube.com/playlist?list=PL590L5WQmH8fJ54F369BLDSqIwcs-TCfs",
+        "https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M",
+        "necesito ayuda con el informe de ventas del mes pasado",
+    ]
+    router = UrlRouter(patterns)
+    for name, route in (("anterior", lambda t: legacy_route(patterns, t)), ("router", router.route)):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for message in messages:
+                route(message)
+        per_message = (time.perf_counter() - start) / (iterations * len(messages))
+        print(f"{name:>8}: {per_message * 1e6:.2f} µs por mensaje")
+    for message in messages:
+        print(f"  {message[:50]:<50} -> {router.route(message)}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,142 @@
+import time
+import asyncio
+import logging
+from typing import List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+# Margen bajo el límite de 4096 caracteres por mensaje de Telegram
+TELEGRAM_MESSAGE_LIMIT = 4000
+
+
+class StreamSink:
+    """Destino de una respuesta en streaming: recibe el texto acumulado y, al final, el texto completo"""
+
+    async def update(self, text: str):
+        pass
+
+    async def finish(self, text: str):
+        pass
+
+
+class ConsoleSink(StreamSink):
+    """Imprime solo lo nuevo de cada actualización, como el print de la respuesta completa de antes"""
+
+    def __init__(self):
+        self.printed = 0
+
+    async def update(self, text: str):
+        print(text[self.printed:], end='', flush=True)
+        self.printed = len(text)
+
+    async def finish(self, text: str):
+        await self.update(text)
+        print()
+
+
+class ClipboardSink(StreamSink):
+    """
+    Escribe el portapapeles una sola vez, con la respuesta completa. Con delivered=True la
+    respuesta ya llegó al chat por otro sink y se marca para que el watcher de Omni no la reenvíe.
+    """
+
+    def __init__(self, delivered: bool = False):
+        self.delivered = delivered
+
+    async def finish(self, text: str):
+        import pyperclip
+        if self.delivered:
+            from MonitorPortapapeles import mark_own_write
+            mark_own_write(text)
+        pyperclip.copy(text)
+
+
+class TelegramStreamSink(StreamSink):
+    """
+    Muestra la respuesta en un mensaje de Telegram que se va editando mientras llegan tokens.
+    Las ediciones se espacian `interval` segundos (Telegram limita la frecuencia) y nunca hay
+    más de una en vuelo: si el stream va más rápido, la siguiente ya lleva todo lo acumulado.
+    Pasado el límite de caracteres se continúa en un mensaje nuevo.
+    """
+
+    def __init__(self, token: str, chat_id, interval: float = 1.0, api_url: str = TELEGRAM_API_URL,
+                 reply_to: Optional[int] = None):
+        self.base_url = f"{api_url.rstrip('/')}/bot{token}"
+        self.chat_id = chat_id
+        self.interval = interval
+        self.reply_to = reply_to
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.message_ids: List[int] = []
+        self.sent: List[str] = []
+        self.pending: Optional[asyncio.Task] = None
+        self.last_push = 0.0
+        self.edits = 0
+
+    async def call(self, method: str, **payload) -> dict:
+        if self.session is None:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15))
+        async with self.session.post(f"{self.base_url}/{method}", json=payload) as response:
+            body = await response.json()
+            if not body.get('ok'):
+                raise RuntimeError(f"Telegram {method}: {body.get('description', body)}")
+            return body['result']
+
+    async def push(self, text: str):
+        segments = [text[i:i + TELEGRAM_MESSAGE_LIMIT] for i in range(0, len(text), TELEGRAM_MESSAGE_LIMIT)]
+        try:
+            for index, segment in enumerate(segments):
+                if index >= len(self.message_ids):
+                    payload = {'chat_id': self.chat_id, 'text': segment}
+                    if self.reply_to and not self.message_ids:
+                        payload['reply_to_message_id'] = self.reply_to
+                    self.message_ids.append((await self.call('sendMessage', **payload))['message_id'])
+                    self.sent.append(segment)
+                elif segment != self.sent[index]:
+                    await self.call('editMessageText', chat_id=self.chat_id,
+                                    message_id=self.message_ids[index], text=segment)
+                    self.sent[index] = segment
+                    self.edits += 1
+        except Exception as e:
+            logger.warning(f"No se pudo actualizar el mensaje de Telegram: {e}")
+
+    async def update(self, text: str):
+        now = time.monotonic()
+        if not text.strip() or now - self.last_push < self.interval or (self.pending and not self.pending.done()):
+            return
+        self.last_push = now
+        self.pending = asyncio.create_task(self.push(text))
+
+    async def finish(self, text: str):
+        if self.pending:
+            await self.pending
+        if text.strip():
+            await self.push(text)
+        if self.session:
+            await self.session.close()
+        logger.info(f"Telegram: {len(self.message_ids)} mensajes, {self.edits} ediciones")
+
+
+def telegram_sink_for(chat_id, reply_to: Optional[int] = None) -> Optional[TelegramStreamSink]:
+    """Sink de Telegram con el token y el intervalo del config, o None si el streaming a Telegram está apagado"""
+    from AlmacenConfiguracion import load_config_section
+    settings = load_config_section('STREAMING')
+    if chat_id is None or not settings.get('telegram', True):
+        return None
+    return TelegramStreamSink(
+        load_config_section('TELEGRAM_TOKEN', ''),
+        chat_id,
+        interval=settings.get('intervalo_edicion', 1.0),
+        api_url=settings.get('telegram_api_url', TELEGRAM_API_URL),
+        reply_to=reply_to
+    )
+
+
+def default_sinks(chat_id) -> List[StreamSink]:
+    """Consola y portapapeles, más Telegram si está activo para el chat"""
+    telegram_sink = telegram_sink_for(chat_id)
+    if telegram_sink is None:
+        return [ConsoleSink(), ClipboardSink()]
+    return [ConsoleSink(), ClipboardSink(delivered=True), telegram_sink]
@@ -0,0 +1,175 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Tuple
+
+from langchain_core.documents import Document
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from CacheEmbeddings import CachedEmbeddings
+from AlmacenConfiguracion import load_config_section
+from AlmacenVectorial import load_store_config, open_vector_store, store_version_files
+from IndiceLexico import open_lexical_index
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias para reportar p50/p99"""
+
+    def __init__(self, window: int = 1000):
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "consultas": len(self.samples),
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+        }
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 60) -> List[Tuple[Document, float]]:
+    """RRF: cada lista suma 1/(k + posición); un fragmento presente en ambas sube aunque su puntaje original no sea comparable"""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, 1):
+            # El ID de fragmento es el mismo en los dos índices; dos fragmentos con igual texto siguen separados
+            key = document.id or document.page_content
+            documents.setdefault(key, document)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(((documents[key], score) for key, score in scores.items()), key=lambda item: item[1], reverse=True)
+
+
+class RetrievalService:
+    """
+    Mantiene abiertos el modelo de embeddings y el almacén de vectores durante toda la vida del proceso
+    (el trabajador residente), así cada consulta solo paga la búsqueda y no el arranque.
+    """
+
+    def __init__(self, persist_directory: str, model_name: str = 'all-MiniLM-L6-v2'):
+        started = time.perf_counter()
+        self.persist_directory = persist_directory
+        # Las consultas repetidas (mismo portapapeles) salen de la caché de embeddings sin pasar por el modelo
+        self.embeddings = CachedEmbeddings(HuggingFaceEmbeddings(model_name=model_name), model_name)
+        self.store_config = load_store_config()
+        self.version = None
+        self.db = None
+        self.refresh()
+        self.settings = load_config_section('RECUPERACION')
+        self.lexical = open_lexical_index(persist_directory) if self.settings.get('hibrida', True) else None
+        self.reranker = self.load_reranker() if self.settings.get('rerank', False) else None
+        self.latency = LatencyTracker()
+        self.stage_latency: Dict[str, LatencyTracker] = {}
+        logger.info(f"Servicio de recuperación listo en {time.perf_counter() - started:.2f}s")
+
+    def store_version(self) -> tuple:
+        """
+        Firma (ruta, mtime, tamaño) de los archivos del almacén en disco (el cargador escribe desde
+        otro proceso). Un archivo que falta entra como (ruta, None, None): cuando aparece, la firma cambia.
+        """
+        version = []
+        for path in store_version_files(self.persist_directory, self.store_config):
+            try:
+                stat = os.stat(path)
+                version.append((path, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                version.append((path, None, None))
+        return tuple(version)
+
+    def refresh(self):
+        """Reabre el almacén solo si otro proceso lo modificó; el modelo sigue cargado"""
+        version = self.store_version()
+        if self.db is None or version != self.version:
+            self.db = open_vector_store(self.persist_directory, self.embeddings, self.store_config)
+            self.version = version
+
+    def load_reranker(self):
+        """Cross-encoder opcional para reordenar los mejores candidatos fusionados"""
+        try:
+            from sentence_transformers import CrossEncoder
+            return CrossEncoder(self.settings.get('modelo_rerank', 'cross-encoder/ms-marco-MiniLM-L-6-v2'))
+        except Exception as e:
+            logger.warning(f"Rerank desactivado, no se pudo cargar el cross-encoder: {e}")
+            return None
+
+    def timed(self, timings: Dict[str, float], stage: str, started: float):
+        elapsed = time.perf_counter() - started
+        timings[stage] = elapsed
+        self.stage_latency.setdefault(stage, LatencyTracker()).add(elapsed)
+
+    def similarity_search_with_score(self, query: str, k: int = 10) -> List[Tuple[Document, float]]:
+        """
+        Búsqueda híbrida: vectores + BM25 fusionados por RRF y, si está activo, reordenados por el
+        cross-encoder. Sin índice léxico es la búsqueda densa de siempre.
+        El puntaje es siempre de relevancia (mayor es mejor), a diferencia de la distancia del almacén;
+        su escala depende de la etapa que ordenó: similitud coseno, RRF o cross-encoder.
+        """
+        self.refresh()
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        candidates = max(k, self.settings.get('candidatos', 30)) if self.lexical else k
+
+        stage = time.perf_counter()
+        dense = self.db.similarity_search_with_score(query, k=candidates)
+        self.timed(timings, 'vectores', stage)
+
+        if self.lexical is None:
+            # Distancia L2 al cuadrado sobre vectores normalizados -> similitud coseno
+            results = [(document, 1.0 - distance / 2.0) for document, distance in dense]
+        else:
+            stage = time.perf_counter()
+            lexical = [Document(id=chunk_id, page_content=text, metadata=metadata)
+                       for chunk_id, text, metadata, _ in self.lexical.search(query, candidates)]
+            self.timed(timings, 'bm25', stage)
+
+            stage = time.perf_counter()
+            results = reciprocal_rank_fusion([[document for document, _ in dense], lexical],
+                                             self.settings.get('rrf_k', 60))
+            self.timed(timings, 'fusion', stage)
+
+            if self.reranker is not None and results:
+                stage = time.perf_counter()
+                top = results[:self.settings.get('rerank_top', 20)]
+                scores = self.reranker.predict([(query, document.page_content) for document, _ in top])
+                results = sorted(((document, float(score)) for (document, _), score in zip(top, scores)),
+                                 key=lambda item: item[1], reverse=True)
+                self.timed(timings, 'rerank', stage)
+            results = results[:k]
+
+        self.latency.add(time.perf_counter() - started)
+        stats = self.latency.summary()
+        stages = ", ".join(f"{name} {seconds * 1000:.1f} ms (p50 {self.stage_latency[name].percentile(0.5) * 1000:.1f})"
+                           for name, seconds in timings.items())
+        # ~4 caracteres por token: lo que estos fragmentos le van a costar al prompt
+        tokens = sum(len(document.page_content) for document, _ in results) // 4
+        logger.info(f"Búsqueda k={k} en {(time.perf_counter() - started) * 1000:.1f} ms [{stages}] "
+                    f"(p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms, {stats['consultas']} consultas, "
+                    f"~{tokens} tokens de contexto, caché de embeddings {self.embeddings.cache.hit_ratio():.0%})")
+        return results
+
+
+_services: Dict[str, RetrievalService] = {}
+_services_lock = threading.Lock()
+
+
+def get_retrieval_service(persist_directory: str, model_name: str = 'all-MiniLM-L6-v2') -> RetrievalService:
+    """Instancia única por colección dentro del proceso"""
+    with _services_lock:
+        if persist_directory not in _services:
+            _services[persist_directory] = RetrievalService(persist_directory, model_name)
+        return _services[persist_directory]
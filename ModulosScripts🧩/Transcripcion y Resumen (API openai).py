@@ -1,10 +1,14 @@
 import os
 import asyncio
-import yt_dlp
-import whisper
 import re
 import openai
 import pyperclip
+from AlmacenConfiguracion import load_config_section
+from AlmacenVideos import canonical_url, canonical_video_id, open_video_store, prompt_hash
+from DescargaAudio import download_mp3, stream_audio
+from MotorTranscripcion import format_with_timestamps, transcribe_long
+from ClienteLLM import OPENAI_BASE_URL, stream_completion
+from SalidaStreaming import default_sinks
 
 # Rutas de carpetas
 resumenes_folder = os.path.join(os.path.expanduser("~"), "Desktop", "Youtube", "Resumenes")
@@ -24,51 +28,68 @@ def make_safe_filename_from_url(url):
     safe_title = safe_title.replace(' ', '_')
     return safe_title
 
-def download_audio(video_url, temp_audio_path, url_as_filename):
-    """Función para descargar audio de YouTube"""
-    safe_title = make_safe_filename_from_url(url_as_filename)
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'outtmpl': os.path.join(temp_audio_path, f'{safe_title}.%(ext)s'),
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
-    }
-    
+def fetch_audio(video_url):
+    """Audio del video y archivo temporal a borrar: PCM en memoria por tubería, o el MP3 de antes si TRANSCRIPCION.descarga es 'mp3' o el stream falla"""
+    if load_config_section('TRANSCRIPCION').get('descarga', 'stream') == 'stream':
+        try:
+            audio, stats = stream_audio(video_url)
+            print(stats.summary())
+            return audio, None
+        except Exception as e:
+            print(f"No se pudo leer el stream de audio, se descarga el MP3: {e}")
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([video_url])
-        return os.path.join(temp_audio_path, f'{safe_title}.mp3')
+        mp3_path, stats = download_mp3(video_url, temp_audio_folder, make_safe_filename_from_url(video_url))
+        print(stats.summary())
     except Exception as e:
         print(f"Error al descargar el video: {e}")
-        return None
+        return None, None
+    return mp3_path, mp3_path
 
 def transcribe_audio(file_path):
-    """Función para transcribir audio usando Whisper con marcas de tiempo"""
-    print(f"Verificando existencia del archivo para transcripción: {file_path}")
-    if not os.path.exists(file_path):
-        print(f"Archivo no encontrado: {file_path}")
-        return ""
+    """Función para transcribir audio usando Whisper; acepta una ruta o el audio ya decodificado y devuelve el resultado con segmentos"""
+    if isinstance(file_path, str):
+        print(f"Verificando existencia del archivo para transcripción: {file_path}")
+        if not os.path.exists(file_path):
+            print(f"Archivo no encontrado: {file_path}")
+            return None
 
     try:
-        print("Cargando el modelo Whisper...")
-        model = whisper.load_model("base")
-        print("Modelo cargado. Iniciando transcripción con marcas de tiempo...")
-        result = model.transcribe(file_path, word_timestamps=True)
-
-        transcription_with_timestamps = []
-        for segment in result['segments']:
-            start_time = segment['start']
-            minutes, seconds = divmod(int(start_time), 60)
-            timestamp = f"{minutes:02}:{seconds:02}"
-            transcription_with_timestamps.append(f"[{timestamp}] {segment['text']}")
-
-        return "\n".join(transcription_with_timestamps)
+        # Los videos largos se cortan en silencios y se transcriben en paralelo; cada proceso
+        # conserva su modelo cargado para los siguientes videos
+        print("Iniciando transcripción con marcas de tiempo...")
+        return transcribe_long(file_path, word_timestamps=True)
     except Exception as e:
-        print(f"Error al transcribir el archivo {file_path}: {e}")
-        return ""
+        print(f"Error al transcribir el audio: {e}")
+        return None
+
+def get_transcript(store, video_id, video_url):
+    """Transcripción del almacén por ID de video; si no está, se descarga y transcribe"""
+    if store and video_id:
+        result = store.get_transcript(video_id)
+        if result:
+            print(f"Transcripción encontrada en el almacén para {video_id}")
+            return result
+
+    audio, mp3_path = fetch_audio(video_url)
+    if audio is None or (mp3_path and not os.path.exists(mp3_path)):
+        print(f"No se pudo descargar el audio para {video_url}")
+        return None
+    if mp3_path:
+        print(f"Archivo descargado: {mp3_path}")
+
+    try:
+        result = transcribe_audio(audio)
+        if result and store and video_id:
+            store.put_transcript(video_id, video_url, result)
+        return result
+    finally:
+        # Eliminar el archivo de audio temporal (el stream no deja ninguno)
+        if mp3_path:
+            try:
+                os.remove(mp3_path)
+                print(f"Archivo de audio temporal eliminado: {mp3_path}")
+            except Exception as e:
+                print(f"Error al eliminar el archivo temporal: {e}")
 
 # Prompt para resumen estructurado
 prompt_resumen = """
@@ -79,44 +100,65 @@ Quiero que respondas solo en español. Su objetivo es dividir la parte de la tra
 • Punto clave 3 (opcional)
 """
 
-async def process_video(video_url):
-    """Función principal para procesar un video de YouTube"""
+async def process_video(video_url, chat_id=None):
+    """
+    Función principal para procesar un video de YouTube; con chat_id el resumen se ve en Telegram mientras se genera.
+    Transcripción y resumen quedan en el almacén por ID de video: un link repetido (en cualquier formato)
+    se responde al instante y un prompt nuevo reutiliza la transcripción.
+    """
     print(f"Iniciando procesamiento del video: {video_url}")
-    
-    # Descargar el audio del video
-    mp3_path = download_audio(video_url, temp_audio_folder, video_url)
-    if not mp3_path or not os.path.exists(mp3_path):
-        print(f"No se pudo descargar el audio para {video_url}")
-        return
 
-    print(f"Archivo descargado: {mp3_path}")
+    video_id = canonical_video_id(video_url)
+    if video_id:
+        video_url = canonical_url(video_id)
+    try:
+        store = open_video_store() if video_id else None
+    except Exception as e:
+        print(f"No se pudo abrir el almacén de videos: {e}")
+        store = None
+    summary_key = prompt_hash(prompt_resumen, model_engine)
+
+    sinks = default_sinks(chat_id)
+
+    try:
+        resumen_estructurado = store.get_summary(video_id, summary_key) if store else None
+        if resumen_estructurado:
+            print(f"Resumen encontrado en el almacén para {video_id}")
+            for sink in sinks:
+                await sink.finish(resumen_estructurado)
+            print("El resumen ha sido copiado al portapapeles.")
+            return
 
-    # Transcribir el audio
-    transcription = transcribe_audio(mp3_path)
-    if transcription:
+        result = get_transcript(store, video_id, video_url)
+        transcription = format_with_timestamps(result) if result else ""
+        if not transcription:
+            print(f"Transcripción fallida para {video_url}. No se continuará con el resumen.")
+            return
         print(f"Transcripción completada para {video_url}")
 
         try:
             # Enviar la transcripción a GPT-4 para el resumen
             print("Generando resumen con GPT-4...")
-            response = await openai.ChatCompletion.acreate(
-                model=model_engine,
-                messages=[
+            resumen_estructurado = await stream_completion(
+                [
                     {"role": "system", "content": prompt_resumen},
                     {"role": "user", "content": f"Transcripción:\n{transcription}\n\nURL del video: {video_url}"}
                 ],
+                api_key=openai.api_key,
+                model=model_engine,
+                sinks=sinks,
+                base_url=load_config_section('OPENAI_BASE_URL', OPENAI_BASE_URL),
                 max_tokens=4096,
             )
-
-            resumen_estructurado = response.choices[0].message['content']
             print("Resumen estructurado generado.")
+            if store and resumen_estructurado:
+                store.put_summary(video_id, summary_key, resumen_estructurado)
 
-            # Copiar el resumen al portapapeles
-            pyperclip.copy(resumen_estructurado)
+            # El sink del portapapeles ya lo copió al terminar el stream
             print("El resumen ha sido copiado al portapapeles.")
 
             # Guardar el resumen en un archivo
-            safe_title = make_safe_filename_from_url(video_url)
+            safe_title = video_id or make_safe_filename_from_url(video_url)
             resumen_path = os.path.join(resumenes_folder, f"resumen_{safe_title}.txt")
             with open(resumen_path, "w", encoding="utf-8") as f:
                 f.write(resumen_estructurado)
@@ -124,17 +166,9 @@ async def process_video(video_url):
 
         except Exception as e:
             print(f"Error al obtener el resumen para {video_url}: {e}")
-        
-        finally:
-            # Eliminar el archivo de audio temporal
-            try:
-                os.remove(mp3_path)
-                print(f"Archivo de audio temporal eliminado: {mp3_path}")
-            except Exception as e:
-                print(f"Error al eliminar el archivo temporal: {e}")
-
-    else:
-        print(f"Transcripción fallida para {video_url}. No se continuará con el resumen.")
+    finally:
+        if store:
+            store.close()
 
 async def main():
     """Función principal para ejecutar el proceso"""
@@ -3,11 +3,14 @@ import numpy as np
 import wave
 import time
 import os
-import whisper
+import sys
 from datetime import datetime
 import threading
 import queue
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from MotorTranscripcion import registry, resolve_spec, transcribe
+
 class AudioRecorderTranscriber:
     def __init__(self, save_path, sample_rate=44100):
         # Configuración básica
@@ -25,9 +28,9 @@ class AudioRecorderTranscriber:
         os.makedirs(self.audio_temp_path, exist_ok=True)
         os.makedirs(save_path, exist_ok=True)
         
-        # Cargar modelo Whisper
+        # Cargar modelo Whisper (compartido con el resto del proceso a través del registro)
         print("Cargando modelo Whisper...")
-        self.model = whisper.load_model("base")
+        registry.get(resolve_spec())
         print("Modelo Whisper cargado")
 
     def record_segment(self):
@@ -64,7 +67,7 @@ class AudioRecorderTranscriber:
         """Transcribe un segmento de audio y guarda la transcripción"""
         try:
             # Realizar la transcripción
-            result = self.model.transcribe(audio_file)
+            result = transcribe(audio_file)
             
             # Crear el archivo de transcripción
             transcription_file = os.path.join(
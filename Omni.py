@@ -3,19 +3,31 @@ import subprocess
 import time
 import threading
 import keyboard
-import win32gui
 import logging
-import json
 import telebot
-import openai
 import pyperclip
-import re
 import sys
+import json
 import psutil
 from dataclasses import dataclass
-from typing import Dict, Optional, Callable, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Callable, List, Tuple
 from datetime import datetime
 
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ModulosScripts🧩')
+sys.path.insert(0, MODULES_DIR)
+
+from PoolTrabajadores import WorkerPool
+from PlanificadorScripts import ScriptScheduler
+from CapturaPantalla import CaptureBackend, PixelSampler, create_backend
+from MonitorPortapapeles import ClipboardWatcher, create_clipboard_backend
+from ClienteLLM import AsyncChatClient, OPENAI_BASE_URL
+from CacheInstrucciones import InstructionCache
+from IntencionesLocales import IntentMatcher
+from AlmacenConfiguracion import ConfigStore
+from RouterUrls import RouteMatch, UrlRouter
+from ColaIngesta import NO_TEXT, SUPPORTED_EXTENSIONS, IngestQueue, is_ingestible
+
 @dataclass
 class PixelState:
     is_active: bool = False
@@ -33,49 +45,41 @@ class MessageContext:
     command_response: str
     timestamp: datetime
 
-class ClipboardMonitor:
-    def __init__(self, callback: Callable[[str], None]):
-        self.callback = callback
-        self.running = True
-        self.last_content = pyperclip.paste()
-
-    def monitor(self):
-        while self.running:
-            current_content = pyperclip.paste()
-            if current_content != self.last_content:
-                self.last_content = current_content
-                self.callback(current_content)
-            time.sleep(0.5)
-
-    def stop(self):
-        self.running = False
-
 class PixelMonitor:
-    def __init__(self, config: dict, execute_script: Callable, send_clipboard: Callable):
-        self.config = config['PIXELES_MONITOREAR']
+    def __init__(self, config: dict, execute_script: Callable, send_clipboard: Callable,
+                 backend: Optional[CaptureBackend] = None):
         self.execute_script = execute_script
         self.send_clipboard = send_clipboard
         self.running = True
-        self.states = {name: PixelState() for name in self.config}
+        self.backend = backend or create_backend(config.get('CAPTURA_PANTALLA', 'gdi'))
+        self.pixels = ({}, {}, None)
+        self.reconfigure(config)
+
+    def build_pixels(self, config: dict) -> tuple:
+        """Pixel config, states and sampler for a config, without touching the running ones"""
+        pixel_config = config['PIXELES_MONITOREAR']
+        previous_states = self.pixels[1]
+        states = {name: previous_states.get(name, PixelState()) for name in pixel_config}
+        sampler = PixelSampler(
+            self.backend,
+            {name: tuple(pixel['coordenadas']) for name, pixel in pixel_config.items()}
+        )
+        return pixel_config, states, sampler
 
-    def get_pixel_color(self, x: int, y: int) -> Optional[int]:
-        try:
-            hdc = win32gui.GetWindowDC(win32gui.GetDesktopWindow())
-            color = win32gui.GetPixel(hdc, x, y)
-            win32gui.ReleaseDC(win32gui.GetDesktopWindow(), hdc)
-            return color
-        except Exception as e:
-            logging.error(f"Error getting pixel color: {e}")
-            return None
+    def reconfigure(self, config: dict, pixels: Optional[tuple] = None):
+        """Swap pixel config, states and sampler in one assignment; the loop picks it up next tick"""
+        self.pixels = pixels or self.build_pixels(config)
 
     def monitor(self):
         while self.running:
-            for name, config in self.config.items():
-                current_color = self.get_pixel_color(*config['coordenadas'])
+            pixel_config, states, sampler = self.pixels
+            colors = sampler.sample()
+            for name, config in pixel_config.items():
+                current_color = colors[name]
                 if current_color is None:
                     continue
 
-                state = self.states[name]
+                state = states[name]
                 if current_color == state.last_color:
                     continue
 
@@ -109,33 +113,107 @@ class PixelMonitor:
 
     def stop(self):
         self.running = False
+        self.backend.close()
 
 class MonitoringSystem:
     def __init__(self):
-        self.config = self.load_config()
+        self.config_store = ConfigStore('config⚙️.json')
+        self.config = self.config_store.config
         self.setup_logging()
         self.bot = self.setup_telegram()
         self.pixel_monitor = None
         self.clipboard_monitor = None
+        self.worker_pool = None
+        self.scheduler = self.setup_scheduler()
+        self.ingest_queue = self.setup_ingest_queue()
         self.running = True
         self.message_context = {}  # Dictionary to store context per chat_id
-        openai.api_key = self.config["OPENAI_API_KEY"]
+        self.llm_client = self.setup_llm_client(self.config)
+        # Classification callbacks block on Telegram and the clipboard; keep them off the LLM event loop
+        self.callback_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="classified")
+        cache_config = self.config.get('CACHE_INSTRUCCIONES', {})
+        self.instruction_cache = InstructionCache(
+            cache_config.get('ruta', os.path.join('cache', 'instrucciones.json')),
+            max_entries=cache_config.get('max_entradas', 2000),
+            ttl=cache_config.get('ttl_horas', 168) * 3600
+        )
+        self.intent_matcher = self.setup_intent_matcher(self.config)
+        self.hotkeys = []
         
         # Create necessary directories
         for path in self.config['DIRECTORIOS'].values():
             os.makedirs(path, exist_ok=True)
 
-        self.script_chains = {
+        self.script_chains = self.build_script_chains(self.config)
+        self.url_router = UrlRouter(self.config['PATRONES_URL'])
+        self.config_store.on_change(self.apply_config)
+
+    def build_script_chains(self, config: dict) -> dict:
+        # Keep the state (and running process) of chains that survive a reload
+        previous = getattr(self, 'script_chains', {})
+        return {
             script_path: {
                 'script': chain_config['script_encadenado'],
-                'state': ScriptChainState()
+                'state': previous[script_path]['state'] if script_path in previous else ScriptChainState()
             }
-            for script_path, chain_config in self.config.get('SCRIPTS_ENCADENADOS', {}).items()
+            for script_path, chain_config in config.get('SCRIPTS_ENCADENADOS', {}).items()
         }
 
-    def load_config(self) -> dict:
-        with open('config⚙️.json', 'r', encoding='utf-8') as file:
-            return json.load(file)
+    def llm_settings(self, config: dict) -> tuple:
+        return (
+            config["OPENAI_API_KEY"],
+            config.get("OPENAI_MODEL", "gpt-4o-mini"),
+            config.get("OPENAI_BASE_URL", OPENAI_BASE_URL),
+            config.get("LLM_CONCURRENCIA", 4)
+        )
+
+    def setup_llm_client(self, config: dict) -> AsyncChatClient:
+        api_key, model, base_url, max_concurrency = self.llm_settings(config)
+        return AsyncChatClient(
+            api_key=api_key,
+            model=model,
+            base_url=base_url,
+            max_concurrency=max_concurrency
+        ).start()
+
+    def apply_config(self, config: dict):
+        """Rebuild everything derived from the config, then swap it all in without restarting polling"""
+        llm_client = None
+        try:
+            for path in config['DIRECTORIOS'].values():
+                os.makedirs(path, exist_ok=True)
+            script_chains = self.build_script_chains(config)
+            url_router = UrlRouter(config['PATRONES_URL'])
+            intent_config = config.get('INTENCIONES', {})
+            intent_update = self.intent_matcher.prepare(
+                commands=list(config['AHK_SCRIPTS']) + list(config.get('PYTHON_SCRIPTS', {})),
+                examples=intent_config.get('ejemplos', {}),
+                extra_rules=intent_config.get('reglas', {}),
+                threshold=intent_config.get('umbral', 0.8)
+            )
+            pixels = self.pixel_monitor.build_pixels(config) if self.pixel_monitor else None
+            if self.llm_settings(config) != self.llm_settings(self.config):
+                llm_client = self.setup_llm_client(config)
+        except Exception as e:
+            logging.error(f"Invalid configuration, keeping the previous one: {e}")
+            return
+
+        if config.get("TELEGRAM_TOKEN") != self.config.get("TELEGRAM_TOKEN"):
+            logging.warning("TELEGRAM_TOKEN changed; restart the system to use the new bot")
+
+        self.config, self.script_chains, self.url_router = config, script_chains, url_router
+        self.intent_matcher.apply(intent_update)
+        if intent_config.get('ejemplos') and intent_config.get('modelo', 'all-MiniLM-L6-v2') != self.intent_matcher.model_name:
+            self.intent_matcher.load_embeddings_async(intent_config.get('modelo', 'all-MiniLM-L6-v2'))
+        if pixels:
+            self.pixel_monitor.reconfigure(config, pixels)
+        if llm_client:
+            previous_client, self.llm_client = self.llm_client, llm_client
+            # Requests already submitted finish on the old client before its session closes
+            threading.Timer(previous_client.timeout, previous_client.stop).start()
+            logging.info("LLM client rebuilt with the new model/concurrency settings")
+        self.setup_hotkeys()
+        logging.info("Configuration applied")
 
     def setup_logging(self):
         log_dir = self.config['DIRECTORIO_LOGS']
@@ -147,6 +225,89 @@ class MonitoringSystem:
             handlers=[logging.FileHandler(log_file, encoding='utf-8'), logging.StreamHandler()]
         )
 
+    def setup_worker_pool(self) -> WorkerPool:
+        pool_config = self.config.get('POOL_TRABAJADORES', {})
+        entry_points = pool_config.get('puntos_entrada', {})
+        candidates = list(self.config['SCRIPTS'].values()) + list(self.config.get('PYTHON_SCRIPTS', {}).values())
+        preload = [path for path in candidates if os.path.basename(path) in entry_points]
+
+        pool = WorkerPool(
+            processes=pool_config.get('procesos', 2),
+            preload=preload,
+            default_timeout=pool_config.get('timeout_trabajo')
+        )
+        pool.start()
+        return pool
+
+    def setup_scheduler(self) -> ScriptScheduler:
+        scheduler_config = self.config.get('PLANIFICADOR', {})
+        scheduler = ScriptScheduler(
+            self.run_script,
+            concurrency=scheduler_config.get('concurrencia', {'ahk': 1, 'python': 2}),
+            max_queue=scheduler_config.get('tamano_cola', 20)
+        )
+        scheduler.start()
+        return scheduler
+
+    def setup_intent_matcher(self, config: dict) -> IntentMatcher:
+        intent_config = config.get('INTENCIONES', {})
+        matcher = IntentMatcher(
+            commands=list(config['AHK_SCRIPTS']) + list(config.get('PYTHON_SCRIPTS', {})),
+            examples=intent_config.get('ejemplos', {}),
+            extra_rules=intent_config.get('reglas', {}),
+            threshold=intent_config.get('umbral', 0.8)
+        )
+        if intent_config.get('ejemplos'):
+            matcher.load_embeddings_async(intent_config.get('modelo', 'all-MiniLM-L6-v2'))
+        return matcher
+
+    def setup_ingest_queue(self) -> IngestQueue:
+        queue_config = self.config.get('COLA_INGESTA', {})
+        ingest_queue = IngestQueue(
+            self.ingest_files,
+            debounce=queue_config.get('espera', 2.0),
+            max_batch=queue_config.get('maximo_lote', 50)
+        )
+        ingest_queue.start()
+        return ingest_queue
+
+    def ingest_files(self, file_paths: List[str]) -> Dict[str, Optional[int]]:
+        """Vectorize exactly these files with the database loader; called only from the ingest queue thread"""
+        loader = self.config['SCRIPTS']['database_loader']
+        if self.worker_pool:
+            return self.worker_pool.submit(loader, 'ingest_paths', file_paths).result()
+
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(loader), *file_paths],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def get_entry_point(self, script_path: str) -> Optional[str]:
+        entry_points = self.config.get('POOL_TRABAJADORES', {}).get('puntos_entrada', {})
+        return entry_points.get(os.path.basename(script_path))
+
+    def launch_python_script(self, script_path: str, *args):
+        """Run a module entry point on the resident pool, or fall back to a fresh interpreter"""
+        entry_point = self.get_entry_point(script_path)
+        if self.worker_pool and entry_point:
+            future = self.worker_pool.submit(script_path, entry_point, *args)
+            future.add_done_callback(lambda f: self.log_worker_job(f, entry_point))
+            return future
+
+        return subprocess.Popen(
+            [sys.executable, os.path.abspath(script_path)],
+            creationflags=subprocess.CREATE_NEW_CONSOLE
+        )
+
+    def log_worker_job(self, future, entry_point: str):
+        if future.exception():
+            logging.error(f"Worker job {entry_point} failed: {future.exception()}")
+        else:
+            logging.info(f"Worker job {entry_point} completed")
+
     def setup_telegram(self) -> telebot.TeleBot:
         bot = telebot.TeleBot(self.config["TELEGRAM_TOKEN"])
         
@@ -154,10 +315,10 @@ class MonitoringSystem:
         def handle_files(message):
             self.handle_file_message(message)
             
-        for group_id in self.config["GRUPOS_MONITOREADOS"]:
-            bot.message_handler(func=lambda m, gid=group_id: str(m.chat.id) == gid)(
-                self.handle_telegram_message
-            )
+        # Membership is checked per message so reloaded GRUPOS_MONITOREADOS apply immediately
+        bot.message_handler(func=lambda m: str(m.chat.id) in self.config["GRUPOS_MONITOREADOS"])(
+            self.handle_telegram_message
+        )
         
         return bot
 
@@ -181,32 +342,81 @@ class MonitoringSystem:
             print(f"Content: {msg['content']}")
         print("\n" + "="*50 + "\n")
 
+    def get_context_key(self, chat_id: int) -> Tuple[str, ...]:
+        context = self.message_context.get(chat_id)
+        return (context.original_message, context.command_response) if context else ()
+
+    def load_prompt(self) -> str:
+        return self.config_store.prompt()
+
+    def has_recent_context(self, chat_id: int) -> bool:
+        context = self.message_context.get(chat_id)
+        window = self.config.get('INTENCIONES', {}).get('ventana_contexto', 120)
+        return context is not None and (datetime.now() - context.timestamp).total_seconds() < window
+
+    def classify(self, chat_id: int, text: str, source: str, local_intents: bool = False) -> Future:
+        """
+        Resolve the instruction from the cache, or ask the LLM and remember the answer.
+        The local intent matcher only runs when local_intents is set (Telegram commands) and no
+        recent exchange could change the meaning; it never answers RespuestaFinal.
+        """
+        prompt = self.load_prompt()
+        context = self.get_context_key(chat_id)
+
+        cached = self.instruction_cache.get(text, prompt, context)
+        if cached is not None:
+            logging.info(f"Instruction cache hit ({source}): {cached}")
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        match = self.intent_matcher.match(text) if local_intents and not self.has_recent_context(chat_id) else None
+        if match:
+            logging.info(f"Local intent match ({source}, {match.stage}, {match.confidence:.2f}): {match.instruction}")
+            future = Future()
+            future.set_result(match.instruction)
+            return future
+
+        # Prepare messages with context from previous interactions
+        messages = [{"role": "system", "content": prompt}]
+        messages.extend(self.get_context_messages(chat_id))
+        messages.append({"role": "user", "content": text})
+        self.print_api_request(messages, source)
+
+        started = time.perf_counter()
+        future = self.llm_client.submit(messages)
+        self.when_done(future, self.remember_instruction, text, prompt, context, started)
+        return future
+
+    def when_done(self, future: Future, callback: Callable, *args):
+        """Run callback(future, *args) on the callback executor once the future resolves"""
+        future.add_done_callback(lambda f: self.callback_executor.submit(callback, f, *args))
+
+    def remember_instruction(self, future, text: str, prompt: str, context: Tuple[str, ...], started: float):
+        self.intent_matcher.record_llm_latency(time.perf_counter() - started)
+        if future.exception() is None:
+            self.instruction_cache.put(text, prompt, context, future.result())
+
+    def get_instruction_script(self, instruction: str) -> Optional[str]:
+        # Check both AHK and Python scripts
+        return (
+            self.config["AHK_SCRIPTS"].get(instruction) or
+            self.config.get("PYTHON_SCRIPTS", {}).get(instruction)
+        )
+
     def handle_clipboard_update(self, content: str):
         try:
-            # Read the prompt
-            with open(self.config["RUTA_PROMPT"], 'r', encoding='utf-8') as f:
-                prompt = f.read().strip()
-
             # Get context from the last interaction
             chat_id = next(iter(self.config["GRUPOS_MONITOREADOS"]))
-            context_messages = self.get_context_messages(int(chat_id))
-
-            # Prepare messages with context
-            messages = [{"role": "system", "content": prompt}]
-            messages.extend(context_messages)
-            messages.append({"role": "user", "content": content})
+            future = self.classify(int(chat_id), content, "Clipboard Update")
+            self.when_done(future, self.on_clipboard_classified, content, chat_id)
+        except Exception as e:
+            logging.error(f"Error processing clipboard content: {e}")
 
-            # Print API request
-            self.print_api_request(messages, "Clipboard Update")
+    def on_clipboard_classified(self, future, content: str, chat_id: str):
+        try:
+            instruction = future.result()
 
-            # Make API call
-            response = openai.ChatCompletion.create(
-                model=self.config.get("OPENAI_MODEL"),
-                messages=messages
-            )
-            
-            instruction = response.choices[0].message['content'].strip()
-            
             # Handle the response
             if instruction == "RespuestaFinal":
                 # Send to first monitored group
@@ -216,16 +426,11 @@ class MonitoringSystem:
                 )
                 logging.info("Clipboard content sent to Telegram after OpenAI RespuestaFinal")
                 return
-            
-            # Check for script execution
-            script_path = (
-                self.config["AHK_SCRIPTS"].get(instruction) or 
-                self.config.get("PYTHON_SCRIPTS", {}).get(instruction)
-            )
-            
+
+            script_path = self.get_instruction_script(instruction)
             if script_path:
-                self.execute_script(script_path)
-                logging.info(f"Executed script based on clipboard content: {instruction}")
+                if self.execute_script(script_path):
+                    logging.info(f"Scheduled script based on clipboard content: {instruction}")
             else:
                 logging.warning(f"Unrecognized instruction from clipboard content: {instruction}")
 
@@ -234,35 +439,26 @@ class MonitoringSystem:
 
     def handle_general_message(self, message):
         pyperclip.copy(message.text)
-        
-        try:
-            with open(self.config["RUTA_PROMPT"], 'r', encoding='utf-8') as f:
-                prompt = f.read().strip()
-
-            # Get context from previous interactions
-            context_messages = self.get_context_messages(message.chat.id)
 
-            # Prepare messages with context
-            messages = [{"role": "system", "content": prompt}]
-            messages.extend(context_messages)
-            messages.append({"role": "user", "content": message.text})
+        try:
+            # Classification runs on the client's event loop; the reply goes out when it completes
+            future = self.classify(message.chat.id, message.text, "Telegram Message", local_intents=True)
+            self.when_done(future, self.on_message_classified, message)
+        except Exception as e:
+            logging.error(f"API error: {e}")
+            self.bot.reply_to(message, "Processing error occurred")
 
-            # Print API request
-            self.print_api_request(messages, "Telegram Message")
+    def on_message_classified(self, future, message):
+        try:
+            instruction = future.result()
 
-            response = openai.ChatCompletion.create(
-                model=self.config.get("OPENAI_MODEL", "OPENAI_MODEL"),
-                messages=messages
-            )
-            instruction = response.choices[0].message['content'].strip()
-            
             # Store the context for future use
             self.message_context[message.chat.id] = MessageContext(
                 original_message=message.text,
                 command_response=instruction,
                 timestamp=datetime.now()
             )
-            
+
             # Check if the response is "RespuestaFinal"
             if instruction == "RespuestaFinal":
                 clipboard_content = pyperclip.paste()
@@ -272,16 +468,15 @@ class MonitoringSystem:
                 else:
                     self.bot.reply_to(message, "❌ El portapapeles está vacío")
                 return
-            
-            # Check both AHK and Python scripts
-            script_path = (
-                self.config["AHK_SCRIPTS"].get(instruction) or 
-                self.config.get("PYTHON_SCRIPTS", {}).get(instruction)
-            )
-            
+
+            script_path = self.get_instruction_script(instruction)
             if script_path:
-                self.execute_script(script_path)
-                self.bot.reply_to(message, f"Executed: {instruction}")
+                scheduled = self.execute_script(
+                    script_path,
+                    on_complete=lambda path, error, elapsed: self.reply_script_result(message, instruction, error, elapsed)
+                )
+                if not scheduled:
+                    self.bot.reply_to(message, f"⏳ Already running: {instruction}")
             else:
                 self.bot.reply_to(message, "Instruction not recognized")
         except Exception as e:
@@ -303,45 +498,57 @@ class MonitoringSystem:
         except Exception as e:
             logging.error(f"Error terminating process: {e}")
 
-    def execute_script(self, script_path: str, context: str = ""):
+    def reply_script_result(self, message, instruction: str, error: Optional[BaseException], elapsed: float):
         try:
-            # Determine script type and execute accordingly
-            if script_path.endswith('.py'):
-                process = subprocess.run(
-                    [sys.executable, os.path.abspath(script_path)],
-                    check=True,
+            if error:
+                self.bot.reply_to(message, f"❌ Failed: {instruction} ({error})")
+            else:
+                self.bot.reply_to(message, f"Executed: {instruction} ({elapsed:.1f}s)")
+        except Exception as e:
+            logging.error(f"Error sending script result: {e}")
+
+    def execute_script(self, script_path: str, context: str = "", on_complete: Optional[Callable] = None) -> bool:
+        """Queue a script without blocking the caller (telebot thread, hotkeys, pixel loop)"""
+        return self.scheduler.schedule(script_path, context, on_complete)
+
+    def run_script(self, script_path: str, context: str = ""):
+        # Determine script type and execute accordingly
+        entry_point = self.get_entry_point(script_path)
+        if script_path.endswith('.py') and self.worker_pool and entry_point:
+            self.worker_pool.submit(script_path, entry_point).result()
+        elif script_path.endswith('.py'):
+            subprocess.run(
+                [sys.executable, os.path.abspath(script_path)],
+                check=True,
+                creationflags=subprocess.CREATE_NEW_CONSOLE
+            )
+        else:  # .ahk scripts
+            subprocess.run(
+                [self.config['RUTA_AHK'], os.path.abspath(script_path)],
+                check=True
+            )
+
+        logging.info(f"Script executed: {script_path} {context}")
+
+        if script_path in self.script_chains:
+            chain_config = self.script_chains[script_path]
+            chain_state = chain_config['state']
+            chained_script = chain_config['script']
+
+            if chain_state.is_running:
+                self.terminate_process(chain_state.process)
+                chain_state.process = None
+                chain_state.is_running = False
+                logging.info(f"Chained script stopped: {chained_script}")
+            else:
+                is_python = chained_script.endswith('.py')
+                chain_state.process = subprocess.Popen(
+                    [sys.executable if is_python else self.config['RUTA_AHK'],
+                     os.path.abspath(chained_script)],
                     creationflags=subprocess.CREATE_NEW_CONSOLE
                 )
-            else:  # .ahk scripts
-                process = subprocess.run(
-                    [self.config['RUTA_AHK'], os.path.abspath(script_path)],
-                    check=True
-                )
-            
-            logging.info(f"Script executed: {script_path} {context}")
-
-            if script_path in self.script_chains:
-                chain_config = self.script_chains[script_path]
-                chain_state = chain_config['state']
-                chained_script = chain_config['script']
-
-                if chain_state.is_running:
-                    self.terminate_process(chain_state.process)
-                    chain_state.process = None
-                    chain_state.is_running = False
-                    logging.info(f"Chained script stopped: {chained_script}")
-                else:
-                    is_python = chained_script.endswith('.py')
-                    chain_state.process = subprocess.Popen(
-                        [sys.executable if is_python else self.config['RUTA_AHK'],
-                         os.path.abspath(chained_script)],
-                        creationflags=subprocess.CREATE_NEW_CONSOLE
-                    )
-                    chain_state.is_running = True
-                    logging.info(f"Chained script started: {chained_script}")
-
-        except Exception as e:
-            logging.error(f"Script execution error: {e}")
+                chain_state.is_running = True
+                logging.info(f"Chained script started: {chained_script}")
 
     def handle_file_message(self, message):
         try:
@@ -368,38 +575,74 @@ class MonitoringSystem:
             file_path = os.path.join(self.config['DIRECTORIOS']['descargas'], file_name)
             with open(file_path, 'wb') as f:
                 f.write(downloaded_file)
-            
-            subprocess.Popen(
-                [sys.executable, self.config['SCRIPTS']['database_loader']],
-                creationflags=subprocess.CREATE_NEW_CONSOLE
+
+            if not is_ingestible(file_path):
+                self.bot.reply_to(
+                    message,
+                    f"✅ File saved (not indexed, searchable types: {', '.join(sorted(SUPPORTED_EXTENSIONS))}):\n{file_name}"
+                )
+                logging.info(f"File downloaded, not an ingestible type: {file_path}")
+                return
+
+            self.ingest_queue.enqueue(
+                file_path,
+                lambda path, chunks, elapsed: self.reply_ingest_result(message, path, chunks, elapsed)
             )
             
-            self.bot.reply_to(message, f"✅ File saved and processing started:\n{file_name}")
-            logging.info(f"File downloaded and processing: {file_path}")
+            self.bot.reply_to(message, f"✅ File saved and queued for indexing:\n{file_name}")
+            logging.info(f"File downloaded and queued for ingest: {file_path}")
             
         except Exception as e:
             self.bot.reply_to(message, f"❌ Error processing file: {str(e)}")
             logging.error(f"File processing error: {e}")
 
+    def reply_ingest_result(self, message, file_path: str, chunks: Optional[int], elapsed: float):
+        file_name = os.path.basename(file_path)
+        try:
+            if chunks is None:
+                self.bot.reply_to(message, f"❌ Could not index: {file_name}")
+            elif chunks == NO_TEXT:
+                self.bot.reply_to(message, f"⚠️ No text extracted, nothing to index: {file_name}")
+            elif chunks == 0:
+                self.bot.reply_to(message, f"✅ Already searchable (unchanged): {file_name}")
+            else:
+                self.bot.reply_to(message, f"🔎 Now searchable: {file_name} ({chunks} chunks, {elapsed:.1f}s)")
+        except Exception as e:
+            logging.error(f"Error sending ingest result: {e}")
+
     def handle_telegram_message(self, message):
         text = message.text.strip()
-        
-        handlers = {
-            lambda t: t.split('\n')[0].strip() == "X": self.handle_twitter_message,
-            lambda t: any(re.match(p, t) for p in self.config['PATRONES_URL']['youtube_video']): 
-                self.handle_youtube_video,
-            lambda t: any(re.match(p, t) for p in self.config['PATRONES_URL']['playlist']): 
-                self.handle_playlist
-        }
 
-        for checker, handler in handlers.items():
-            if checker(text):
-                success = handler(text)
-                response = "✅ Processed successfully!" if success else "❌ Processing failed"
-                self.bot.reply_to(message, response)
+        if text.split('\n')[0].strip() == "X":
+            success = self.handle_twitter_message(text)
+        else:
+            route = self.url_router.route(text)
+            if route is None:
+                self.handle_general_message(message)
                 return
+            success = self.handle_url(route, message.chat.id)
 
-        self.handle_general_message(message)
+        response = "✅ Processed successfully!" if success else "❌ Processing failed"
+        self.bot.reply_to(message, response)
+
+    def handle_url(self, route: RouteMatch, chat_id: Optional[int] = None) -> bool:
+        if route.category == 'youtube_video':
+            return self.handle_youtube_video(route.url, chat_id)
+        if route.category == 'playlist':
+            return self.handle_playlist(route.url)
+
+        # Categories added only in the config run the script named in RUTAS_URL
+        try:
+            target = self.config['RUTAS_URL'][route.category]
+            args = [route.url]
+            if 'directorio' in target:
+                args.append(self.config['DIRECTORIOS'][target['directorio']])
+            pyperclip.copy(route.url)
+            self.launch_python_script(self.config['SCRIPTS'][target['script']], *args)
+            return True
+        except Exception as e:
+            logging.error(f"Error processing {route.category} URL: {e}")
+            return False
 
     def handle_twitter_message(self, text: str) -> bool:
         try:
@@ -422,13 +665,11 @@ class MonitoringSystem:
             logging.error(f"Error saving tweet: {e}")
             return False
 
-    def handle_youtube_video(self, url: str) -> bool:
+    def handle_youtube_video(self, url: str, chat_id: Optional[int] = None) -> bool:
         try:
             pyperclip.copy(url)
-            subprocess.Popen(
-                [sys.executable, self.config['SCRIPTS']['transcription']], 
-                creationflags=subprocess.CREATE_NEW_CONSOLE
-            )
+            # The summary streams into a message in the chat the link came from
+            self.launch_python_script(self.config['SCRIPTS']['transcription'], url, chat_id)
             return True
         except Exception as e:
             logging.error(f"Error processing YouTube video: {e}")
@@ -437,24 +678,25 @@ class MonitoringSystem:
     def handle_playlist(self, url: str) -> bool:
         try:
             pyperclip.copy(url)
-            subprocess.Popen(
-                [sys.executable, self.config['SCRIPTS']['playlist']], 
-                creationflags=subprocess.CREATE_NEW_CONSOLE
-            )
+            self.launch_python_script(self.config['SCRIPTS']['playlist'], url, self.config['DIRECTORIOS']['playlist'])
             return True
         except Exception as e:
             logging.error(f"Error downloading playlist: {e}")
             return False
 
     def setup_hotkeys(self):
-        for hotkey, script in self.config['TECLAS_RAPIDAS'].items():
+        for hotkey in self.hotkeys + list(self.config['TECLAS_RAPIDAS']):
             try:
                 keyboard.remove_hotkey(hotkey)
             except:
                 pass
+        for hotkey, script in self.config['TECLAS_RAPIDAS'].items():
             keyboard.add_hotkey(hotkey, lambda p=script: self.execute_script(p))
+        self.hotkeys = list(self.config['TECLAS_RAPIDAS'])
 
     def run(self):
+        self.worker_pool = self.setup_worker_pool()
+        self.config_store.start()
         self.setup_hotkeys()
         for script in self.config['SCRIPTS_AL_INICIO']:
             if script:  # Only execute non-empty script paths
@@ -470,7 +712,10 @@ class MonitoringSystem:
         )
 
         # Initialize and start clipboard monitor
-        self.clipboard_monitor = ClipboardMonitor(self.handle_clipboard_update)
+        self.clipboard_monitor = ClipboardWatcher(
+            create_clipboard_backend(self.config.get('PORTAPAPELES', {})),
+            self.handle_clipboard_update
+        )
         
         # Start monitoring threads
         monitor_thread = threading.Thread(target=self.pixel_monitor.monitor, daemon=True)
@@ -492,6 +737,13 @@ class MonitoringSystem:
         except Exception as e:
             logging.error(f"Unexpected error: {e}")
         finally:
+            self.config_store.stop()
+            self.ingest_queue.stop()
+            self.scheduler.stop()
+            self.llm_client.stop()
+            self.callback_executor.shutdown(wait=False)
+            if self.worker_pool:
+                self.worker_pool.stop()
             if self.bot:
                 self.bot.stop_polling()
 
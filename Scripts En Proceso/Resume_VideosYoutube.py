@@ -1,13 +1,17 @@
 import os
+import sys
 import asyncio
 import feedparser
 import yt_dlp
-import whisper
 import re
 import openai
 import requests
 from openai.error import APIError, RateLimitError, AuthenticationError
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ModulosScripts🧩'))
+from DescargaAudio import stream_audio
+from MotorTranscripcion import format_with_timestamps, transcribe_long
+
 # Función para hacer seguro el nombre del archivo
 def make_safe_filename(title):
     safe_title = re.sub(r'[^\w\s-]', '', title)
@@ -53,27 +57,20 @@ def download_audio(video_url, output_path, title):
 
 # Función para transcribir audio usando Whisper con marcas de tiempo
 def transcribe_audio(file_path):
-    print(f"Verificando existencia del archivo para transcripción: {file_path}")
-    if not os.path.exists(file_path):
-        print(f"Archivo no encontrado: {file_path}")
-        return ""
+    if isinstance(file_path, str):
+        print(f"Verificando existencia del archivo para transcripción: {file_path}")
+        if not os.path.exists(file_path):
+            print(f"Archivo no encontrado: {file_path}")
+            return ""
 
     try:
-        print("Cargando el modelo Whisper...")
-        model = whisper.load_model("base")
-        print("Modelo cargado. Iniciando transcripción con marcas de tiempo...")
-        result = model.transcribe(file_path, word_timestamps=True)
-
-        transcription_with_timestamps = []
-        for segment in result['segments']:
-            start_time = segment['start']
-            minutes, seconds = divmod(int(start_time), 60)
-            timestamp = f"{minutes:02}:{seconds:02}"
-            transcription_with_timestamps.append(f"[{timestamp}] {segment['text']}")
-
-        return "\n".join(transcription_with_timestamps)
+        # Los videos largos se cortan en silencios y se transcriben en paralelo; cada proceso
+        # conserva su modelo cargado para los siguientes videos
+        print("Iniciando transcripción con marcas de tiempo...")
+        result = transcribe_long(file_path, word_timestamps=True)
+        return format_with_timestamps(result)
     except Exception as e:
-        print(f"Error al transcribir el archivo {file_path}: {e}")
+        print(f"Error al transcribir el audio: {e}")
         return ""
 
 # Configuración de OpenAI
@@ -154,15 +151,22 @@ async def process_channel(channel_id, output_path, bot_token, chat_id):
         with open(transcriptions_done_path, 'a') as file:
             file.write(f"{video_url}\n")
 
-        mp3_path = download_audio(video_url, output_path, title)
-
-        if not os.path.exists(mp3_path):
-            print(f"No se pudo encontrar el archivo .mp3 para {title}")
-            continue
-
-        print(f"Archivo descargado: {mp3_path}")
-
-        transcription = transcribe_audio(mp3_path)
+        # El stream de audio se decodifica por tubería a PCM de 16 kHz, sin MP3 intermedio en disco
+        try:
+            audio, stats = stream_audio(video_url, {'cookiefile': 'C:/Users/54115/Documents/cookies.txt'},
+                                        ffmpeg='C:/ffmpeg/bin/ffmpeg')
+            print(stats.summary())
+            mp3_path = None
+        except Exception as e:
+            print(f"No se pudo leer el stream de audio de {title}, se descarga el MP3: {e}")
+            mp3_path = download_audio(video_url, output_path, title)
+            if not os.path.exists(mp3_path):
+                print(f"No se pudo encontrar el archivo .mp3 para {title}")
+                continue
+            print(f"Archivo descargado: {mp3_path}")
+            audio = mp3_path
+
+        transcription = transcribe_audio(audio)
         if transcription:
             print(f"Transcripción completada para {title}:\n{transcription}\n")
 
@@ -184,8 +188,9 @@ async def process_channel(channel_id, output_path, bot_token, chat_id):
                 await send_telegram_message(bot_token, chat_id, safe_title, resumen_estructurado)
 
                 # Eliminar archivo de audio después de enviar el resumen
-                os.remove(mp3_path)
-                print(f"Archivo de audio eliminado: {mp3_path}")
+                if mp3_path:
+                    os.remove(mp3_path)
+                    print(f"Archivo de audio eliminado: {mp3_path}")
 
             except (APIError, RateLimitError, AuthenticationError) as e:
                 print(f"Error al obtener el resumen para {title}: {e}")
@@ -0,0 +1,46 @@
+import os
+import sys
+import asyncio
+import threading
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES_DIR = os.path.join(ROOT_DIR, 'ModulosScripts🧩')
+sys.path.insert(0, MODULES_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+
+@pytest.fixture
+def echo_server():
+    """
+    /chat/completions local que responde "eco: <último mensaje>" tras la demora que el test
+    asigne a ese texto en delays; corre en su propio event loop. Devuelve (base_url, delays).
+    """
+    from aiohttp import web
+
+    delays = {}
+
+    async def chat_completions(request):
+        payload = await request.json()
+        content = payload['messages'][-1]['content']
+        await asyncio.sleep(delays.get(content, 0))
+        return web.json_response({"choices": [{"message": {"role": "assistant", "content": f"eco: {content}"}}]})
+
+    async def start():
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", chat_completions)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return runner, runner.addresses[0][1]
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    runner, port = asyncio.run_coroutine_threadsafe(start(), loop).result(5)
+    yield f"http://127.0.0.1:{port}/v1", delays
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
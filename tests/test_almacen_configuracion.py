@@ -0,0 +1,140 @@
+import os
+import json
+
+import pytest
+
+from AlmacenConfiguracion import ConfigStore, WatchedFile
+
+
+class CountingParser:
+    def __init__(self, parse=str.strip):
+        self.parse = parse
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return self.parse(text)
+
+
+def write(path, text: str, mtime_ns: int = None):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_reads_once_while_signature_is_unchanged(tmp_path):
+    path = str(tmp_path / 'prompt.txt')
+    write(path, "uno", 1_000_000_000)
+    parser = CountingParser()
+    watched = WatchedFile(path, parser)
+
+    assert watched.get() == "uno"
+    assert watched.get() == "uno"
+    assert not watched.refresh()
+    assert parser.calls == 1
+
+
+def test_reloads_when_mtime_changes(tmp_path):
+    path = str(tmp_path / 'prompt.txt')
+    write(path, "uno", 1_000_000_000)
+    watched = WatchedFile(path, str.strip)
+    watched.get()
+
+    write(path, "dos", 2_000_000_000)
+    assert watched.refresh()
+    assert watched.value == "dos"
+
+
+def test_reloads_when_size_changes_with_same_mtime(tmp_path):
+    path = str(tmp_path / 'prompt.txt')
+    write(path, "uno", 1_000_000_000)
+    watched = WatchedFile(path, str.strip)
+    watched.get()
+
+    write(path, "uno más largo", 1_000_000_000)
+    assert watched.get() == "uno más largo"
+
+
+def test_reloads_when_file_is_replaced(tmp_path):
+    path = str(tmp_path / 'prompt.txt')
+    write(path, "uno", 1_000_000_000)
+    watched = WatchedFile(path, str.strip)
+    watched.get()
+
+    # Editores que guardan con un archivo nuevo y os.replace: mismo mtime y tamaño, otro inode
+    replacement = str(tmp_path / 'prompt.txt.nuevo')
+    write(replacement, "dos", 1_000_000_000)
+    keep_alive = open(path)  # el inode viejo no se recicla mientras siga abierto
+    try:
+        os.replace(replacement, path)
+        assert watched.refresh()
+        assert watched.value == "dos"
+    finally:
+        keep_alive.close()
+
+
+def test_same_signature_is_not_reread(tmp_path):
+    path = str(tmp_path / 'prompt.txt')
+    write(path, "uno", 1_000_000_000)
+    watched = WatchedFile(path, str.strip)
+    watched.get()
+
+    # Mismo inode, tamaño y mtime: la firma no cambió y no se relee
+    write(path, "dos", 1_000_000_000)
+    assert not watched.refresh()
+    assert watched.value == "uno"
+
+
+def test_invalid_edit_is_reported_once(tmp_path):
+    path = str(tmp_path / 'config.json')
+    write(path, '{"a": 1}', 1_000_000_000)
+    watched = WatchedFile(path, json.loads)
+    watched.get()
+
+    write(path, '{"a": ', 2_000_000_000)
+    with pytest.raises(ValueError):
+        watched.refresh()
+    assert not watched.refresh()
+    assert watched.value == {"a": 1}
+
+    write(path, '{"a": 2}', 3_000_000_000)
+    assert watched.refresh() and watched.value == {"a": 2}
+
+
+@pytest.fixture
+def config_files(tmp_path):
+    prompt = tmp_path / 'prompt.txt'
+    write(str(prompt), "Prompt uno\n", 1_000_000_000)
+    config = tmp_path / 'config.json'
+    write(str(config), json.dumps({"RUTA_PROMPT": str(prompt), "valor": 1}), 1_000_000_000)
+    return str(config), str(prompt)
+
+
+def test_listeners_fire_only_on_config_change(config_files, tmp_path):
+    config_path, prompt_path = config_files
+    store = ConfigStore(config_path)
+    changes = []
+    store.on_change(changes.append)
+
+    store.check()
+    assert changes == []
+    write(prompt_path, "Prompt dos\n", 2_000_000_000)
+    store.check()
+    assert changes == [] and store.prompt() == "Prompt dos"
+
+    write(config_path, json.dumps({"RUTA_PROMPT": prompt_path, "valor": 2}), 2_000_000_000)
+    store.check()
+    assert [change["valor"] for change in changes] == [2]
+    assert store.config["valor"] == 2
+
+
+def test_prompt_path_change_switches_prompt_file(config_files, tmp_path):
+    config_path, _ = config_files
+    store = ConfigStore(config_path)
+    other = str(tmp_path / 'otro_prompt.txt')
+    write(other, "Otro prompt", 1_000_000_000)
+
+    write(config_path, json.dumps({"RUTA_PROMPT": other}), 2_000_000_000)
+    store.check()
+    assert store.prompt() == "Otro prompt"
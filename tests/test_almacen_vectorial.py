@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+import pytest
+
+from AlmacenVectorial import LocalVectorStore, normalized
+
+
+def clustered(rows: int = 3000, dim: int = 32, clusters: int = 40, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return (centers[rng.integers(0, clusters, rows)] + rng.normal(scale=0.5, size=(rows, dim))).astype(np.float32)
+
+
+def fill(store: LocalVectorStore, vectors: np.ndarray, prefix: str = "c") -> list:
+    ids = [f"{prefix}{i}" for i in range(len(vectors))]
+    store.upsert(ids, vectors, [f"texto {i}" for i in ids], [{'n': i} for i in range(len(ids))])
+    return ids
+
+
+def recall(store: LocalVectorStore, vectors: np.ndarray, queries: int = 50, k: int = 10) -> float:
+    exact = normalized(vectors)
+    rng = np.random.default_rng(1)
+    found = []
+    for query in normalized(vectors[rng.integers(0, len(vectors), queries)] + rng.normal(scale=0.3, size=(queries, vectors.shape[1]))):
+        truth = set(np.argsort(-(exact @ query))[:k].tolist())
+        found.append(len(truth & set(store.search_vectors(query, k)[0].tolist())) / k)
+    return float(np.mean(found))
+
+
+def test_upsert_delete_reupsert_survives_reopen(tmp_path):
+    vectors = clustered(200)
+    store = LocalVectorStore(str(tmp_path), index='ivf')
+    ids = fill(store, vectors)
+    store.delete(ids[:50])
+    # Reinsertar un ID borrado y reemplazar uno vivo
+    store.upsert([ids[0], ids[100]], vectors[[0, 100]], ["de vuelta", "reemplazo"], [{}, {}])
+    store.persist()
+
+    reopened = LocalVectorStore(str(tmp_path), index='ivf')
+    assert reopened.count() == store.count() == 151
+    assert set(reopened.id_to_row) == {ids[0]} | set(ids[50:])
+    row = reopened.id_to_row[ids[100]]
+    assert reopened.read_record(row)['document'] == "reemplazo"
+    assert reopened.search_vectors(vectors[100], 1)[0].tolist() == [row]
+
+
+def test_unpersisted_delete_is_invisible_after_reopen(tmp_path):
+    vectors = clustered(100)
+    store = LocalVectorStore(str(tmp_path))
+    ids = fill(store, vectors)
+    store.persist()
+    store.delete(ids[:10])
+
+    # Un corte antes de persist: conteo y búsqueda coinciden en que el borrado no ocurrió
+    reopened = LocalVectorStore(str(tmp_path))
+    assert reopened.count() == 100
+    assert reopened.search_vectors(vectors[0], 1)[0].tolist() == [reopened.id_to_row[ids[0]]]
+
+
+def test_growth_keeps_rows_and_removes_old_files(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    fill(store, clustered(100), "a")
+    store.persist()
+    first_capacity = store.capacity
+    fill(store, clustered(1500, seed=1), "b")
+    store.persist()
+
+    assert store.capacity > first_capacity
+    assert not os.path.exists(os.path.join(str(tmp_path), f'vectors-{first_capacity}.int8'))
+    assert LocalVectorStore(str(tmp_path)).count() == 1600
+
+
+@pytest.mark.parametrize("quantization", ["int8", "float16"])
+def test_quantization_round_trip(tmp_path, quantization):
+    vectors = clustered(300)
+    store = LocalVectorStore(str(tmp_path), quantization=quantization)
+    fill(store, vectors)
+    store.persist()
+
+    reopened = LocalVectorStore(str(tmp_path), quantization=quantization)
+    decoded = reopened.decode(np.arange(300))
+    cosine = np.sum(decoded * normalized(vectors), axis=1) / np.linalg.norm(decoded, axis=1)
+    assert cosine.min() > (0.999 if quantization == 'int8' else 0.99999)
+    rows, scores = reopened.search_vectors(vectors[7], 1)
+    assert rows.tolist() == [7] and scores[0] == pytest.approx(1.0, abs=1e-2)
+
+
+@pytest.mark.parametrize("quantization", ["int8", "float16"])
+def test_ivf_recall_against_exact_search(tmp_path, quantization):
+    vectors = clustered()
+    store = LocalVectorStore(str(tmp_path), index='ivf', quantization=quantization)
+    fill(store, vectors)
+    store.persist()
+    assert store.centroids is not None
+    assert recall(store, vectors) >= 0.9
+
+
+def test_hnsw_recall_against_exact_search(tmp_path):
+    pytest.importorskip("hnswlib")
+    vectors = clustered()
+    store = LocalVectorStore(str(tmp_path), index='hnsw')
+    ids = fill(store, vectors)
+    store.persist()
+    assert recall(store, vectors) >= 0.9
+
+    # Los borrados no vuelven en los resultados aunque sigan en el grafo
+    store.delete(ids[:500])
+    store.persist()
+    reopened = LocalVectorStore(str(tmp_path), index='hnsw')
+    assert not set(reopened.search_vectors(vectors[0], 50)[0].tolist()) & set(range(500))
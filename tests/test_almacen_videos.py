@@ -0,0 +1,68 @@
+import pytest
+
+from AlmacenVideos import VideoStore, canonical_url, canonical_video_id, prompt_hash
+
+VIDEO = "dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("url", [
+    f"https://www.youtube.com/watch?v={VIDEO}",
+    f"https://www.youtube.com/watch?v={VIDEO}&t=30s",
+    f"https://www.youtube.com/watch?feature=share&v={VIDEO}",
+    f"https://www.youtube.com/watch?v={VIDEO}&list=PL590L5WQmH8fJ54F369BLDSqIwcs-TCfs",
+    f"https://youtube.com/watch?v={VIDEO}",
+    f"https://m.youtube.com/watch?v={VIDEO}",
+    f"https://music.youtube.com/watch?v={VIDEO}&si=abc",
+    f"http://youtu.be/{VIDEO}",
+    f"https://youtu.be/{VIDEO}?t=30",
+    f"https://www.youtube.com/shorts/{VIDEO}",
+    f"https://www.youtube.com/embed/{VIDEO}?autoplay=1",
+    f"https://www.youtube-nocookie.com/embed/{VIDEO}",
+    f"https://www.youtube.com/live/{VIDEO}?feature=share",
+    f"  www.youtube.com/watch?v={VIDEO}  ",
+    f"youtu.be/{VIDEO}",
+])
+def test_video_url_variants_share_one_id(url):
+    assert canonical_video_id(url) == VIDEO
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/playlist?list=PL590L5WQmH8fJ54F369BLDSqIwcs-TCfs",
+    "https://www.youtube.com/@canal/videos",
+    "https://www.youtube.com/watch",
+    "https://www.youtube.com/watch?v=corto",
+    f"https://www.youtube.com/watch?v={VIDEO}extra",
+    f"https://notyoutube.com/watch?v={VIDEO}",
+    f"https://youtube.com.evil.example/watch?v={VIDEO}",
+    f"https://vimeo.com/{VIDEO}",
+    "https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M",
+    "https://youtu.be/",
+])
+def test_rejects_playlists_and_foreign_hosts(url):
+    assert canonical_video_id(url) is None
+
+
+def test_canonical_url_round_trip():
+    assert canonical_video_id(canonical_url(VIDEO)) == VIDEO
+
+
+def test_summaries_keyed_by_prompt_hash(tmp_path):
+    store = VideoStore(str(tmp_path / "videos.sqlite3"))
+    store.put_transcript(VIDEO, canonical_url(VIDEO), {
+        'text': "hola mundo", 'language': "es", 'duration': 2.0,
+        'segments': [{'start': 0, 'end': 2, 'text': "hola mundo", 'tokens': [1, 2]}],
+    })
+    short, detailed = prompt_hash("Resumí en 3 puntos"), prompt_hash("Resumí en detalle")
+    store.put_summary(VIDEO, short, "resumen corto")
+
+    assert store.get_summary(VIDEO, short) == "resumen corto"
+    # Otro prompt u otro modelo es otro resumen, sobre la misma transcripción
+    assert store.get_summary(VIDEO, detailed) is None
+    assert prompt_hash("Resumí en 3 puntos", "gpt-4o") != short
+    assert store.get_transcript(VIDEO)['segments'] == [{'start': 0.0, 'end': 2.0, 'text': "hola mundo"}]
+    assert store.get_transcript("otroVideo01") is None
+    store.close()
+
+    reopened = VideoStore(str(tmp_path / "videos.sqlite3"))
+    assert reopened.get_summary(VIDEO, short) == "resumen corto"
+    reopened.close()
@@ -0,0 +1,72 @@
+import itertools
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from CacheEmbeddings import EmbeddingCache, text_key
+
+
+@pytest.fixture
+def clock():
+    """time.time() que avanza un segundo por llamada: el orden LRU no depende de la resolución del reloj"""
+    ticks = itertools.count(1000)
+    with mock.patch('CacheEmbeddings.time.time', side_effect=lambda: float(next(ticks))):
+        yield
+
+
+def vector(seed: int, dim: int = 8) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=dim).astype(np.float32)
+
+
+def test_embed_computes_only_missing_texts(tmp_path):
+    cache = EmbeddingCache("modelo/prueba", str(tmp_path), capacity=10)
+    computed = []
+
+    def compute(texts):
+        computed.extend(texts)
+        return [vector(len(text)) for text in texts]
+
+    first = cache.embed(["uno", "dos", "uno"], compute)
+    second = cache.embed(["dos", "tres"], compute)
+    assert computed == ["uno", "dos", "tres"]
+    assert first[0] == first[2] and first[1] == second[0]
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_lru_evicts_least_recently_used(tmp_path, clock):
+    cache = EmbeddingCache("modelo", str(tmp_path), capacity=3)
+    keys = [text_key(f"texto {i}") for i in range(4)]
+    for i in range(3):
+        cache.put_many([keys[i]], vector(i)[None])
+    # Leer el primero lo vuelve reciente: el desalojado es el segundo
+    assert cache.get_many([keys[0]])[0] is not None
+    cache.put_many([keys[3]], vector(3)[None])
+
+    found = cache.get_many(keys)
+    assert [v is not None for v in found] == [True, False, True, True]
+    np.testing.assert_array_equal(found[3], vector(3))
+
+
+def test_second_instance_reloads_from_disk(tmp_path):
+    writer = EmbeddingCache("modelo", str(tmp_path), capacity=5)
+    writer.put_many([text_key("persistido")], vector(1)[None])
+
+    reader = EmbeddingCache("modelo", str(tmp_path), capacity=5)
+    np.testing.assert_array_equal(reader.get_many([text_key("persistido")])[0], vector(1))
+
+
+def test_generation_bump_invalidates_other_index(tmp_path, clock):
+    first = EmbeddingCache("modelo", str(tmp_path), capacity=2)
+    second = EmbeddingCache("modelo", str(tmp_path), capacity=2)
+    old = text_key("viejo")
+    first.put_many([old], vector(1)[None])
+    assert second.get_many([old])[0] is not None
+    generation = int(first.generation[0])
+
+    # El segundo proceso llena la caché y desaloja la entrada que el primero tiene en su índice
+    second.put_many([text_key("a"), text_key("b")], np.stack([vector(2), vector(3)]))
+    assert int(first.generation[0]) == generation + 1
+    assert first.get_many([old]) == [None]
+    assert first.known_generation == generation + 1
+    np.testing.assert_array_equal(first.get_many([text_key("b")])[0], vector(3))
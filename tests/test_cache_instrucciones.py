@@ -0,0 +1,77 @@
+from unittest import mock
+
+import pytest
+
+from CacheInstrucciones import InstructionCache, normalize_text
+
+PROMPT = "Clasifica el mensaje"
+
+
+@pytest.fixture
+def clock():
+    """Reloj manual para time.time() de la caché"""
+    now = [1_000_000.0]
+    with mock.patch('CacheInstrucciones.time.time', side_effect=lambda: now[0]):
+        yield now
+
+
+def test_normalized_text_shares_an_entry(tmp_path):
+    cache = InstructionCache(str(tmp_path / 'cache.json'))
+    cache.put("¿Llamá a Mamá?", PROMPT, (), "LLAMAR")
+    assert normalize_text("¿Llamá a Mamá?") == "llama a mama"
+    assert cache.get("llama  a MAMA", PROMPT) == "LLAMAR"
+    # Otro prompt u otro contexto es otra clave
+    assert cache.get("llama a mama", "Otro prompt") is None
+    assert cache.get("llama a mama", PROMPT, ("mensaje previo", "RespuestaFinal")) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = InstructionCache(str(tmp_path / 'cache.json'), ttl=60)
+    cache.put("hola", PROMPT, (), "SALUDAR")
+    clock[0] += 59
+    assert cache.get("hola", PROMPT) == "SALUDAR"
+    clock[0] += 1
+    assert cache.get("hola", PROMPT) is None
+    assert not cache.entries
+
+
+def test_lru_evicts_least_recently_read(tmp_path):
+    cache = InstructionCache(str(tmp_path / 'cache.json'), max_entries=2)
+    cache.put("uno", PROMPT, (), "A")
+    cache.put("dos", PROMPT, (), "B")
+    cache.get("uno", PROMPT)
+    cache.put("tres", PROMPT, (), "C")
+    assert [cache.get(text, PROMPT) for text in ("uno", "dos", "tres")] == ["A", None, "C"]
+
+
+def test_reload_from_disk_drops_expired_entries(tmp_path, clock):
+    path = str(tmp_path / 'sub' / 'cache.json')
+    cache = InstructionCache(path, ttl=100)
+    cache.put("viejo", PROMPT, (), "A")
+    clock[0] += 50
+    cache.put("nuevo", PROMPT, (), "B")
+    clock[0] += 60
+
+    reloaded = InstructionCache(path, ttl=100)
+    assert reloaded.get("viejo", PROMPT) is None
+    assert reloaded.get("nuevo", PROMPT) == "B"
+    assert len(reloaded.entries) == 1
+
+
+def test_reload_respects_max_entries(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = InstructionCache(path)
+    for i in range(5):
+        cache.put(f"texto {i}", PROMPT, (), str(i))
+    reloaded = InstructionCache(path, max_entries=2)
+    assert [reloaded.get(f"texto {i}", PROMPT) for i in range(5)] == [None, None, None, "3", "4"]
+
+
+def test_corrupt_file_starts_empty(tmp_path):
+    path = tmp_path / 'cache.json'
+    path.write_text("{no es json", encoding='utf-8')
+    cache = InstructionCache(str(path))
+    assert cache.get("hola", PROMPT) is None
+    cache.put("hola", PROMPT, (), "SALUDAR")
+    assert InstructionCache(str(path)).get("hola", PROMPT) == "SALUDAR"
@@ -0,0 +1,59 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from CapturaPantalla import CaptureBackend, PixelSampler, SyntheticCaptureBackend, bounding_region, create_backend
+
+COORDINATES = {'boton': (10, 5), 'barra': (3, 20), 'icono': (40, 7)}
+
+
+def make_frame() -> np.ndarray:
+    # Cada píxel guarda su propia posición: color = y * 1000 + x
+    ys, xs = np.mgrid[0:50, 0:60]
+    return (ys * 1000 + xs).astype(np.uint32)
+
+
+def test_bounding_region():
+    assert bounding_region(COORDINATES.values()) == (3, 5, 41, 21)
+
+
+def test_sampler_reads_every_pixel_from_one_grab():
+    frame = make_frame()
+    backend = mock.Mock(spec=CaptureBackend)
+    backend.grab.side_effect = SyntheticCaptureBackend(lambda: frame).grab
+
+    colors = PixelSampler(backend, COORDINATES).sample()
+
+    backend.grab.assert_called_once_with((3, 5, 41, 21))
+    assert colors == {name: y * 1000 + x for name, (x, y) in COORDINATES.items()}
+
+
+def test_sampler_reports_none_when_capture_fails():
+    backend = mock.Mock(spec=CaptureBackend)
+    backend.grab.side_effect = OSError("BitBlt falló")
+    assert PixelSampler(backend, COORDINATES).sample() == {name: None for name in COORDINATES}
+
+
+def test_sampler_without_pixels_does_not_capture():
+    backend = mock.Mock(spec=CaptureBackend)
+    assert PixelSampler(backend, {}).sample() == {}
+    backend.grab.assert_not_called()
+
+
+def test_backend_must_implement_grab():
+    with pytest.raises(TypeError):
+        CaptureBackend()
+
+    class Incomplete(CaptureBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_synthetic_backend_needs_frame_source():
+    with pytest.raises(ValueError):
+        create_backend("sintetico")
+    with pytest.raises(ValueError):
+        create_backend("desconocido")
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+pytest.importorskip("langchain_community")
+pytest.importorskip("langchain")
+
+from CargaDocumentos import StreamingSplitter
+
+CHUNK_SIZE = 200
+CHUNK_OVERLAP = 40
+
+
+def sample_text(words: int = 3000) -> str:
+    rng = random.Random(0)
+    vocabulary = ["alfa", "beta", "gamma", "delta", "epsilon", "zeta", "theta", "lambda", "sigma", "omega"]
+    parts = []
+    for i in range(words):
+        parts.append(f"{rng.choice(vocabulary)}{i}")
+        parts.append(rng.choice([" "] * 12 + ["\n", "\n\n"]))
+    return "".join(parts)
+
+
+def split(text: str, block_size: int) -> list:
+    splitter = StreamingSplitter(CHUNK_SIZE, CHUNK_OVERLAP)
+    chunks = []
+    for start in range(0, len(text), block_size):
+        chunks.extend(chunk for chunk, _ in splitter.feed(text[start:start + block_size], {'source': 'prueba'}))
+    chunks.extend(chunk for chunk, _ in splitter.finish())
+    return chunks
+
+
+def test_chunks_do_not_depend_on_block_size():
+    text = sample_text()
+    reference = split(text, len(text))
+    for block_size in (1, 7, 64, 199, 1000, 4096):
+        assert split(text, block_size) == reference
+
+
+def test_chunks_overlap_without_gaps():
+    text = sample_text()
+    chunks = split(text, 97)
+
+    assert all(len(chunk) <= CHUNK_SIZE for chunk in chunks)
+    # Cada fragmento aparece en el texto a partir de donde empieza el solapamiento con el anterior
+    position = 0
+    previous_end = 0
+    for i, chunk in enumerate(chunks):
+        start = text.index(chunk, position)
+        if i:
+            assert start < previous_end, "hueco entre fragmentos"
+            assert previous_end - start <= CHUNK_OVERLAP + 20
+        position, previous_end = start + 1, start + len(chunk)
+    assert text.startswith(chunks[0])
+    assert text.rstrip().endswith(chunks[-1])
+
+
+def test_metadata_follows_the_piece_each_chunk_starts_in():
+    splitter = StreamingSplitter(CHUNK_SIZE, CHUNK_OVERLAP)
+    pages = [" ".join(f"pagina{page}palabra{i}" for i in range(60)) for page in range(3)]
+    results = []
+    for page, text in enumerate(pages):
+        results.extend(splitter.feed(text, {'page': page}, boundary=True))
+    results.extend(splitter.finish())
+
+    for chunk, metadata in results:
+        assert f"pagina{metadata['page']}palabra" in chunk
+    assert [metadata['page'] for _, metadata in results] == sorted(metadata['page'] for _, metadata in results)
+    assert {metadata['page'] for _, metadata in results} == {0, 1, 2}
@@ -0,0 +1,44 @@
+import time
+
+from ClienteLLM import AsyncChatClient
+
+
+def test_concurrent_submits_keep_their_results(echo_server):
+    base_url, delays = echo_server
+    texts = [f"mensaje {i}" for i in range(4)]
+    # El primero es el más lento: las respuestas llegan en orden inverso al de envío
+    for i, text in enumerate(texts):
+        delays[text] = 0.3 - 0.1 * i
+    client = AsyncChatClient("test", "mock", base_url=base_url, max_concurrency=4).start()
+    try:
+        finished = []
+        started = time.perf_counter()
+        futures = [client.submit([{"role": "user", "content": text}]) for text in texts]
+        for text, future in zip(texts, futures):
+            future.add_done_callback(lambda f, text=text: finished.append(text))
+        results = [future.result(5) for future in futures]
+        elapsed = time.perf_counter() - started
+    finally:
+        client.stop()
+
+    assert results == [f"eco: {text}" for text in texts]
+    assert finished == texts[::-1]
+    # En paralelo tarda lo del más lento, no la suma de las demoras
+    assert elapsed < sum(delays.values())
+
+
+def test_concurrency_limit_serializes(echo_server):
+    base_url, delays = echo_server
+    texts = ["a", "b", "c"]
+    for text in texts:
+        delays[text] = 0.1
+    client = AsyncChatClient("test", "mock", base_url=base_url, max_concurrency=1).start()
+    try:
+        started = time.perf_counter()
+        results = [future.result(5) for future in [client.submit([{"role": "user", "content": t}]) for t in texts]]
+        elapsed = time.perf_counter() - started
+    finally:
+        client.stop()
+
+    assert results == ["eco: a", "eco: b", "eco: c"]
+    assert elapsed >= 0.3
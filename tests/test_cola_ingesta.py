@@ -0,0 +1,112 @@
+import time
+import threading
+
+import pytest
+
+from ColaIngesta import NO_TEXT, IngestQueue, is_ingestible
+
+
+class Recorder:
+    def __init__(self, results=None, error=None):
+        self.batches = []
+        self.results = results or {}
+        self.error = error
+
+    def __call__(self, paths):
+        self.batches.append(list(paths))
+        if self.error:
+            raise self.error
+        return {path: self.results.get(path, 1) for path in paths}
+
+
+@pytest.fixture
+def ingest_queue():
+    created = []
+
+    def create(ingest, **options):
+        instance = IngestQueue(ingest, **options)
+        instance.start()
+        created.append(instance)
+        return instance
+
+    yield create
+    for instance in created:
+        instance.stop()
+        instance.thread.join(2)
+
+
+def collect(count: int):
+    """Callback que junta (ruta, resultado) y avisa cuando llegaron count respuestas"""
+    received = []
+    done = threading.Event()
+
+    def on_done(path, result, seconds):
+        received.append((path, result))
+        if len(received) == count:
+            done.set()
+
+    return received, done, on_done
+
+
+def test_burst_is_ingested_in_one_batch(ingest_queue):
+    ingest = Recorder(results={'b.pdf': NO_TEXT})
+    instance = ingest_queue(ingest, debounce=0.2)
+    received, done, on_done = collect(4)
+
+    for path in ("a.txt", "b.pdf", "a.txt", "c.md"):
+        instance.enqueue(path, on_done)
+        time.sleep(0.05)
+    assert done.wait(3)
+
+    # La ruta repetida se vectoriza una vez y ambos pedidos reciben la respuesta
+    assert ingest.batches == [["a.txt", "b.pdf", "c.md"]]
+    assert sorted(received) == [("a.txt", 1), ("a.txt", 1), ("b.pdf", NO_TEXT), ("c.md", 1)]
+
+
+def test_pause_longer_than_debounce_starts_a_new_batch(ingest_queue):
+    ingest = Recorder()
+    instance = ingest_queue(ingest, debounce=0.1)
+    received, done, on_done = collect(2)
+
+    instance.enqueue("uno.txt", on_done)
+    time.sleep(0.4)
+    instance.enqueue("dos.txt", on_done)
+    assert done.wait(3)
+    assert ingest.batches == [["uno.txt"], ["dos.txt"]]
+
+
+def test_max_batch_splits_long_bursts(ingest_queue):
+    ingest = Recorder()
+    instance = ingest_queue(ingest, debounce=0.2, max_batch=2)
+    received, done, on_done = collect(5)
+    for i in range(5):
+        instance.enqueue(f"{i}.txt", on_done)
+    assert done.wait(3)
+    assert [len(batch) for batch in ingest.batches] == [2, 2, 1]
+
+
+def test_failed_batch_reports_none_to_every_request(ingest_queue):
+    instance = ingest_queue(Recorder(error=RuntimeError("Chroma bloqueado")), debounce=0.05)
+    received, done, on_done = collect(2)
+    instance.enqueue("a.txt", on_done)
+    instance.enqueue("b.txt", on_done)
+    assert done.wait(3)
+    assert sorted(received) == [("a.txt", None), ("b.txt", None)]
+
+
+def test_stop_during_debounce_ends_the_consumer():
+    ingest = Recorder()
+    instance = IngestQueue(ingest, debounce=5)
+    instance.start()
+    instance.enqueue("a.txt")
+    instance.stop()
+    instance.thread.join(2)
+    assert not instance.thread.is_alive()
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("notas.TXT", True), ("informe.pdf", True), ("pagina.htm", True), ("datos.json", True),
+    ("foto.jpg", False), ("archivo", False), ("comprimido.zip", False),
+])
+def test_is_ingestible(path, expected):
+    assert is_ingestible(path) == expected
@@ -0,0 +1,71 @@
+from dataclasses import dataclass, field
+
+import pytest
+
+from EmpaquetadorContexto import overlap_length, pack_context
+
+
+@dataclass
+class Fragment:
+    page_content: str
+    metadata: dict = field(default_factory=dict)
+
+
+def words(text: str) -> int:
+    return len(text.split())
+
+
+def cut_words(text: str, tokens: int) -> str:
+    return " ".join(text.split()[:tokens])
+
+
+def sentence(topic: str, count: int = 50) -> str:
+    return " ".join(f"{topic}{i}" for i in range(count))
+
+
+def test_overlapping_neighbours_are_merged_once():
+    text = sentence("palabra", 120)
+    first, second = text[:500], text[420:]
+    assert overlap_length(first, second) == 80
+
+    packed = pack_context([(Fragment(first, {'source': 'a/doc.txt'}), 0.1),
+                           (Fragment(second, {'source': 'a/doc.txt'}), 0.2)],
+                          budget_tokens=1000, count_tokens=words, truncate=cut_words)
+    assert packed == f"Fragmento 1 (doc.txt):\n{text}\n"
+
+
+def test_same_text_from_other_source_is_not_merged():
+    text = sentence("palabra", 120)
+    packed = pack_context([(Fragment(text[:500], {'source': 'uno.txt'}), 0.1),
+                           (Fragment(text[420:], {'source': 'dos.txt'}), 0.2)],
+                          budget_tokens=1000, count_tokens=words, truncate=cut_words)
+    assert "Fragmento 2 (dos.txt)" in packed
+
+
+def test_mmr_skips_near_duplicate_for_a_different_passage():
+    top = sentence("clima")
+    near_duplicate = top.replace("clima49", "otra")
+    different = sentence("mercado")
+    packed = pack_context([(Fragment(top), 0.1), (Fragment(near_duplicate), 0.2), (Fragment(different), 0.3)],
+                          budget_tokens=120, count_tokens=words, truncate=cut_words)
+    assert "otra" not in packed
+    assert packed.index("clima0") < packed.index("mercado0")
+
+
+def test_budget_truncates_last_passage():
+    fragments = [(Fragment(sentence(topic)), 0.0) for topic in ("a", "b", "c")]
+    packed = pack_context(fragments, budget_tokens=145, diversity=0.0, count_tokens=words, truncate=cut_words)
+    bodies = [block.split(":\n", 1)[1] for block in packed.strip().split("\n\n")]
+    assert [words(body) for body in bodies] == [50, 50, 45]
+    # Lo que queda por debajo de MIN_PASSAGE_TOKENS no se llena con un recorte
+    packed = pack_context(fragments, budget_tokens=120, diversity=0.0, count_tokens=words, truncate=cut_words)
+    assert packed.count("Fragmento") == 2
+
+
+def test_tiktoken_budget():
+    tiktoken = pytest.importorskip("tiktoken")
+    encoding = tiktoken.get_encoding("o200k_base")
+    fragments = [(Fragment(sentence(topic, 200)), 0.0) for topic in ("norte", "sur", "este")]
+    packed = pack_context(fragments, budget_tokens=300)
+    bodies = [block.split(":\n", 1)[1] for block in packed.strip().split("\n\n")]
+    assert sum(len(encoding.encode_ordinary(body)) for body in bodies) <= 300 + len(bodies)
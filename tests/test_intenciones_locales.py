@@ -0,0 +1,29 @@
+import pytest
+
+from AlmacenConfiguracion import load_config_section
+from IntencionesLocales import NEAR_MISSES, IntentMatcher, near_miss_scores
+
+
+def test_command_name_rules():
+    matcher = IntentMatcher(commands=["PEGAR_Y_COPIAR", "LLAMAR"])
+    assert matcher.match("pegar y copiar").instruction == "PEGAR_Y_COPIAR"
+    assert matcher.match("Llamar ya").confidence == 0.9
+    assert matcher.match("cual es la capital de francia") is None
+
+
+def test_reload_keeps_counters():
+    matcher = IntentMatcher(commands=["LLAMAR"])
+    matcher.match("llamar")
+    matcher.apply(matcher.prepare(["ESCRIBIR"]))
+    assert matcher.match("llamar") is None
+    assert matcher.match("escribir").instruction == "ESCRIBIR"
+    assert matcher.counts["reglas"] == 2
+
+
+def test_near_misses_stay_below_threshold():
+    pytest.importorskip("langchain_huggingface")
+    settings = load_config_section('INTENCIONES')
+    threshold = settings.get('umbral', 0.8)
+    results = near_miss_scores(settings.get('ejemplos', {}), settings.get('modelo', 'all-MiniLM-L6-v2'))
+    fired = [(phrase, r.instruction, r.confidence) for phrase, r in zip(NEAR_MISSES, results) if r.confidence >= threshold]
+    assert not fired
@@ -0,0 +1,117 @@
+import queue
+import threading
+from unittest import mock
+
+import pytest
+
+from MonitorPortapapeles import (MAX_OWN_WRITES, ClipboardBackend, ClipboardWatcher, FakeClipboard, PollingBackend,
+                                 content_hash, create_clipboard_backend, is_own_write, mark_own_write)
+
+
+@pytest.fixture
+def watch(tmp_path):
+    """Arranca un ClipboardWatcher en su hilo; los contenidos reportados llegan a la cola devuelta"""
+    started = []
+
+    def start(backend):
+        received = queue.Queue()
+        watcher = ClipboardWatcher(backend, received.put, own_writes_path=str(tmp_path / 'propios.txt'))
+        thread = threading.Thread(target=watcher.monitor, daemon=True)
+        thread.start()
+        started.append((watcher, thread))
+        return watcher, received
+
+    yield start
+    for watcher, thread in started:
+        watcher.stop()
+        thread.join(2)
+
+
+def drain(received: queue.Queue, wait: float = 0.3) -> list:
+    items = []
+    try:
+        while True:
+            items.append(received.get(timeout=wait))
+    except queue.Empty:
+        return items
+
+
+def test_reports_each_change_once(watch):
+    clipboard = FakeClipboard("inicial")
+    _, received = watch(clipboard)
+
+    clipboard.copy("uno")
+    assert received.get(timeout=2) == "uno"
+    # Volver a copiar lo mismo dispara el aviso pero no el callback
+    clipboard.copy("uno")
+    clipboard.copy("dos")
+    assert drain(received) == ["dos"]
+
+
+def test_initial_content_is_not_reported(watch):
+    clipboard = FakeClipboard("ya estaba")
+    _, received = watch(clipboard)
+    clipboard.copy("ya estaba")
+    assert drain(received) == []
+
+
+def test_read_errors_are_retried_on_next_change(watch):
+    notices = iter([True, True])
+    backend = mock.Mock(spec=ClipboardBackend)
+    backend.read.side_effect = ["inicial", OSError("portapapeles ocupado"), "nuevo"]
+    # Dos avisos y después nada: el segundo tiene que recuperar lo que el primero no pudo leer
+    backend.wait_for_change.side_effect = lambda timeout: next(notices, False)
+    _, received = watch(backend)
+
+    assert received.get(timeout=2) == "nuevo"
+    assert backend.report.call_args_list == [mock.call(True)]
+
+
+def test_own_writes_are_not_forwarded(watch, tmp_path):
+    clipboard = FakeClipboard("inicial")
+    watcher, received = watch(clipboard)
+
+    mark_own_write("respuesta ya entregada", watcher.own_writes_path)
+    clipboard.copy("respuesta ya entregada")
+    clipboard.copy("usuario")
+    assert drain(received) == ["usuario"]
+    # Volver al texto propio después de otro cambio tampoco se reenvía
+    clipboard.copy("respuesta ya entregada")
+    assert drain(received) == []
+
+
+def test_own_writes_keep_only_recent(tmp_path):
+    path = str(tmp_path / 'propios.txt')
+    for i in range(MAX_OWN_WRITES + 1):
+        mark_own_write(f"texto {i}", path)
+    assert not is_own_write(content_hash("texto 0"), path)
+    assert is_own_write(content_hash(f"texto {MAX_OWN_WRITES}"), path)
+    assert not is_own_write(content_hash("texto 0"), str(tmp_path / 'no_existe.txt'))
+
+
+def test_polling_reads_changes_and_backs_off(watch):
+    clipboard = FakeClipboard("inicial")
+    backend = PollingBackend(clipboard.paste, min_interval=0.01, max_interval=0.04)
+    _, received = watch(backend)
+
+    clipboard.copy("copiado")
+    assert received.get(timeout=2) == "copiado"
+    drain(received, 0.2)
+    assert backend.interval == 0.04
+    backend.report(True)
+    assert backend.interval == 0.01
+
+
+def test_create_backend_without_notifications():
+    assert isinstance(create_clipboard_backend({'backend': 'fake'}, read=str), FakeClipboard)
+    backend = create_clipboard_backend({'backend': 'polling', 'intervalo_minimo': 0.1}, read=str)
+    assert isinstance(backend, PollingBackend) and backend.min_interval == 0.1
+
+
+def test_backend_must_implement_read_and_wait():
+    class OnlyRead(ClipboardBackend):
+        def read(self) -> str:
+            return ""
+
+    with pytest.raises(TypeError):
+        OnlyRead()
@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+for dependency in ("keyboard", "telebot", "pyperclip", "psutil"):
+    pytest.importorskip(dependency)
+
+import Omni
+from CacheInstrucciones import InstructionCache
+from ClienteLLM import AsyncChatClient
+from IntencionesLocales import IntentMatcher
+
+
+class FakeConfigStore:
+    def prompt(self) -> str:
+        return "Clasifica el mensaje"
+
+
+@pytest.fixture
+def system(echo_server, tmp_path):
+    """MonitoringSystem sin Telegram, monitores ni scripts: solo lo que usa classify"""
+    base_url, _ = echo_server
+    system = Omni.MonitoringSystem.__new__(Omni.MonitoringSystem)
+    system.config = {'INTENCIONES': {'ventana_contexto': 120}}
+    system.config_store = FakeConfigStore()
+    system.message_context = {}
+    system.instruction_cache = InstructionCache(str(tmp_path / 'instrucciones.json'))
+    system.intent_matcher = IntentMatcher(commands=["LLAMAR"])
+    system.llm_client = AsyncChatClient("test", "mock", base_url=base_url).start()
+    system.callback_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="classified")
+    yield system
+    system.llm_client.stop()
+    system.callback_executor.shutdown()
+
+
+def test_fan_out_callbacks_get_their_own_result(system, echo_server):
+    _, delays = echo_server
+    texts = [f"mensaje {i}" for i in range(4)]
+    for i, text in enumerate(texts):
+        delays[text] = 0.3 - 0.1 * i
+    received = []
+    done = threading.Event()
+
+    def on_classified(future, text):
+        received.append((text, future.result(), threading.current_thread().name))
+        if len(received) == len(texts):
+            done.set()
+
+    for i, text in enumerate(texts):
+        system.when_done(system.classify(i, text, "Test"), on_classified, text)
+    assert done.wait(5)
+
+    # Cada callback recibe la respuesta de su mensaje aunque terminen en orden inverso
+    assert [text for text, _, _ in received] == texts[::-1]
+    assert all(result == f"eco: {text}" for text, result, _ in received)
+    # Los callbacks corren en el executor, nunca en el event loop del cliente
+    assert all(name.startswith("classified") for _, _, name in received)
+
+
+def test_local_intents_only_for_commands(system):
+    command = system.classify(1, "llamar", "Telegram Message", local_intents=True)
+    assert command.result(5) == "LLAMAR"
+    # El mismo texto desde el portapapeles va al LLM
+    clipboard = system.classify(1, "llamar", "Clipboard Update")
+    assert clipboard.result(5) == "eco: llamar"
@@ -0,0 +1,132 @@
+import time
+import threading
+
+import pytest
+
+from PlanificadorScripts import ScriptScheduler
+
+
+class BlockingRunner:
+    """run_script que espera a release() y registra la concurrencia máxima por tipo"""
+
+    def __init__(self):
+        self.released = threading.Event()
+        self.lock = threading.Lock()
+        self.running = {'ahk': 0, 'python': 0}
+        self.peak = {'ahk': 0, 'python': 0}
+        self.started = []
+
+    def __call__(self, script_path: str, context: str):
+        kind = 'python' if script_path.endswith('.py') else 'ahk'
+        with self.lock:
+            self.running[kind] += 1
+            self.peak[kind] = max(self.peak[kind], self.running[kind])
+            self.started.append(script_path)
+        self.released.wait(5)
+        with self.lock:
+            self.running[kind] -= 1
+
+    def release(self):
+        self.released.set()
+
+
+@pytest.fixture
+def scheduler():
+    created = []
+
+    def create(run_script, concurrency, max_queue=20):
+        instance = ScriptScheduler(run_script, concurrency, max_queue)
+        instance.start()
+        created.append(instance)
+        return instance
+
+    yield create
+    for instance in created:
+        instance.stop()
+
+
+def wait_until(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "la condición no se cumplió a tiempo"
+        time.sleep(0.01)
+
+
+def test_same_script_is_not_queued_twice(scheduler):
+    runner = BlockingRunner()
+    instance = scheduler(runner, {'ahk': 1, 'python': 1})
+    done = threading.Event()
+
+    assert instance.schedule("a.ahk", on_complete=lambda *args: done.set())
+    assert not instance.schedule("a.ahk")
+    assert instance.is_active("a.ahk")
+    runner.release()
+    assert done.wait(2)
+    # Terminado, se puede volver a encolar
+    assert instance.schedule("a.ahk")
+
+
+def test_full_queue_rejects_without_blocking(scheduler):
+    runner = BlockingRunner()
+    instance = scheduler(runner, {'ahk': 1}, max_queue=1)
+
+    assert instance.schedule("uno.ahk")
+    wait_until(lambda: runner.started == ["uno.ahk"])
+    assert instance.schedule("dos.ahk")
+    started = time.monotonic()
+    assert not instance.schedule("tres.ahk")
+    assert time.monotonic() - started < 0.1
+    assert not instance.is_active("tres.ahk")
+    runner.release()
+
+
+def test_concurrency_limit_per_type(scheduler):
+    runner = BlockingRunner()
+    instance = scheduler(runner, {'ahk': 2, 'python': 1})
+    for i in range(4):
+        assert instance.schedule(f"script{i}.ahk")
+        assert instance.schedule(f"script{i}.py")
+
+    wait_until(lambda: len(runner.started) == 3)
+    time.sleep(0.1)
+    assert runner.running == {'ahk': 2, 'python': 1}
+    runner.release()
+    wait_until(lambda: len(runner.started) == 8)
+    assert runner.peak == {'ahk': 2, 'python': 1}
+
+
+def test_missing_type_runs_one_at_a_time(scheduler):
+    runner = BlockingRunner()
+    instance = scheduler(runner, {'ahk': 3})
+    instance.schedule("a.py")
+    instance.schedule("b.py")
+    wait_until(lambda: runner.started == ["a.py"])
+    time.sleep(0.1)
+    assert runner.started == ["a.py"]
+    runner.release()
+    wait_until(lambda: len(runner.started) == 2)
+
+
+def test_errors_reach_on_complete_and_free_the_script(scheduler):
+    results = []
+    done = threading.Event()
+
+    def fail(script_path, context):
+        raise RuntimeError(f"falló {context}")
+
+    instance = scheduler(fail, {'python': 1})
+    instance.schedule("roto.py", "contexto", on_complete=lambda path, error, seconds: (results.append((path, str(error))), done.set()))
+    assert done.wait(2)
+    assert results == [("roto.py", "falló contexto")]
+    assert not instance.is_active("roto.py")
+
+
+def test_stop_does_not_wait_for_running_script(scheduler):
+    runner = BlockingRunner()
+    instance = scheduler(runner, {'ahk': 1})
+    instance.schedule("largo.ahk")
+    wait_until(lambda: runner.started == ["largo.ahk"])
+    started = time.monotonic()
+    instance.stop()
+    assert time.monotonic() - started < 0.1
+    runner.release()
@@ -0,0 +1,96 @@
+import os
+import time
+import textwrap
+
+import pytest
+
+from PoolTrabajadores import WorkerCrashedError, WorkerPool
+
+SCRIPT = textwrap.dedent("""
+    import os
+    import time
+    import asyncio
+
+    CALLS = []
+
+    def echo(value, suffix=""):
+        CALLS.append(value)
+        return f"{value}{suffix}"
+
+    def calls():
+        return len(CALLS)
+
+    def pid():
+        return os.getpid()
+
+    def sleep(seconds):
+        time.sleep(seconds)
+        return "despierto"
+
+    def crash():
+        os._exit(3)
+
+    def fail():
+        raise ValueError("entrada inválida")
+
+    async def async_echo(value):
+        await asyncio.sleep(0)
+        return value
+
+    def unpicklable():
+        return lambda: None
+""")
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "script de prueba 🧪.py"
+    path.write_text(SCRIPT, encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def pool(script):
+    instance = WorkerPool(processes=1, preload=[script])
+    instance.start()
+    yield instance
+    instance.stop()
+
+
+def test_results_errors_and_resident_module(pool, script):
+    assert pool.submit(script, 'echo', "hola", suffix="!").result(30) == "hola!"
+    assert pool.submit(script, 'async_echo', 5).result(30) == 5
+    # El módulo queda importado en el trabajador: el estado sobrevive entre trabajos
+    assert pool.submit(script, 'calls').result(30) == 1
+
+    with pytest.raises(RuntimeError, match="ValueError: entrada inválida"):
+        pool.submit(script, 'fail').result(30)
+    with pytest.raises(RuntimeError, match="no serializable"):
+        pool.submit(script, 'unpicklable').result(30)
+    assert pool.submit(script, 'echo', "sigue").result(30) == "sigue"
+
+
+def test_timeout_recycles_worker(pool, script):
+    first_pid = pool.submit(script, 'pid').result(30)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.submit(script, 'sleep', 30, timeout=1).result(30)
+    assert time.monotonic() - started < 10
+
+    assert pool.submit(script, 'pid').result(30) != first_pid
+    assert pool.submit(script, 'sleep', 0).result(30) == "despierto"
+
+
+def test_crash_recycles_worker(pool, script):
+    first_pid = pool.submit(script, 'pid').result(30)
+    with pytest.raises(WorkerCrashedError):
+        pool.submit(script, 'crash').result(30)
+
+    second_pid = pool.submit(script, 'pid').result(30)
+    assert second_pid != first_pid and second_pid != os.getpid()
+    assert pool.submit(script, 'echo', "de nuevo").result(30) == "de nuevo"
+
+
+def test_submit_requires_started_pool(script):
+    with pytest.raises(RuntimeError):
+        WorkerPool(processes=1).submit(script, 'echo', "x")
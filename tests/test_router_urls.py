@@ -0,0 +1,71 @@
+import pytest
+
+from AlmacenConfiguracion import load_config_section
+from RouterUrls import UrlRouter, legacy_route
+
+VIDEO = "dQw4w9WgXcQ"
+PLAYLIST = "PL590L5WQmH8fJ54F369BLDSqIwcs-TCfs"
+
+
+@pytest.fixture(scope="module")
+def patterns():
+    return load_config_section('PATRONES_URL')
+
+
+@pytest.mark.parametrize("text, category, ids", [
+    (f"https://www.youtube.com/watch?v={VIDEO}", "youtube_video", {'video_id': VIDEO}),
+    (f"http://youtube.com/watch?v={VIDEO}", "youtube_video", {'video_id': VIDEO}),
+    (f"https://youtu.be/{VIDEO}?t=30", "youtube_video", {'video_id': VIDEO}),
+    # youtube_video va antes en el config: un video dentro de una lista sigue siendo video
+    (f"https://www.youtube.com/watch?v={VIDEO}&list={PLAYLIST}", "youtube_video", {'video_id': VIDEO}),
+    (f"https://www.youtube.com/playlist?list={PLAYLIST}", "playlist", {'playlist_id': PLAYLIST}),
+    ("https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M", "playlist", {'playlist_id': "37i9dQZF1DXcBWIGoYBM5M"}),
+    ("https://soundcloud.com/artista/sets/mi-lista", "soundcloud", {'playlist_id': "mi-lista"}),
+    ("necesito ayuda con el informe", None, None),
+    (f"mirá esto https://youtu.be/{VIDEO}", None, None),
+])
+def test_routes_config_patterns(patterns, text, category, ids):
+    match = UrlRouter(patterns).route(text)
+    if category is None:
+        assert match is None
+    else:
+        assert (match.category, match.ids, match.url) == (category, ids, text)
+
+
+@pytest.mark.parametrize("text", [
+    f"https://www.youtube.com/watch?v={VIDEO}",
+    f"https://www.youtube.com/watch?v={VIDEO}&list={PLAYLIST}",
+    f"https://www.youtube.com/playlist?list={PLAYLIST}",
+    "https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M",
+    "texto cualquiera",
+])
+def test_same_category_as_legacy_route(patterns, text):
+    match = UrlRouter(patterns).route(text)
+    assert (match.category if match else None) == legacy_route(patterns, text)
+
+
+def test_category_order_decides_and_groups_belong_to_the_winner():
+    mixed = f"https://www.youtube.com/watch?v={VIDEO}&list={PLAYLIST}"
+    playlist_first = {
+        'playlist': [r"https?://(?:www\.)?youtube\.com/watch\?v=(?P<video_id>[\w-]+)&list=(?P<playlist_id>[\w-]*)"],
+        'youtube_video': [r"https?://(?:www\.)?youtube\.com/watch\?v=(?P<video_id>[\w-]+)"],
+    }
+    match = UrlRouter(playlist_first).route(mixed)
+    assert match.category == 'playlist'
+    assert match.ids == {'video_id': VIDEO, 'playlist_id': PLAYLIST}
+
+    video_first = dict(reversed(list(playlist_first.items())))
+    match = UrlRouter(video_first).route(mixed)
+    assert match.category == 'youtube_video'
+    # Los grupos de la alternativa que no ganó no aparecen
+    assert match.ids == {'video_id': VIDEO}
+
+
+def test_optional_group_left_out_when_empty():
+    router = UrlRouter({'video': [r"https?://v\.example/(?P<video_id>\w+)(?:\?t=(?P<start>\d+))?"]})
+    assert router.route("https://v.example/abc").ids == {'video_id': "abc"}
+    assert router.route("https://v.example/abc?t=30").ids == {'video_id': "abc", 'start': "30"}
+
+
+def test_empty_patterns_route_nothing():
+    assert UrlRouter({}).route(f"https://youtu.be/{VIDEO}") is None
@@ -0,0 +1,105 @@
+import sys
+import json
+import asyncio
+from unittest import mock
+
+from ClienteLLM import iter_sse_deltas, start_mock_server, stream_completion
+from SalidaStreaming import TELEGRAM_MESSAGE_LIMIT, ClipboardSink, StreamSink, TelegramStreamSink
+
+
+class RecordingSink(StreamSink):
+    def __init__(self):
+        self.updates = []
+        self.finished = None
+
+    async def update(self, text: str):
+        self.updates.append(text)
+
+    async def finish(self, text: str):
+        self.finished = text
+
+
+class FakeResponse:
+    """Solo lo que lee iter_sse_deltas: response.content como iterable asíncrono de líneas"""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    @property
+    def content(self):
+        async def iterate():
+            for line in self.lines:
+                yield line.encode('utf-8')
+        return iterate()
+
+
+async def collect(lines) -> list:
+    return [delta async for delta in iter_sse_deltas(FakeResponse(lines))]
+
+
+def chunk(content=None, **delta) -> str:
+    if content is not None:
+        delta['content'] = content
+    return f"data: {json.dumps({'choices': [{'delta': delta}]})}\n"
+
+
+def test_sse_skips_keepalives_and_empty_deltas():
+    lines = [": keep-alive\n", "\n", chunk(role="assistant"), chunk("Hola"), "\n", chunk(""), chunk(" mundo"),
+             "data: [DONE]\n", chunk("después del final")]
+    assert asyncio.run(collect(lines)) == ["Hola", " mundo"]
+
+
+def test_stream_against_stub_server():
+    reply = "una respuesta de varias palabras"
+
+    async def run():
+        runner = await start_mock_server(0, delay=0, reply=reply, token_delay=0)
+        port = runner.addresses[0][1]
+        sink = RecordingSink()
+        try:
+            text = await stream_completion([{"role": "user", "content": "hola"}], "test", "mock", [sink],
+                                           base_url=f"http://127.0.0.1:{port}/v1")
+        finally:
+            await runner.cleanup()
+        return text, sink
+
+    text, sink = asyncio.run(run())
+    assert text == reply == sink.finished
+    # Una actualización por palabra, cada una con todo el texto acumulado
+    assert len(sink.updates) == len(reply.split(" "))
+    assert all(reply.startswith(update) for update in sink.updates)
+    assert sink.updates[-1] == reply
+
+
+def test_telegram_sink_edits_one_message_and_splits_long_text():
+    reply = " ".join(f"palabra{i}" for i in range(600))
+
+    async def run():
+        runner = await start_mock_server(0, delay=0, reply=reply, token_delay=0.001)
+        base = f"http://127.0.0.1:{runner.addresses[0][1]}"
+        sink = TelegramStreamSink("test", 42, interval=0.05, api_url=base, reply_to=7)
+        try:
+            await stream_completion([{"role": "user", "content": "resumen"}], "test", "mock", [sink],
+                                    base_url=f"{base}/v1")
+        finally:
+            await runner.cleanup()
+        return runner.app['telegram'], sink
+
+    calls, sink = asyncio.run(run())
+    sends = [payload for method, payload in calls if method == 'sendMessage']
+    assert len(reply) > TELEGRAM_MESSAGE_LIMIT and len(sends) == 2
+    assert sends[0]['reply_to_message_id'] == 7 and 'reply_to_message_id' not in sends[1]
+    assert sink.edits > 0
+    assert all(payload['chat_id'] == 42 for _, payload in calls)
+    assert "".join(sink.sent) == reply
+
+
+def test_clipboard_sink_marks_delivered_text_only():
+    pyperclip = mock.Mock()
+    with mock.patch.dict(sys.modules, {'pyperclip': pyperclip}), \
+            mock.patch('MonitorPortapapeles.mark_own_write') as mark_own_write:
+        asyncio.run(ClipboardSink().finish("solo portapapeles"))
+        mark_own_write.assert_not_called()
+        asyncio.run(ClipboardSink(delivered=True).finish("ya en Telegram"))
+        mark_own_write.assert_called_once_with("ya en Telegram")
+    assert pyperclip.copy.call_args_list == [mock.call("solo portapapeles"), mock.call("ya en Telegram")]
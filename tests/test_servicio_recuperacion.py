@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pytest
+
+from AlmacenVectorial import LocalVectorStore, local_store_directory, store_version_files
+
+
+@pytest.fixture
+def fusion():
+    pytest.importorskip("langchain_core")
+    pytest.importorskip("langchain_huggingface")
+    from langchain_core.documents import Document
+    from ServicioRecuperacion import reciprocal_rank_fusion
+    return Document, reciprocal_rank_fusion
+
+
+def test_rrf_keys_by_chunk_id(fusion):
+    Document, reciprocal_rank_fusion = fusion
+    dense = [Document(id="a", page_content="mismo texto"), Document(id="b", page_content="otro")]
+    lexical = [Document(id="c", page_content="mismo texto"), Document(id="a", page_content="mismo texto")]
+
+    fused = reciprocal_rank_fusion([dense, lexical], k=60)
+    scores = {document.id: score for document, score in fused}
+    # Igual texto con otro ID es otro fragmento; el mismo ID en ambas listas suma
+    assert scores == pytest.approx({"a": 1 / 61 + 1 / 62, "b": 1 / 62, "c": 1 / 61})
+    assert [document.id for document, _ in fused] == ["a", "c", "b"]
+
+
+def test_rrf_ties_and_single_retriever_results(fusion):
+    Document, reciprocal_rank_fusion = fusion
+    dense = [Document(id="solo_denso", page_content="x"), Document(id="ambos", page_content="y")]
+    lexical = [Document(id="solo_lexico", page_content="z"), Document(id="ambos", page_content="y")]
+
+    fused = reciprocal_rank_fusion([dense, lexical], k=60)
+    assert [document.id for document, _ in fused] == ["ambos", "solo_denso", "solo_lexico"]
+    # Empate: mismo puntaje y se conserva el orden de aparición
+    assert fused[1][1] == fused[2][1] == pytest.approx(1 / 61)
+
+
+def test_rrf_without_ids_falls_back_to_text(fusion):
+    Document, reciprocal_rank_fusion = fusion
+    fused = reciprocal_rank_fusion([[Document(page_content="uno")], [Document(page_content="uno")]])
+    assert len(fused) == 1 and fused[0][1] == pytest.approx(2 / 61)
+
+
+def version(paths):
+    return tuple((path, os.stat(path).st_mtime_ns) if os.path.exists(path) else (path, None) for path in paths)
+
+
+def test_local_store_version_changes_only_on_commit(tmp_path):
+    config = {'backend': 'local', 'cuantizacion': 'int8'}
+    files = store_version_files(str(tmp_path), config)
+    assert files == [os.path.join(local_store_directory(str(tmp_path), config), 'state.json')]
+    empty = version(files)
+
+    store = LocalVectorStore(local_store_directory(str(tmp_path), config))
+    store.upsert(["a"], np.ones((1, 4)), ["texto"], [{}])
+    assert version(files) == empty
+    store.persist()
+    assert version(files) != empty
+
+
+def test_chroma_version_ignores_local_store_files(tmp_path):
+    segment = tmp_path / "1b4e28ba-2fa1-11d2-883f-0016d3cca427"
+    segment.mkdir()
+    (segment / "data_level0.bin").write_bytes(b"")
+    (tmp_path / "local_int8").mkdir()
+    (tmp_path / "local_int8" / "records.jsonl").write_bytes(b"")
+    (tmp_path / "indice_lexico.sqlite3").write_bytes(b"")
+
+    assert store_version_files(str(tmp_path), {'backend': 'chroma'}) == sorted([
+        str(tmp_path / "chroma.sqlite3"), str(segment / "data_level0.bin")])